@@ -1,6 +1,7 @@
 import smtplib
 import ssl
 import time
+import json
 import sqlite3
 from datetime import datetime
 from email.mime.text import MIMEText
@@ -8,10 +9,139 @@ from email.mime.multipart import MIMEMultipart
 
 from app.config import settings
 from app.settings_store import get_threshold, load_settings
+from db.response_times import record_response_times
+from db.writer import submit
 
 DB_PATH = "sla_logs.db"
 
 
+def record_alert(order_id: str, probability: float, threshold: float, severity: str) -> bool:
+    """
+    Insert an open alert for the order unless one is already unresolved.
+    Returns True when a new alert row was written.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cursor = conn.cursor()
+        # Check if alert already exists for this order_id to prevent duplicates
+        cursor.execute(
+            "SELECT id FROM alerts WHERE order_id = ? AND status != 'resolved'",
+            (order_id,),
+        )
+        if cursor.fetchone():
+            print(f"[INFO] Alert already exists for order {order_id}, skipping duplicate")
+            return False
+
+        cursor.execute(
+            """
+            INSERT INTO alerts (order_id, miss_sla_proba, threshold, triggered_at, status, severity)
+            VALUES (?, ?, ?, datetime('now'), 'open', ?)
+            """,
+            (order_id, probability, threshold, severity),
+        )
+        conn.commit()
+        print(f"[ALERT] Logged alert for order {order_id} (risk={probability:.2f}, severity={severity})")
+        return True
+    finally:
+        conn.close()
+
+
+# action -> (statuses it applies to, status it sets, alert_actions type)
+TRANSITIONS = {
+    "ack": (("open",), "acknowledged", "ACK"),
+    "resolve": (("open", "acknowledged"), "resolved", "RESOLVE"),
+}
+
+
+def transition_alerts(
+    action: str,
+    ids: list[int],
+    actual_sla_missed: bool | None = None,
+    resolution_notes: str | None = None,
+    log_actions: bool = False,
+) -> dict:
+    """
+    Acknowledge or resolve the given alerts in one transaction, recording
+    their response times (and, with `log_actions`, an alert_actions row
+    each). Returns {id: status before the call} (None when not found);
+    only the alerts whose status the action applies to were changed.
+    """
+    from_statuses, _, action_type = TRANSITIONS[action]
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        current = dict(conn.execute(
+            "SELECT id, status FROM alerts WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(ids),),
+        ).fetchall())
+        targets = [i for i in ids if current.get(i) in from_statuses]
+        if targets:
+            target_json = json.dumps(targets)
+            if action == "ack":
+                conn.execute(
+                    """
+                    UPDATE alerts
+                    SET status = 'acknowledged', acknowledged_at = datetime('now')
+                    WHERE id IN (SELECT value FROM json_each(?))
+                    """,
+                    (target_json,),
+                )
+                payload = {"bulk": True}
+            else:
+                conn.execute(
+                    """
+                    UPDATE alerts
+                    SET status = 'resolved',
+                        resolved_at = datetime('now'),
+                        resolution_notes = ?,
+                        actual_sla_missed = ?
+                    WHERE id IN (SELECT value FROM json_each(?))
+                    """,
+                    (resolution_notes, 1 if actual_sla_missed else 0, target_json),
+                )
+                payload = {
+                    "bulk": True,
+                    "actual_sla_missed": actual_sla_missed,
+                    "resolution_notes": resolution_notes,
+                }
+            record_response_times(conn, action, targets)
+            if log_actions:
+                payload = json.dumps(payload)
+                conn.executemany(
+                    """
+                    INSERT INTO alert_actions (alert_id, action_type, payload, created_at)
+                    VALUES (?, ?, ?, datetime('now'))
+                    """,
+                    [(i, action_type, payload) for i in targets],
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return {i: current.get(i) for i in ids}
+
+
+def add_alert_action(alert_id: int, action_type: str, payload: str | None) -> bool:
+    """Log an automation action for an alert; False when the alert does not exist."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if not conn.execute("SELECT 1 FROM alerts WHERE id = ?", (alert_id,)).fetchone():
+            return False
+        conn.execute(
+            """
+            INSERT INTO alert_actions (alert_id, action_type, payload, created_at)
+            VALUES (?, ?, ?, datetime('now'))
+            """,
+            (alert_id, action_type, payload),
+        )
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
 def send_email_alert(order, probability: float) -> None:
     """Send an SLA alert email for a single order if email alerts are enabled."""
 
@@ -26,31 +156,8 @@ def send_email_alert(order, probability: float) -> None:
     # ALWAYS log alert to DB first (even if email fails)
     # This ensures alerts appear in UI even if SMTP is misconfigured
     threshold = get_threshold()
-    alert_logged = False
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # Check if alert already exists for this order_id to prevent duplicates
-        cursor.execute(
-            "SELECT id FROM alerts WHERE order_id = ? AND status != 'resolved'",
-            (order.order_id,),
-        )
-        existing = cursor.fetchone()
-        
-        if not existing:
-            cursor.execute(
-                """
-                INSERT INTO alerts (order_id, miss_sla_proba, threshold, triggered_at, status, severity)
-                VALUES (?, ?, ?, datetime('now'), 'open', ?)
-                """,
-                (order.order_id, probability, threshold, severity),
-            )
-            conn.commit()
-            alert_logged = True
-            print(f"[ALERT] Logged alert for order {order.order_id} (risk={probability:.2f}, severity={severity})")
-        else:
-            print(f"[INFO] Alert already exists for order {order.order_id}, skipping duplicate")
-        conn.close()
+        submit("alert", order.order_id, probability, threshold, severity)
     except Exception as db_err:
         print(f"[ERROR] Failed to log alert to DB for order {order.order_id}: {db_err}")
         # Continue anyway - try to send email even if DB logging failed
@@ -1,5 +1,11 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import asyncio
+import multiprocessing
 import os
+import threading
+import time
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -12,6 +18,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Verified token payloads, most recently used last: token -> (payload, exp)
+_token_cache: "OrderedDict[str, tuple[dict, float]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+# bcrypt runs in its own small process pool so a burst of logins cannot
+# occupy the request threadpool that scoring depends on
+_hash_pool: ProcessPoolExecutor | None = None
+_hash_pool_lock = threading.Lock()
+_hash_slots = asyncio.Semaphore(settings.AUTH_HASH_MAX_CONCURRENT)
+
 
 def hash_password(password: str) -> str:
   return pwd_context.hash(password)
@@ -21,6 +37,40 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
   return pwd_context.verify(plain_password, hashed_password)
 
 
+def _get_hash_pool() -> ProcessPoolExecutor:
+  global _hash_pool
+  with _hash_pool_lock:
+    if _hash_pool is None:
+      # spawn, not fork: the server process already runs threads
+      _hash_pool = ProcessPoolExecutor(
+        max_workers=settings.AUTH_HASH_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+      )
+    return _hash_pool
+
+
+async def _run_hash_job(fn, *args):
+  async with _hash_slots:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_pool(), fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+  return await _run_hash_job(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+  return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+
+def shutdown_hash_pool() -> None:
+  global _hash_pool
+  with _hash_pool_lock:
+    if _hash_pool is not None:
+      _hash_pool.shutdown(wait=False, cancel_futures=True)
+      _hash_pool = None
+
+
 def create_token(payload: dict) -> str:
   to_encode = payload.copy()
   expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -28,10 +78,45 @@ def create_token(payload: dict) -> str:
   return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def _cached_payload(token: str):
+  with _token_cache_lock:
+    entry = _token_cache.get(token)
+    if entry is None:
+      return None
+    payload, exp = entry
+    if exp <= time.time():
+      del _token_cache[token]
+      return None
+    _token_cache.move_to_end(token)
+    return payload
+
+
+def _cache_payload(token: str, payload: dict) -> None:
+  exp = payload.get("exp")
+  if not isinstance(exp, (int, float)) or settings.TOKEN_CACHE_SIZE <= 0:
+    return
+  with _token_cache_lock:
+    _token_cache[token] = (payload, float(exp))
+    _token_cache.move_to_end(token)
+    while len(_token_cache) > settings.TOKEN_CACHE_SIZE:
+      _token_cache.popitem(last=False)
+
+
 def decode_token(token: str):
+  """
+  Verify a JWT and return its payload, or None if invalid/expired.
+
+  Verified payloads are kept in a bounded LRU until their `exp`, so repeat
+  requests with the same token skip signature verification.
+  """
+  payload = _cached_payload(token)
+  if payload is not None:
+    return payload
+
   try:
-    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
   except JWTError:
     return None
 
-
+  _cache_payload(token, payload)
+  return payload
@@ -0,0 +1,29 @@
+from datetime import datetime
+import sqlite3
+
+# Reuse the same DB file as the rest of the app (see db/init_db.py)
+DB = "sla_logs.db"
+
+
+def insert_user(email: str, password_hash: str, role: str) -> bool:
+  """Create a user (a DB writer op); False when the email is already taken."""
+  conn = sqlite3.connect(DB)
+  try:
+    conn.execute(
+      """
+      INSERT INTO users (email, password_hash, role, created_at)
+      VALUES (?, ?, ?, ?)
+      """,
+      (
+        email,
+        password_hash,
+        role,
+        datetime.utcnow().isoformat(),
+      ),
+    )
+    conn.commit()
+    return True
+  except sqlite3.IntegrityError:
+    return False
+  finally:
+    conn.close()
@@ -18,6 +18,95 @@ class Settings(BaseSettings):
     # JWT signing secret (must be provided via environment for production)
     SECRET_KEY: str = ""
     
+    # Auth: verified-token LRU size and the bcrypt process pool
+    TOKEN_CACHE_SIZE: int = 1024
+    AUTH_HASH_WORKERS: int = 2
+    AUTH_HASH_MAX_CONCURRENT: int = 4
+
+    # Per-route-class thread pools: WORKERS run concurrently, QUEUE more may
+    # wait; requests beyond that get 503 + Retry-After
+    WORKLOAD_SCORING_WORKERS: int = 16
+    WORKLOAD_SCORING_QUEUE: int = 64
+    WORKLOAD_ANALYTICS_WORKERS: int = 4
+    WORKLOAD_ANALYTICS_QUEUE: int = 8
+    WORKLOAD_ADMIN_WORKERS: int = 4
+    WORKLOAD_ADMIN_QUEUE: int = 16
+    WORKLOAD_RETRY_AFTER_SEC: int = 1
+
+    # Async /predict path: inline inference on the event loop (False routes it
+    # through the scoring pool), queues drained by background writers
+    PREDICT_INLINE: bool = True
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 500
+    ALERT_QUEUE_SIZE: int = 1000
+    THRESHOLD_CACHE_TTL_SEC: float = 2.0
+    # Largest order array accepted by /predict/batch
+    PREDICT_BATCH_MAX_ORDERS: int = 1000
+
+    # Seconds between checks of the model file for hot reload (0 disables)
+    MODEL_WATCH_INTERVAL_SEC: float = 30.0
+
+    # /health is served from a status refreshed every CHECK_INTERVAL_SEC;
+    # /health?deep=1 flags components slower than SLOW_MS
+    HEALTH_CHECK_INTERVAL_SEC: float = 10.0
+    HEALTH_SLOW_MS: float = 250.0
+    HEALTH_SMTP_TIMEOUT_SEC: float = 3.0
+
+    # Synthetic orders run through the predict path at startup before
+    # /ready turns green (0 skips warmup)
+    WARMUP_ORDERS: int = 64
+
+    # Degraded mode: the linear fallback scorer, the scoring latency (EWMA,
+    # queue wait included) and consecutive-error count that switch to it,
+    # and how long to stay on it before trying the main model again
+    FALLBACK_MODEL_PATH: str = "models/baseline.pkl"
+    FALLBACK_LATENCY_MS: float = 250.0
+    FALLBACK_ERROR_LIMIT: int = 5
+    FALLBACK_COOLDOWN_SEC: float = 30.0
+
+    # Most alerts one bulk ack/resolve request may change
+    ALERT_BULK_MAX: int = 5000
+
+    # /predict result cache for retries and duplicate webhooks (0 disables)
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_TTL_SEC: float = 30.0
+
+    # Open-order timers: each order's threshold-crossing time is planned over
+    # a grid of GRID_POINTS instants GRID_STEP_MIN apart. The leader wakes at
+    # the next timer or after POLL_SEC (0 disables), re-plans everything every
+    # REPLAN_SEC, and is elected through LOCK_PATH
+    OPEN_ORDER_GRID_STEP_MIN: float = 1.0
+    OPEN_ORDER_GRID_POINTS: int = 60
+    OPEN_ORDER_POLL_SEC: float = 5.0
+    OPEN_ORDER_REPLAN_SEC: float = 900.0
+    OPEN_ORDER_LOCK_PATH: str = "open_orders.lock"
+
+    # Shadow scoring: comma-separated candidate model paths (empty disables),
+    # bounded queue, batch size and CPU budget as a fraction of one core
+    SHADOW_MODELS: str = ""
+    SHADOW_QUEUE_SIZE: int = 5000
+    SHADOW_BATCH_SIZE: int = 256
+    SHADOW_CPU_BUDGET: float = 0.2
+
+    # Predictions retention: rows older than RETENTION_DAYS are moved to
+    # date-partitioned Parquet files under ARCHIVE_DIR (0 disables retention)
+    RETENTION_DAYS: int = 30
+    RETENTION_BATCH_SIZE: int = 5000
+    RETENTION_INTERVAL_MIN: int = 60
+    ARCHIVE_DIR: str = "archive"
+
+    # Analytics mirror: predictions and alerts copied into Parquet under
+    # ANALYTICS_DIR every SYNC_INTERVAL_SEC (by id watermark, SYNC_BATCH_SIZE
+    # rows per commit) and queried with DuckDB on THREADS threads by the
+    # trend/distribution stats. A partition is merged once it has
+    # COMPACT_FILES parts. Off: those stats read SQLite directly
+    ANALYTICS_MIRROR: bool = False
+    ANALYTICS_DIR: str = "analytics"
+    ANALYTICS_SYNC_INTERVAL_SEC: float = 10.0
+    ANALYTICS_SYNC_BATCH_SIZE: int = 50000
+    ANALYTICS_COMPACT_FILES: int = 32
+    ANALYTICS_THREADS: int = 2
+
     vite_api_url: str | None = None
     class Config:
         env_file = ".env"
@@ -5,11 +5,46 @@ WEATHER_MAP = {"CLEAR": 0, "CLOUDS": 1, "RAIN": 2}
 PRIORITY_MAP = {"LOW": 0, "NORMAL": 1, "HIGH": 2}
 CARRIER_MAP  = {"BIKE": 0, "SCOOTER": 1, "CAR": 2, "VAN": 3}
 
+# Codes the model is scored with for values outside the maps
+DEFAULT_WEATHER = 0
+DEFAULT_PRIORITY = 1
+DEFAULT_CARRIER = 0
+
+# Code logged for values outside the maps, so stored rows keep "unknown"
+# apart from the real category the model falls back to
+UNKNOWN_CODE = -1
+UNKNOWN_NAME = "UNKNOWN"
+
+# Reverse lookups for turning stored codes back into display names
+WEATHER_NAMES = {v: k for k, v in WEATHER_MAP.items()} | {UNKNOWN_CODE: UNKNOWN_NAME}
+PRIORITY_NAMES = {v: k for k, v in PRIORITY_MAP.items()} | {UNKNOWN_CODE: UNKNOWN_NAME}
+CARRIER_NAMES = {v: k for k, v in CARRIER_MAP.items()} | {UNKNOWN_CODE: UNKNOWN_NAME}
+
 def to_minutes(dt: datetime):
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
     return dt.timestamp() / 60
 
+def encode_categoricals(order):
+    """
+    Integer codes for (weather, priority, carrier) as logged.
+
+    Values outside the maps get UNKNOWN_CODE; model_codes() turns the
+    result into the codes the model is scored with.
+    """
+    weather = WEATHER_MAP.get(order.weather_code.upper(), UNKNOWN_CODE)
+    priority = PRIORITY_MAP.get(order.priority.upper(), UNKNOWN_CODE)
+    carrier = CARRIER_MAP.get(order.carrier.upper(), UNKNOWN_CODE)
+    return weather, priority, carrier
+
+def model_codes(weather, priority, carrier):
+    """Logged codes -> model codes: UNKNOWN_CODE becomes each column's default."""
+    return (
+        DEFAULT_WEATHER if weather == UNKNOWN_CODE else weather,
+        DEFAULT_PRIORITY if priority == UNKNOWN_CODE else priority,
+        DEFAULT_CARRIER if carrier == UNKNOWN_CODE else carrier,
+    )
+
 def build_feature_vector(order):
     created = order.created_at
     promised = order.promised_at
@@ -18,9 +53,7 @@ def build_feature_vector(order):
     age_min = to_minutes(now) - to_minutes(created)
     promise_delta_min = to_minutes(promised) - to_minutes(now)
 
-    weather = WEATHER_MAP.get(order.weather_code.upper(), 0)
-    priority = PRIORITY_MAP.get(order.priority.upper(), 1)
-    carrier = CARRIER_MAP.get(order.carrier.upper(), 0)
+    weather, priority, carrier = model_codes(*encode_categoricals(order))
 
     x = np.array([
         age_min,
@@ -35,3 +68,22 @@ def build_feature_vector(order):
     ], dtype=np.float32)
 
     return x
+
+def build_feature_matrix(created_min, promised_min, static, now=None, at_min=None):
+    """
+    Vectorized build_feature_vector for many orders.
+
+    created_min / promised_min are epoch minutes (see to_minutes); static is
+    an (n, 7) array of distance, items, hub_load, traffic, weather,
+    priority, carrier. Only the first two features depend on time: rows are
+    evaluated at `now`, or at the per-row epoch minutes in `at_min`.
+    """
+    if at_min is not None:
+        now_min = np.asarray(at_min)
+    else:
+        now_min = to_minutes(now or datetime.now(timezone.utc))
+    X = np.empty((len(created_min), 9), dtype=np.float32)
+    X[:, 0] = now_min - np.asarray(created_min)
+    X[:, 1] = np.asarray(promised_min) - now_min
+    X[:, 2:] = static
+    return X
@@ -0,0 +1,148 @@
+import asyncio
+import socket
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+from app.model import PROBE_BATCH
+from app.settings_store import load_settings
+from app.shadow import shadow_scorer
+from app.sinks import sink_stats
+from app.workloads import run_in_workload, workload_stats
+from db.writer import submit
+
+DB_PATH = "sla_logs.db"
+
+def _timed(fn) -> dict:
+    """Run one check; status is ok, slow (over HEALTH_SLOW_MS) or fail."""
+    started = time.perf_counter()
+    try:
+        detail = fn()
+        status = "ok"
+        error = None
+    except Exception as e:
+        detail = None
+        status = "fail"
+        error = f"{type(e).__name__}: {e}"
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    if status == "ok" and latency_ms > settings.HEALTH_SLOW_MS:
+        status = "slow"
+    result = {"status": status, "latency_ms": latency_ms}
+    if detail is not None:
+        result["detail"] = detail
+    if error:
+        result["error"] = error
+    return result
+
+
+def _db_read():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute("SELECT threshold FROM settings WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+
+
+def _db_write():
+    submit("health_probe", wait=True)
+
+
+def _smtp():
+    if not settings.SMTP_HOST:
+        return "not configured"
+    # Reachability only: TCP connect, no login and no mail
+    address = (settings.SMTP_HOST, settings.SMTP_PORT)
+    with socket.create_connection(address, timeout=settings.HEALTH_SMTP_TIMEOUT_SEC):
+        pass
+    return f"{settings.SMTP_HOST}:{settings.SMTP_PORT}"
+
+
+def _inference(model_service):
+    def run():
+        _, version = model_service.score_matrix(PROBE_BATCH[:1])
+        return {"version": version, "degraded": model_service.degraded}
+    return run
+
+
+class HealthMonitor:
+    """
+    Liveness status refreshed by a background thread.
+
+    `/health` only reads the cached result, so a probe every few seconds
+    per instance costs nothing; the database and settings are checked
+    once per HEALTH_CHECK_INTERVAL_SEC here instead of once per probe.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._status = None
+        self._checked_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def check(self) -> None:
+        db = _timed(_db_read)
+        config = _timed(load_settings)
+        self._status = {
+            "api": "ok",
+            "db": "ok" if db["status"] != "fail" else "fail",
+            "settings": "ok" if config["status"] != "fail" else "fail",
+        }
+        self._checked_at = time.monotonic()
+
+    def status(self) -> dict:
+        if self._status is None:
+            # No background result yet (or monitor disabled): check inline once
+            self.check()
+        return {
+            **self._status,
+            "checked_sec_ago": round(time.monotonic() - self._checked_at, 1),
+        }
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[ERROR] Health check failed: {type(e).__name__}: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+async def deep_check(model_service) -> dict:
+    """
+    Measure every subsystem now, concurrently on the admin pool: DB read,
+    DB write round-trip (through the writer when one runs), inference on a
+    probe row, SMTP reachability; plus current queue depths.
+    """
+    names = ["db_read", "db_write", "inference", "smtp"]
+    checks = [_db_read, _db_write, _inference(model_service), _smtp]
+    results = await asyncio.gather(*(run_in_workload("admin", _timed, fn) for fn in checks))
+    components = dict(zip(names, results))
+
+    return {
+        "status": "ok" if all(c["status"] == "ok" for c in components.values()) else "degraded",
+        "components": components,
+        "queues": {
+            "sinks": {name: s["depth"] for name, s in sink_stats().items()},
+            "workloads": {
+                name: {"running": w["running"], "queued": w["queued"]}
+                for name, w in workload_stats().items()
+            },
+            "shadow": shadow_scorer.stats()["queue_depth"],
+        },
+    }
+
+
+health_monitor = HealthMonitor(settings.HEALTH_CHECK_INTERVAL_SEC)
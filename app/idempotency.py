@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
+from app.config import settings
+
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key was reused with a different order payload."""
+
+
+def request_key(order, idempotency_key: str | None) -> tuple[str, str]:
+    """
+    (key, payload digest). The key is the client's Idempotency-Key when
+    given; otherwise order_id plus the digest, so a retried identical order
+    maps to the same key while a changed order does not.
+    """
+    digest = hashlib.sha1(order.model_dump_json().encode()).hexdigest()[:16]
+    if idempotency_key:
+        return f"key:{idempotency_key}", digest
+    return f"order:{order.order_id}:{digest}", digest
+
+
+class ResultCache:
+    """
+    Bounded TTL + LRU cache of /predict results, plus in-flight tracking.
+
+    A duplicate that arrives while the first request is still being scored
+    awaits that request's result instead of scoring again. Each key keeps
+    the digest of the payload it was first seen with, so a key reused for a
+    different order is refused rather than answered with the other result.
+    Lives on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_entries: int, ttl_sec: float):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._done: "OrderedDict[str, tuple[float, str, object]]" = OrderedDict()
+        self._inflight: dict[str, tuple[str, asyncio.Future]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_sec > 0
+
+    async def lookup(self, key: str, digest: str):
+        """
+        Cached (or in-flight) result for `key`, or None on a miss. Raises
+        IdempotencyConflict when `key` belongs to a different payload.
+        """
+        entry = self._done.get(key)
+        if entry is not None:
+            expires, seen_digest, value = entry
+            if expires > time.monotonic():
+                if seen_digest != digest:
+                    raise IdempotencyConflict(key)
+                self._done.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._done[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            seen_digest, future = inflight
+            if seen_digest != digest:
+                raise IdempotencyConflict(key)
+            # None: the first request was cancelled, so score this one
+            value = await asyncio.shield(future)
+            if value is not None:
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def begin(self, key: str, digest: str) -> None:
+        # Duplicates that all missed share one future
+        if key not in self._inflight:
+            self._inflight[key] = (digest, asyncio.get_running_loop().create_future())
+
+    def complete(self, key: str, digest: str, value) -> None:
+        self._done[key] = (time.monotonic() + self.ttl_sec, digest, value)
+        self._done.move_to_end(key)
+        while len(self._done) > self.max_entries:
+            self._done.popitem(last=False)
+
+        _, future = self._inflight.pop(key, (None, None))
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def fail(self, key: str, error: BaseException) -> None:
+        """
+        Release waiting duplicates: they see the same error, or score the
+        order themselves when the first request was cancelled. Nothing is
+        cached.
+        """
+        _, future = self._inflight.pop(key, (None, None))
+        if future is None or future.done():
+            return
+        if isinstance(error, Exception):
+            future.set_exception(error)
+            # Mark retrieved so an unawaited failure is not logged as lost
+            future.exception()
+        else:
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._done),
+            "in_flight": len(self._inflight),
+            "max_entries": self.max_entries,
+            "ttl_sec": self.ttl_sec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+        }
+
+
+prediction_cache = ResultCache(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL_SEC)
@@ -1,15 +1,35 @@
-from fastapi import FastAPI, Depends
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import FastAPI, Depends, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from app.schemas import OrderInput, PredictionOutput, Settings as SettingsSchema
 from app.model import ModelService
 from app.config import settings
-from app.alert_engine import send_email_alert
 from app.settings_store import load_settings, save_settings, get_threshold
-from app.routes import alerts, stats, metrics, health, auth
+from app.routes import alerts, stats, metrics, health, auth, model, shadow, orders
 from app.auth.deps import require_role
-from db.db_connection import log_prediction, fetch_logs
+from app.auth.security import shutdown_hash_pool
+from app.workloads import workload, run_in_workload, shutdown_workloads
+from app.sinks import prediction_log_sink, alert_sink, open_order_sink, start_sinks, stop_sinks
+from app.open_orders import open_order_row, rescorer
+from app.features import to_minutes
+from app.shadow import shadow_scorer
+from app.warmup import start_warmup
+from app.health_monitor import health_monitor
+from app.idempotency import IdempotencyConflict, prediction_cache, request_key
+from app.serialization import (
+    PREDICTION, PREDICTION_LIST, JSONBytes, model_response, parse_orders, rows_json,
+)
+from app.features import build_feature_vector
+from db.db_connection import prediction_row, fetch_logs, LOG_COLUMNS
 from db.init_db import init_db
+from db.retention import start_retention_scheduler, iter_export_csv
+from db.analytics import start_analytics_sync
+from db.writer import writer_enabled
 
 app = FastAPI(
     title="SLA Prediction API",
@@ -22,8 +42,38 @@ app = FastAPI(
 def on_startup() -> None:
     """
     Ensure DB schema (predictions + settings) exists before serving traffic.
+
+    In multi-worker mode the DB writer process has already done this (and
+    owns retention and the analytics sync), so workers skip it rather than race on schema changes.
     """
+    if writer_enabled():
+        return
     init_db()
+    start_retention_scheduler()
+    start_analytics_sync()
+
+
+@app.on_event("startup")
+async def start_background_sinks() -> None:
+    start_sinks()
+    # Per process, so every worker picks up a new model file on its own
+    model_service.start_watcher()
+    shadow_scorer.start()
+    rescorer.start(model_service)
+    health_monitor.start()
+    # In the background: /health and /ready answer while this runs
+    start_warmup(model_service)
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await stop_sinks()
+    model_service.stop_watcher()
+    shadow_scorer.stop()
+    rescorer.stop()
+    health_monitor.stop()
+    shutdown_hash_pool()
+    shutdown_workloads()
 
 
 # Add CORS middleware to allow frontend requests
@@ -36,49 +86,197 @@ app.add_middleware(
 )
 
 model_service = ModelService()
+app.state.model_service = model_service
 
 
 @app.post("/predict", response_model=PredictionOutput)
-def predict(order: OrderInput):
-    proba = model_service.predict(order)
-    # Read threshold dynamically from database
+async def predict(order: OrderInput, idempotency_key: str | None = Header(None)):
+    """
+    Score one order without a threadpool hop.
+
+    Inference runs on the event loop (or the scoring pool when
+    PREDICT_INLINE is off); the prediction row and any alert are queued
+    to background writers, so the response never waits on SQLite or SMTP.
+
+    Repeats of the same request (same `Idempotency-Key` header, or same
+    order payload) within IDEMPOTENCY_TTL_SEC get the cached result with no
+    inference, logging or alerting. An `Idempotency-Key` reused with a
+    different order gets a 422.
+    """
+    if not prediction_cache.enabled:
+        return model_response(PREDICTION, await _score_order(order))
+
+    key, digest = request_key(order, idempotency_key)
+    try:
+        cached = await prediction_cache.lookup(key, digest)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different order")
+    if cached is not None:
+        return model_response(PREDICTION, cached)
+
+    prediction_cache.begin(key, digest)
+    try:
+        result = await _score_order(order, (key, digest))
+    except BaseException as e:
+        # CancelledError too (client gone): duplicates must not wait forever
+        prediction_cache.fail(key, e)
+        raise
+    return model_response(PREDICTION, result)
+
+
+async def _score_order(order: OrderInput, cache_key: tuple[str, str] | None = None) -> PredictionOutput:
+    x = build_feature_vector(order)
+    if settings.PREDICT_INLINE or model_service.degraded:
+        # The fallback is a dot product: never worth a pool hop
+        proba, version, scorer = model_service.score_vector(x)
+    else:
+        try:
+            proba, version, scorer = await run_in_workload(
+                "scoring", model_service.score_vector, x, time.perf_counter()
+            )
+        except HTTPException as e:
+            # Scoring pool full: answer from the fallback rather than a 503
+            if e.status_code != 503 or model_service.fallback is None:
+                raise
+            proba, version, scorer = model_service.score_fallback(x)
+    if scorer == "primary":
+        shadow_scorer.submit(order.order_id, x, proba)
+    # Threshold comes from the settings table (short in-process cache)
     threshold = get_threshold()
     will_miss = proba >= threshold
 
-    log_prediction(order, proba, will_miss)
+    result = PredictionOutput(
+        order_id=order.order_id,
+        miss_sla_proba=proba,
+        will_miss_sla=will_miss,
+        model_version=version,
+        scorer=scorer,
+    )
+    # Publish before the queue puts so duplicates waiting on us return now
+    if cache_key is not None:
+        prediction_cache.complete(*cache_key, result)
+
+    await prediction_log_sink.put(prediction_row(order, proba, will_miss, x))
+
+    # Track orders still inside their promise window for periodic re-scoring
+    if to_minutes(order.promised_at) > to_minutes(datetime.now(timezone.utc)):
+        await open_order_sink.put(open_order_row(order, proba, will_miss))
 
     if will_miss:
         print(f"[PREDICT] Order {order.order_id} triggered alert: proba={proba:.3f} >= threshold={threshold:.3f}")
-        send_email_alert(order, proba)
+        await alert_sink.put((order, proba))
     else:
         print(f"[PREDICT] Order {order.order_id} below threshold: proba={proba:.3f} < threshold={threshold:.3f}")
 
-    return PredictionOutput(
-        order_id=order.order_id,
-        miss_sla_proba=proba,
-        will_miss_sla=will_miss,
-    )
+    return result
+
+
+@app.post(
+    "/predict/batch",
+    response_model=list[PredictionOutput],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/OrderInput"}}
+                }
+            },
+        }
+    },
+)
+async def predict_batch(request: Request):
+    """
+    Score a JSON array of orders with one model call.
+
+    The body is validated straight from bytes by a precompiled TypeAdapter
+    and the results are encoded the same way. Every order is logged,
+    tracked and alerted as through /predict; the idempotency cache does not
+    apply to batches.
+    """
+    orders = parse_orders(await request.body())
+    if len(orders) > settings.PREDICT_BATCH_MAX_ORDERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.PREDICT_BATCH_MAX_ORDERS} orders per batch",
+        )
+    if not orders:
+        return JSONBytes(b"[]")
+
+    X = np.vstack([build_feature_vector(order) for order in orders])
+    proba, version, scorer = await _score_batch(X)
+    threshold = get_threshold()
+    now_min = to_minutes(datetime.now(timezone.utc))
+
+    results = []
+    for order, x, p in zip(orders, X, proba.tolist()):
+        will_miss = p >= threshold
+        results.append(PredictionOutput(
+            order_id=order.order_id,
+            miss_sla_proba=p,
+            will_miss_sla=will_miss,
+            model_version=version,
+            scorer=scorer,
+        ))
+        if scorer == "primary":
+            shadow_scorer.submit(order.order_id, x, p)
+        await prediction_log_sink.put(prediction_row(order, p, will_miss, x))
+        if to_minutes(order.promised_at) > now_min:
+            await open_order_sink.put(open_order_row(order, p, will_miss))
+        if will_miss:
+            await alert_sink.put((order, p))
+
+    print(f"[PREDICT] Batch of {len(orders)} orders scored by {scorer}")
+    return model_response(PREDICTION_LIST, results)
+
+
+async def _score_batch(X):
+    """
+    Return (probabilities, version, scorer) for a batch, degrading like
+    /predict. Every row is counted under its scorer in /stats/scorer.
+    """
+    fallback = model_service.fallback
+    if model_service.degraded:
+        model_service.count("fallback", len(X))
+        return fallback.score(X), fallback.version, "fallback"
+    try:
+        proba, version = await run_in_workload("scoring", model_service.score_matrix, X)
+    except HTTPException as e:
+        if e.status_code != 503 or fallback is None:
+            raise
+        model_service.count("fallback", len(X))
+        return fallback.score(X), fallback.version, "fallback"
+    model_service.count("primary", len(X))
+    return proba, version, "primary"
 
 
 @app.get("/logs")
+@workload("analytics")
 def get_logs(limit: int = 50):
-    rows = fetch_logs(limit)
-    return [
-        {
-            "order_id": r[0],
-            "timestamp": r[1],
-            "miss_sla_proba": r[2],
-            "will_miss_sla": bool(r[3]),
-            "distance": r[4],
-            "items": r[5],
-            "hub_load": r[6],
-            "traffic": r[7],
-            "weather": r[8],
-            "priority": r[9],
-            "carrier": r[10],
-        }
-        for r in rows
-    ]
+    # Encoded straight from the cursor tuples (no per-row pydantic or
+    # jsonable_encoder pass)
+    return JSONBytes(rows_json(LOG_COLUMNS, fetch_logs(limit), bools=("will_miss_sla",)))
+
+
+@app.get("/logs/export")
+@workload("analytics")
+def export_logs(
+    start: str | None = None,
+    end: str | None = None,
+    include_archive: bool = True,
+):
+    """
+    CSV export of predictions in [start, end] (ISO timestamps or dates).
+
+    Rows already moved out of SQLite by the retention job are read back from
+    the Parquet archive, so the export covers the full history. The CSV is
+    streamed chunk by chunk, so memory does not grow with the range.
+    """
+    return StreamingResponse(
+        iter_export_csv(start, end, include_archive),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=predictions.csv"},
+    )
 
 
 # ------------------------------
@@ -86,6 +284,7 @@ def get_logs(limit: int = 50):
 # ------------------------------
 
 @app.get("/settings", response_model=SettingsSchema)
+@workload("admin")
 def api_get_settings() -> SettingsSchema:
     """
     Returns the current alert configuration.
@@ -97,6 +296,7 @@ def api_get_settings() -> SettingsSchema:
 
 
 @app.post("/settings", response_model=SettingsSchema, dependencies=[Depends(require_role("admin"))])
+@workload("admin")
 def api_update_settings(payload: SettingsSchema) -> SettingsSchema:
     """
     Updates alert configuration.
@@ -110,6 +310,7 @@ def api_update_settings(payload: SettingsSchema) -> SettingsSchema:
 
 
 @app.post("/settings/test-email", dependencies=[Depends(require_role("admin"))])
+@workload("admin")
 def test_email():
     """
     Test email configuration by sending a test email.
@@ -127,6 +328,9 @@ app.include_router(alerts.router)
 app.include_router(metrics.router)
 app.include_router(health.router)
 app.include_router(auth.router)
+app.include_router(model.router)
+app.include_router(shadow.router)
+app.include_router(orders.router)
 
 
 # ------------------------------
@@ -1,19 +1,428 @@
+import hashlib
+import json
+import os
+import threading
+import time
 import joblib
 import numpy as np
 from pathlib import Path
+from app.config import settings
 from app.features import build_feature_vector
 
 MODEL_PATH = Path("models/xgb_model.pkl")
+MODELS_DIR = MODEL_PATH.parent
+# A copy of every model version that has been served, so any worker can load
+# the version another worker switched to
+VERSIONS_DIR = MODELS_DIR / "versions"
+# The version picked by /model/reload or /model/rollback. Every worker's
+# watcher follows it, so a manual switch reaches all processes
+SERVING_PATH = MODELS_DIR / "serving.json"
+
+# Fixed feature rows every candidate model must score sanely before it is
+# swapped in: age_min, promise_delta_min, distance_km, items_count,
+# hub_load, traffic_index, weather, priority, carrier
+PROBE_BATCH = np.array([
+    [5.0, 30.0, 1.0, 2.0, 0.2, 0.2, 0.0, 1.0, 0.0],
+    [20.0, 10.0, 3.0, 5.0, 0.5, 0.5, 1.0, 1.0, 1.0],
+    [60.0, -5.0, 6.0, 10.0, 0.9, 0.9, 2.0, 2.0, 3.0],
+    [90.0, -30.0, 8.0, 12.0, 1.0, 1.0, 2.0, 0.0, 2.0],
+], dtype=np.float32)
+
+
+def model_version(path: Path) -> str:
+    """Content-derived version label, e.g. `xgb_model-3f9a1c2b`."""
+    if path.parent.resolve() == VERSIONS_DIR.resolve():
+        # Copies kept in VERSIONS_DIR are already named by version
+        return path.stem
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:8]
+    return f"{path.stem}-{digest}"
+
+
+def model_file(path: str | Path) -> Path:
+    """
+    `path` resolved, if it is a .pkl file inside MODELS_DIR. Loading a model
+    unpickles it, so nothing from outside that directory is accepted.
+    """
+    resolved = Path(path).resolve()
+    if resolved.suffix != ".pkl" or not resolved.is_relative_to(MODELS_DIR.resolve()):
+        raise ValueError(f"model files must be .pkl files inside {MODELS_DIR}/")
+    if not resolved.is_file():
+        raise ValueError(f"model file {path} not found")
+    return resolved
+
+
+def _mtime(path: Path) -> float | None:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def validate_model(model) -> None:
+    """Raise ValueError unless `model` returns valid probabilities for PROBE_BATCH."""
+    proba = np.asarray(model.predict_proba(PROBE_BATCH))
+    if proba.shape != (len(PROBE_BATCH), 2):
+        raise ValueError(f"unexpected predict_proba shape {proba.shape}")
+    if not np.all(np.isfinite(proba)) or proba.min() < 0 or proba.max() > 1:
+        raise ValueError("predict_proba returned values outside [0, 1]")
+
+
+class LinearScorer:
+    """
+    Degraded-mode scorer: the baseline scaler + logistic regression folded
+    into one weight vector, evaluated as a NumPy dot product and a sigmoid.
+
+    Costs microseconds per row and starts no native thread pools, so it
+    stays fast when the box is saturated or the main model is unavailable.
+    """
+
+    def __init__(self, path: Path):
+        pipe = joblib.load(path)
+        scaler, clf = pipe.named_steps["scaler"], pipe.named_steps["clf"]
+        coef = clf.coef_[0] / scaler.scale_
+        self.weights = coef.astype(np.float64)
+        self.bias = float(clf.intercept_[0] - np.dot(coef, scaler.mean_))
+        self.version = f"fallback:{model_version(path)}"
+
+        # The folded weights must reproduce the pipeline they came from
+        expected = pipe.predict_proba(PROBE_BATCH)[:, 1]
+        if not np.allclose(self.score(PROBE_BATCH), expected, atol=1e-6):
+            raise ValueError("folded weights do not match the baseline pipeline")
+
+    def score(self, X):
+        z = np.asarray(X, dtype=np.float64) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def predict_proba(self, X):
+        p = self.score(X)
+        return np.column_stack([1.0 - p, p])
+
+
+def load_fallback(path: str | Path | None = None):
+    """The LinearScorer at FALLBACK_MODEL_PATH, or None when it is missing or unusable."""
+    path = Path(path or settings.FALLBACK_MODEL_PATH)
+    if not path.exists():
+        print(f"[MODEL] No fallback scorer: {path} not found")
+        return None
+    try:
+        scorer = LinearScorer(path)
+    except Exception as e:
+        print(f"[ERROR] Fallback scorer {path} not loaded: {type(e).__name__}: {e}")
+        return None
+    print(f"[MODEL] Fallback scorer ready: {scorer.version}")
+    return scorer
+
 
 class ModelService:
+    """
+    Holds the serving model as an immutable (version, model) pair.
+
+    `predict` reads the pair once, so a request that started on one version
+    finishes on it even if a reload swaps the reference mid-flight. Reloads
+    load, validate and warm the new model before the swap; the previous
+    pair is kept for `rollback`.
+
+    With a fallback scorer available the service degrades instead of
+    failing. If the main model cannot be loaded, the fallback serves until a
+    reload succeeds. If scoring latency (queue wait included) or consecutive
+    errors pass their limits, the fallback serves for FALLBACK_COOLDOWN_SEC
+    before the main model is tried again.
+    """
+
     def __init__(self):
-        if not MODEL_PATH.exists():
-            raise FileNotFoundError(f"Model file not found at {MODEL_PATH}. Run training first.")
-        
-        self.model = joblib.load(MODEL_PATH)
+        self.path = MODEL_PATH
+        self.fallback = load_fallback()
+        self._active = None
+        self._previous = None
+        self._swap_lock = threading.Lock()
+        # Last-seen mtimes of the two files the watcher follows. A restart
+        # serves MODEL_PATH, so an existing manual switch is not re-applied
+        self._model_mtime = None
+        self._serving_mtime = _mtime(SERVING_PATH)
+        self._watcher = None
+        self._stop_watch = threading.Event()
+        self.last_reload_error = None
+
+        self._breaker_lock = threading.Lock()
+        self._latency_ms = 0.0
+        self._errors = 0
+        self._degraded_until = 0.0
+        self.degraded_reason = None
+        self.trips = 0
+        self.scored = {"primary": 0, "fallback": 0}
+        # Set during startup warmup: cold calls must not trip the breaker
+
+        try:
+            if not MODEL_PATH.exists():
+                raise FileNotFoundError(f"Model file not found at {MODEL_PATH}. Run training first.")
+            self._model_mtime = MODEL_PATH.stat().st_mtime
+            self._active = self._load(MODEL_PATH)
+            self._keep_version(MODEL_PATH, self._active[0])
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            self.last_reload_error = f"{type(e).__name__}: {e}"
+            self.degraded_reason = "model_unavailable"
+            print(f"[ERROR] Main model not loaded, serving fallback: {self.last_reload_error}")
+
+    @property
+    def model(self):
+        return self._active[1] if self._active else None
+
+    @property
+    def version(self) -> str | None:
+        return self._active[0] if self._active else None
+
+    @property
+    def degraded(self) -> bool:
+        if self.fallback is None:
+            return False
+        return self._active is None or time.monotonic() < self._degraded_until
+
+    def _trip(self, reason: str) -> None:
+        with self._breaker_lock:
+            if time.monotonic() < self._degraded_until:
+                return
+            self._degraded_until = time.monotonic() + settings.FALLBACK_COOLDOWN_SEC
+            self.degraded_reason = reason
+            self.trips += 1
+            # The next trial of the main model starts from a clean slate
+            self._latency_ms = 0.0
+            self._errors = 0
+        print(f"[MODEL] Switching to fallback scorer for {settings.FALLBACK_COOLDOWN_SEC}s: {reason}")
+
+    def _record(self, elapsed_ms: float | None) -> None:
+        """Feed one main-model outcome (None = error) to the breaker."""
+        if self.fallback is None:
+            return
+        reason = None
+        # Scoring threads report concurrently
+        with self._breaker_lock:
+            if elapsed_ms is None:
+                self._errors += 1
+                if self._errors >= settings.FALLBACK_ERROR_LIMIT:
+                    reason = f"{self._errors} consecutive scoring errors"
+            else:
+                self._errors = 0
+                # EWMA, so one slow call does not trip the breaker
+                self._latency_ms += 0.2 * (elapsed_ms - self._latency_ms)
+                if self._latency_ms > settings.FALLBACK_LATENCY_MS:
+                    reason = f"scoring latency {self._latency_ms:.0f} ms"
+        if reason:
+            self._trip(reason)
+
+    def count(self, scorer: str, n: int = 1) -> None:
+        """Add `n` results to the per-scorer counts reported by /stats/scorer."""
+        with self._breaker_lock:
+            self.scored[scorer] += n
+
+    def score_fallback(self, x, record: bool = True):
+        """Return (probability, version, "fallback") for one feature vector."""
+        if record:
+            self.count("fallback")
+        return float(self.fallback.score(x.reshape(1, -1))[0]), self.fallback.version, "fallback"
+
+    @property
+    def previous_version(self) -> str | None:
+        return self._previous[0] if self._previous else None
+
+    def _load(self, path: Path):
+        model = joblib.load(path)
+        validate_model(model)
+        # Warm-up pass so the first real request does not pay one-time setup
+        model.predict_proba(PROBE_BATCH)
+        return (model_version(path), model)
+
+    def score_vector(self, x, queued_at: float | None = None, record: bool = True):
+        """
+        Return (probability, version, scorer) for one feature vector, where
+        scorer is "primary" or "fallback". `queued_at` (perf_counter) is when
+        the request was queued for scoring, so queue wait counts as latency.
+        `record=False` (warmup) keeps the call out of the scorer counts and
+        the circuit breaker.
+        """
+        if self.degraded:
+            return self.score_fallback(x, record)
+
+        version, model = self._active
+        started = time.perf_counter()
+        try:
+            proba = model.predict_proba(x.reshape(1, -1))[0][1]
+        except Exception as e:
+            if record:
+                self._record(None)
+            if self.fallback is None:
+                raise
+            print(f"[ERROR] Model scoring failed, using fallback: {type(e).__name__}: {e}")
+            return self.score_fallback(x, record)
+
+        if record:
+            self._record((time.perf_counter() - (queued_at or started)) * 1000)
+            self.count("primary")
+        return float(proba), version, "primary"
+
+    def score_matrix(self, X):
+        """
+        Return (probabilities, model version) for a batch of feature rows.
+        Batch work runs off the request path, so only a missing main model
+        sends it to the fallback.
+        """
+        active = self._active
+        if active is None:
+            return self.fallback.score(X), self.fallback.version
+        version, model = active
+        return model.predict_proba(X)[:, 1], version
+
+    def score(self, order):
+        """Return (probability, version, scorer) for one order."""
+        return self.score_vector(build_feature_vector(order))
 
     def predict(self, order):
-        x = build_feature_vector(order)
-        x = x.reshape(1, -1)
-        proba = self.model.predict_proba(x)[0][1]
-        return float(proba)
+        return self.score(order)[0]
+
+    def _keep_version(self, path: Path, version: str) -> None:
+        """Copy a served model to VERSIONS_DIR (once per version)."""
+        target = VERSIONS_DIR / f"{version}.pkl"
+        if target.exists():
+            return
+        try:
+            VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(path.read_bytes())
+            tmp.replace(target)
+        except OSError as e:
+            print(f"[ERROR] Could not keep a copy of model {version}: {e}")
+
+    def _announce(self, version: str) -> None:
+        """Point every worker's watcher at `version`."""
+        tmp = SERVING_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": version}))
+        tmp.replace(SERVING_PATH)
+        self._serving_mtime = _mtime(SERVING_PATH)
+
+    def reload(self, path: Path | None = None, announce: bool = False) -> str:
+        """
+        Load, validate and warm the model at `path` (default: MODEL_PATH),
+        then atomically make it active. The old model stays as `previous`.
+        Raises if the candidate fails to load or validate; serving continues
+        on the current model in that case. With `announce`, the other
+        workers switch to the same version on their next watcher tick.
+        """
+        path = Path(path) if path else self.path
+        if path.resolve() == MODEL_PATH.resolve():
+            self._model_mtime = path.stat().st_mtime
+        candidate = self._load(path)
+        self._keep_version(path, candidate[0])
+
+        with self._swap_lock:
+            if self._active is None:
+                self._active = candidate
+                self.degraded_reason = None
+            elif candidate[0] != self._active[0]:
+                self._previous = self._active
+                self._active = candidate
+        if announce:
+            self._announce(candidate[0])
+        print(f"[MODEL] Serving {self.version} (previous: {self.previous_version})")
+        return self.version
+
+    def reload_async(self, path: Path | None = None, announce: bool = False) -> threading.Thread:
+        """Run `reload` on a background thread; errors land in last_reload_error."""
+        def run():
+            try:
+                self.reload(path, announce)
+                self.last_reload_error = None
+            except Exception as e:
+                self.last_reload_error = f"{type(e).__name__}: {e}"
+                print(f"[ERROR] Model reload failed, keeping {self.version}: {self.last_reload_error}")
+
+        thread = threading.Thread(target=run, name="model-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def rollback(self, announce: bool = False) -> str:
+        """Swap the previous model back in (the current one becomes previous)."""
+        with self._swap_lock:
+            if self._previous is None:
+                raise RuntimeError("No previous model version to roll back to")
+            self._active, self._previous = self._previous, self._active
+        if announce:
+            self._announce(self.version)
+        print(f"[MODEL] Rolled back to {self.version}")
+        return self.version
+
+    def scorer_stats(self) -> dict:
+        return {
+            "fallback_available": self.fallback is not None,
+            "fallback_version": self.fallback.version if self.fallback else None,
+            "degraded": self.degraded,
+            "degraded_reason": self.degraded_reason if self.degraded else None,
+            "latency_ewma_ms": round(self._latency_ms, 2),
+            "consecutive_errors": self._errors,
+            "trips": self.trips,
+            "scored": dict(self.scored),
+        }
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "previous_version": self.previous_version,
+            "path": str(self.path),
+            "last_reload_error": self.last_reload_error,
+            "scorer": self.scorer_stats(),
+        }
+
+    def _follow_serving(self) -> None:
+        """Switch to the version another worker announced in SERVING_PATH."""
+        try:
+            version = json.loads(SERVING_PATH.read_text())["version"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERROR] Unreadable {SERVING_PATH}: {type(e).__name__}: {e}")
+            return
+        if version == self.version:
+            return
+        if version == self.previous_version:
+            self.rollback()
+        else:
+            self.reload_async(VERSIONS_DIR / f"{version}.pkl").join()
+
+    def check_files(self) -> None:
+        """
+        Apply changes to MODEL_PATH and SERVING_PATH since the last check,
+        oldest first. Each file is compared only with its own last-seen
+        mtime, so a manual switch is not undone by the next tick.
+        """
+        changes = []
+        model_mtime = _mtime(MODEL_PATH)
+        if model_mtime is not None and model_mtime != self._model_mtime:
+            changes.append((model_mtime, "model"))
+        serving_mtime = _mtime(SERVING_PATH)
+        if serving_mtime is not None and serving_mtime != self._serving_mtime:
+            changes.append((serving_mtime, "serving"))
+
+        # Marked as seen first: a bad file is not retried every tick
+        for mtime, source in sorted(changes):
+            if source == "model":
+                self._model_mtime = mtime
+                self.reload_async().join()
+            else:
+                self._serving_mtime = mtime
+                self._follow_serving()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_watch.wait(interval):
+            self.check_files()
+
+    def start_watcher(self, interval: float | None = None) -> None:
+        """Poll the model file and hot-reload it when it changes."""
+        interval = settings.MODEL_WATCH_INTERVAL_SEC if interval is None else interval
+        if interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        self._stop_watch.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="model-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop_watch.set()
@@ -0,0 +1,443 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.config import settings
+from app.alert_engine import send_email_alert
+from app.features import build_feature_matrix, encode_categoricals, model_codes, to_minutes
+from app.schemas import OrderInput
+from app.settings_store import get_threshold
+from db.db_connection import log_predictions, prediction_row
+from db.writer import submit
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single process, always the leader
+    fcntl = None
+
+DB_PATH = "sla_logs.db"
+
+# Registry of orders still inside their promise window and not delivered.
+#
+# Only age_min and promise_delta_min change with time, so when an order is
+# registered its risk is evaluated over a grid of future instants in one
+# vectorized call, and the first instant at which it reaches the threshold
+# is stored as `cross_min`. That indexed column is the timer queue: the
+# leader sleeps until the earliest armed timer, re-scores exactly those
+# orders and alerts. Orders far from the threshold cost nothing meanwhile.
+
+
+def open_order_row(order, proba: float, alerted: bool):
+    # Stored as scoring input for the rescorer, so keep the model codes
+    weather, priority, carrier = model_codes(*encode_categoricals(order))
+    return (
+        order.order_id,
+        to_minutes(order.created_at),
+        to_minutes(order.promised_at),
+        float(order.distance_km),
+        float(order.items_count),
+        float(order.hub_load),
+        float(order.traffic_index),
+        weather,
+        priority,
+        carrier,
+        float(proba),
+        int(alerted),
+        order.model_dump_json(),
+    )
+
+
+# ------------------------------
+# STORAGE (executed by the DB writer when one is running)
+# ------------------------------
+
+def upsert_open_orders(rows) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.executemany(
+            """
+            INSERT INTO open_orders (
+                order_id, created_min, promised_min, distance, items, hub_load,
+                traffic, weather, priority, carrier, last_proba, alerted, payload,
+                cross_min
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(order_id) DO UPDATE SET
+                created_min = excluded.created_min,
+                promised_min = excluded.promised_min,
+                distance = excluded.distance,
+                items = excluded.items,
+                hub_load = excluded.hub_load,
+                traffic = excluded.traffic,
+                weather = excluded.weather,
+                priority = excluded.priority,
+                carrier = excluded.carrier,
+                last_proba = excluded.last_proba,
+                alerted = MAX(open_orders.alerted, excluded.alerted),
+                payload = excluded.payload,
+                cross_min = excluded.cross_min
+            """,
+            rows,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def update_open_order_scores(rows) -> None:
+    """rows: (last_proba, alerted, cross_min, order_id) tuples."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.executemany(
+            """
+            UPDATE open_orders
+            SET last_proba = ?, alerted = MAX(alerted, ?), cross_min = ?
+            WHERE order_id = ?
+            """,
+            rows,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def update_open_order_plan(rows) -> None:
+    """rows: (cross_min, order_id) tuples."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.executemany("UPDATE open_orders SET cross_min = ? WHERE order_id = ?", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def close_open_orders(order_ids) -> int:
+    """Remove delivered orders from the registry; returns how many were open."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cur = conn.executemany(
+            "DELETE FROM open_orders WHERE order_id = ?",
+            [(oid,) for oid in order_ids],
+        )
+        conn.commit()
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def expire_open_orders(now_min: float) -> int:
+    """Drop orders whose promise time has passed."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cur = conn.execute("DELETE FROM open_orders WHERE promised_min <= ?", (now_min,))
+        conn.commit()
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def register_open_orders(rows) -> None:
+    """Plan crossing times for a batch of new orders, then store them."""
+    submit("open_orders", rescorer.plan_new_rows(rows))
+
+
+def count_open_orders() -> int:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM open_orders").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def load_open_orders(now_min: float, due_only: bool = False):
+    """
+    Columns of open, not-yet-alerted orders as NumPy arrays ready for batch
+    scoring; with `due_only`, just those whose timer has fired.
+    """
+    due = "AND cross_min <= :now" if due_only else ""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            f"""
+            SELECT order_id, created_min, promised_min, distance, items, hub_load,
+                   traffic, weather, priority, carrier, alerted
+            FROM open_orders
+            WHERE promised_min > :now AND alerted = 0 {due}
+            """,
+            {"now": now_min},
+        ).fetchall()
+    finally:
+        conn.close()
+
+    if not rows:
+        return None
+
+    order_ids = [r[0] for r in rows]
+    numeric = np.array([r[1:] for r in rows], dtype=np.float64)
+    return {
+        "order_ids": order_ids,
+        "created_min": numeric[:, 0],
+        "promised_min": numeric[:, 1],
+        "static": numeric[:, 2:9],
+        "alerted": numeric[:, 9].astype(bool),
+    }
+
+
+def next_timer_min():
+    """Epoch minute of the earliest armed timer, or None."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute(
+            "SELECT MIN(cross_min) FROM open_orders WHERE alerted = 0"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _load_payloads(order_ids) -> dict:
+    payloads = {}
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(order_ids), 500):
+            chunk = list(order_ids[start:start + 500])
+            placeholders = ",".join("?" * len(chunk))
+            payloads.update(conn.execute(
+                f"SELECT order_id, payload FROM open_orders WHERE order_id IN ({placeholders})",
+                chunk,
+            ).fetchall())
+    finally:
+        conn.close()
+    return payloads
+
+
+# ------------------------------
+# PLANNER / TIMERS
+# ------------------------------
+
+def plan_crossings(model_service, created_min, promised_min, static, threshold, start_min):
+    """
+    For each order, the first grid instant (start_min, start_min + step, ...)
+    before its promise time at which predicted risk reaches `threshold`.
+
+    All orders x grid points are scored in one predict_proba call per chunk.
+    Orders that do not cross within the grid but are still open after it get
+    the last grid instant as a checkpoint to be planned again; the rest get
+    NaN (no timer).
+    """
+    step = settings.OPEN_ORDER_GRID_STEP_MIN
+    points = settings.OPEN_ORDER_GRID_POINTS
+    times = start_min + np.arange(points) * step
+    created_min = np.asarray(created_min, dtype=np.float64)
+    promised_min = np.asarray(promised_min, dtype=np.float64)
+    static = np.asarray(static, dtype=np.float64)
+
+    result = np.full(len(created_min), np.nan)
+    # Bound the (orders x grid) matrix to a few MB per predict call
+    chunk = max(1, 200_000 // points)
+    for start in range(0, len(created_min), chunk):
+        c = slice(start, start + chunk)
+        m = len(created_min[c])
+        at = np.broadcast_to(times, (m, points))
+        X = build_feature_matrix(
+            np.repeat(created_min[c], points),
+            np.repeat(promised_min[c], points),
+            np.repeat(static[c], points, axis=0),
+            at_min=at.ravel(),
+        )
+        proba, _ = model_service.score_matrix(X)
+        hit = (proba.reshape(m, points) >= threshold) & (at < promised_min[c, None])
+        first = hit.argmax(axis=1)
+        result[c] = np.where(
+            hit.any(axis=1),
+            times[first],
+            np.where(promised_min[c] > times[-1], times[-1], np.nan),
+        )
+    return result
+
+
+def _as_db(value: float):
+    return None if np.isnan(value) else float(value)
+
+
+class OpenOrderRescorer:
+    """
+    Fires crossing-time timers for open orders.
+
+    The timer queue is the indexed `cross_min` column, shared by all worker
+    processes. One leader (non-blocking lock on a shared lock file) sleeps
+    until the earliest timer, re-scores the due orders exactly, alerts the
+    ones that crossed and re-plans the rest. A threshold or model change
+    re-plans every open order in bulk.
+    """
+
+    def __init__(self, poll_sec: float, replan_sec: float, lock_path: str):
+        self.poll_sec = poll_sec
+        self.replan_sec = replan_sec
+        self.lock_path = lock_path
+        self.model_service = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock_file = None
+        self._planned_for = None
+        self._last_replan = 0.0
+        self.last_run = None
+        self.fired = 0
+        self.alerted = 0
+
+    def _acquire_leadership(self) -> bool:
+        if fcntl is None:
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def plan_new_rows(self, rows):
+        """Append cross_min to `open_order_row` tuples (None when alerted or unplanned)."""
+        if self.model_service is None:
+            return [row + (None,) for row in rows]
+
+        pending = [i for i, row in enumerate(rows) if not row[11]]
+        cross = {}
+        if pending:
+            data = np.array([rows[i][1:10] for i in pending], dtype=np.float64)
+            now_min = to_minutes(datetime.now(timezone.utc))
+            planned = plan_crossings(
+                self.model_service, data[:, 0], data[:, 1], data[:, 2:], get_threshold(), now_min
+            )
+            cross = {i: _as_db(t) for i, t in zip(pending, planned)}
+        return [row + (cross.get(i),) for i, row in enumerate(rows)]
+
+    def replan_all(self, now_min: float, threshold: float) -> int:
+        batch = load_open_orders(now_min)
+        if batch is None:
+            return 0
+        planned = plan_crossings(
+            self.model_service, batch["created_min"], batch["promised_min"], batch["static"],
+            threshold, now_min,
+        )
+        submit(
+            "open_order_plan",
+            [(_as_db(t), oid) for oid, t in zip(batch["order_ids"], planned)],
+            wait=True,
+        )
+        print(f"[TIMERS] Re-planned {len(planned)} open orders at threshold {threshold:.3f}")
+        return len(planned)
+
+    def fire_due(self, now: datetime, threshold: float) -> dict:
+        """Re-score orders whose timer is due; alert crossings, re-plan the rest."""
+        now_min = to_minutes(now)
+        batch = load_open_orders(now_min, due_only=True)
+        if batch is None:
+            return {"fired": 0, "alerted": 0}
+
+        X = build_feature_matrix(batch["created_min"], batch["promised_min"], batch["static"], now)
+        proba, _ = self.model_service.score_matrix(X)
+        crossed = proba >= threshold
+
+        # Not there yet (e.g. risk dipped between grid points): plan again
+        # starting one step out so the same instant does not fire twice
+        cross_min = np.full(len(proba), np.nan)
+        if (~crossed).any():
+            idx = np.flatnonzero(~crossed)
+            cross_min[idx] = plan_crossings(
+                self.model_service, batch["created_min"][idx], batch["promised_min"][idx],
+                batch["static"][idx], threshold, now_min + settings.OPEN_ORDER_GRID_STEP_MIN,
+            )
+
+        crossing = np.flatnonzero(crossed)
+        alerted = 0
+        if len(crossing):
+            payloads = _load_payloads([batch["order_ids"][i] for i in crossing])
+            crossed_rows = []
+            for i in crossing:
+                payload = payloads.get(batch["order_ids"][i])
+                if payload is None:  # delivered while we were scoring
+                    continue
+                order = OrderInput.model_validate_json(payload)
+                p = float(proba[i])
+                print(f"[TIMERS] Order {order.order_id} crossed threshold: proba={p:.3f} >= {threshold:.3f}")
+                crossed_rows.append(prediction_row(order, p, True, X[i]))
+                send_email_alert(order, p)
+            if crossed_rows:
+                log_predictions(crossed_rows)
+            alerted = len(crossed_rows)
+
+        submit(
+            "open_order_scores",
+            [
+                (float(p), int(c), _as_db(t), oid)
+                for oid, p, c, t in zip(batch["order_ids"], proba, crossed, cross_min)
+            ],
+            wait=True,
+        )
+        self.fired += len(proba)
+        self.alerted += alerted
+        return {"fired": len(proba), "alerted": alerted}
+
+    def tick(self) -> float:
+        """One leader iteration; returns seconds to sleep until the next timer."""
+        now = datetime.now(timezone.utc)
+        now_min = to_minutes(now)
+        threshold = get_threshold()
+
+        expired = submit("open_orders_expire", now_min, wait=True)
+
+        # Bulk re-plan when the inputs to every plan change, plus a slow
+        # safety pass for checkpoints and orders registered mid-change
+        planned_for = (threshold, self.model_service.version)
+        if planned_for != self._planned_for or time.monotonic() - self._last_replan >= self.replan_sec:
+            self.replan_all(now_min, threshold)
+            self._planned_for = planned_for
+            self._last_replan = time.monotonic()
+
+        result = self.fire_due(now, threshold)
+        self.last_run = {"at": now.isoformat(), "expired": expired, **result}
+
+        next_min = next_timer_min()
+        if next_min is None:
+            return self.poll_sec
+        wait = (next_min - to_minutes(datetime.now(timezone.utc))) * 60
+        return min(max(wait, 0.0), self.poll_sec)
+
+    def _run(self) -> None:
+        delay = self.poll_sec
+        while not self._stop.wait(delay):
+            delay = self.poll_sec
+            try:
+                if self._acquire_leadership():
+                    delay = self.tick()
+            except Exception as e:
+                print(f"[ERROR] Open-order timers failed: {type(e).__name__}: {e}")
+
+    def start(self, model_service) -> None:
+        self.model_service = model_service
+        if self.poll_sec <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="open-order-timers", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "poll_sec": self.poll_sec,
+            "replan_sec": self.replan_sec,
+            "fired": self.fired,
+            "alerted": self.alerted,
+            "last_run": self.last_run,
+        }
+
+
+rescorer = OpenOrderRescorer(
+    settings.OPEN_ORDER_POLL_SEC, settings.OPEN_ORDER_REPLAN_SEC, settings.OPEN_ORDER_LOCK_PATH
+)
@@ -1,18 +1,187 @@
 from fastapi import APIRouter, Query, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Any
 import sqlite3
 import json
 
+from app.alert_engine import TRANSITIONS
+from app.config import settings
+from app.serialization import json_response, rows_response
+from app.workloads import workload
+from db.writer import submit
+
 router = APIRouter()
 
 DB_PATH = "sla_logs.db"
 
 
-def _get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+ALERT_COLUMNS = """
+    a.id, a.order_id, a.miss_sla_proba, a.threshold, a.triggered_at,
+    a.status, a.severity, a.acknowledged_at, a.resolved_at, a.resolution_notes,
+    a.actual_sla_missed
+"""
+
+
+def _alert_time(value: str, end: bool = False) -> str:
+    # triggered_at is stored as 'YYYY-MM-DD HH:MM:SS' (UTC); accept ISO input
+    value = value.replace("T", " ")[:19]
+    if end and len(value) == 10:
+        # A bare date as the upper bound means "through the end of that day"
+        value += " 23:59:59"
+    return value
+
+
+def _fts_query(text: str) -> str:
+    """Every word must match; a trailing * matches a prefix. No FTS syntax leaks through."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*") and len(word) > 1
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+def _filter_clauses(
+    status: list[str] | None = None,
+    severity: list[str] | None = None,
+    order_prefix: str | None = None,
+    min_proba: float | None = None,
+    max_proba: float | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> tuple[list[str], list]:
+    """WHERE clauses (ANDed) and their parameters for the alert field filters."""
+    clauses, params = [], []
+    if status:
+        clauses.append(f"a.status IN ({', '.join('?' * len(status))})")
+        params.extend(status)
+    if severity:
+        clauses.append(f"a.severity IN ({', '.join('?' * len(severity))})")
+        params.extend(severity)
+    if order_prefix:
+        # A range instead of LIKE, so idx_alerts_order_id applies
+        clauses.append("a.order_id >= ? AND a.order_id < ?")
+        params.extend([order_prefix, order_prefix + "\U0010ffff"])
+    if min_proba is not None:
+        clauses.append("a.miss_sla_proba >= ?")
+        params.append(min_proba)
+    if max_proba is not None:
+        clauses.append("a.miss_sla_proba <= ?")
+        params.append(max_proba)
+    if start:
+        clauses.append("a.triggered_at >= ?")
+        params.append(_alert_time(start))
+    if end:
+        clauses.append("a.triggered_at <= ?")
+        params.append(_alert_time(end, end=True))
+    return clauses, params
+
+
+def search_alerts(
+    conn,
+    status: list[str] | None = None,
+    severity: list[str] | None = None,
+    order_prefix: str | None = None,
+    min_proba: float | None = None,
+    max_proba: float | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    text: str | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+) -> dict:
+    """
+    One page of alerts matching every given filter, newest first.
+
+    Pages are keyset-paginated on (triggered_at, id): `next_cursor` from
+    one page is the `cursor` of the next, so deep pages cost the same as
+    the first. `text` searches resolution notes through the alerts_fts
+    index; those results are walked in id order straight off the index
+    (alerts are inserted as they trigger, so this is still newest first)
+    rather than collecting and sorting every match.
+    """
+    clauses, params = _filter_clauses(
+        status, severity, order_prefix, min_proba, max_proba, start, end
+    )
+    source = "alerts a"
+    order = "a.triggered_at DESC, a.id DESC"
+    # No word terms (e.g. "*"): no text filter, and no empty MATCH
+    fts_query = _fts_query(text) if text else ""
+    if fts_query:
+        has_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'alerts_fts'"
+        ).fetchone()
+        if has_fts:
+            source = "alerts_fts f JOIN alerts a ON a.id = f.rowid"
+            order = "f.rowid DESC"
+            clauses.append("f.alerts_fts MATCH ?")
+            params.append(fts_query)
+        else:
+            clauses.append("a.resolution_notes LIKE ?")
+            params.append(f"%{text.strip()}%")
+    if cursor:
+        try:
+            after_time, after_id = cursor.rsplit("|", 1)
+            after_id = int(after_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if order == "f.rowid DESC":
+            clauses.append("f.rowid < ?")
+            params.append(after_id)
+        else:
+            # Row-value comparison, so the index range starts at the cursor
+            clauses.append("(a.triggered_at, a.id) < (?, ?)")
+            params.extend([after_time, after_id])
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cur = conn.execute(
+        f"""
+        SELECT {ALERT_COLUMNS}
+        FROM {source}
+        {where}
+        ORDER BY {order}
+        LIMIT ?
+        """,
+        (*params, limit + 1),
+    )
+    rows = cur.fetchall()
+    columns = [d[0] for d in cur.description]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(columns, rows[-1]))
+        next_cursor = f"{last['triggered_at']}|{last['id']}"
+    return {
+        "items": [dict(zip(columns, row)) for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+def bulk_targets(conn, action: str, filters: dict, limit: int) -> tuple[list[int], bool]:
+    """
+    Ids of up to `limit` alerts matching `filters` (the search filters plus
+    `older_than_min`; status defaults to the ones `action` applies to),
+    oldest first, and whether more match.
+    """
+    filters = dict(filters)
+    older_than_min = filters.pop("older_than_min", None)
+    filters["status"] = filters.get("status") or list(TRANSITIONS[action][0])
+    clauses, params = _filter_clauses(**filters)
+    if older_than_min is not None:
+        clauses.append("a.triggered_at <= datetime('now', ?)")
+        params.append(f"-{older_than_min} minutes")
+    rows = conn.execute(
+        f"""
+        SELECT a.id FROM alerts a
+        WHERE {' AND '.join(clauses)}
+        ORDER BY a.id
+        LIMIT ?
+        """,
+        (*params, limit + 1),
+    ).fetchall()
+    return [r[0] for r in rows[:limit]], len(rows) > limit
 
 
 class ResolvePayload(BaseModel):
@@ -20,12 +189,35 @@ class ResolvePayload(BaseModel):
     resolution_notes: str | None = None
 
 
+class AlertFilter(BaseModel):
+    status: list[str] | None = None
+    severity: list[str] | None = None
+    order_prefix: str | None = None
+    min_proba: float | None = None
+    max_proba: float | None = None
+    start: str | None = None
+    end: str | None = None
+    older_than_min: float | None = Field(None, ge=0)
+
+
+class BulkPayload(BaseModel):
+    """Either explicit alert ids or a filter, not both."""
+    ids: list[int] | None = None
+    filter: AlertFilter | None = None
+
+
+class BulkResolvePayload(BulkPayload):
+    actual_sla_missed: bool
+    resolution_notes: str | None = None
+
+
 class ActionPayload(BaseModel):
     action_type: str
     payload: dict[str, Any] | None = None
 
 
 @router.get("/alerts")
+@workload("admin")
 def get_alerts(
     limit: int = Query(50, le=200),
     status: str | None = Query(None, description="Filter by status: open, acknowledged, resolved"),
@@ -36,9 +228,9 @@ def get_alerts(
     Returns list of alerts ordered by most recent first.
     Can optionally filter by status.
     """
-    with _get_conn() as conn:
+    with sqlite3.connect(DB_PATH) as conn:
         if status:
-            rows = conn.execute(
+            cur = conn.execute(
                 """
                 SELECT id, order_id, miss_sla_proba, threshold, triggered_at,
                        status, severity, acknowledged_at, resolved_at, resolution_notes,
@@ -49,9 +241,9 @@ def get_alerts(
                 LIMIT ?
                 """,
                 (status, limit),
-            ).fetchall()
+            )
         else:
-            rows = conn.execute(
+            cur = conn.execute(
                 """
                 SELECT id, order_id, miss_sla_proba, threshold, triggered_at,
                        status, severity, acknowledged_at, resolved_at, resolution_notes,
@@ -61,70 +253,150 @@ def get_alerts(
                 LIMIT ?
                 """,
                 (limit,),
-            ).fetchall()
+            )
+        # Plain tuples encoded with the cursor's column names
+        return rows_response(cur, cur.fetchall())
+
+
+@router.get("/alerts/search")
+@workload("admin")
+def search(
+    status: list[str] | None = Query(None, description="open, acknowledged, resolved (repeatable)"),
+    severity: list[str] | None = Query(None, description="low, medium, high (repeatable)"),
+    order_prefix: str | None = Query(None, description="order_id starts with"),
+    min_proba: float | None = Query(None, ge=0, le=1),
+    max_proba: float | None = Query(None, ge=0, le=1),
+    start: str | None = Query(None, description="triggered at or after (ISO time or date)"),
+    end: str | None = Query(None, description="triggered at or before (ISO time or date)"),
+    q: str | None = Query(None, description="words in resolution notes; word* for a prefix"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Search alerts by status, severity, order_id prefix, probability range,
+    time range and resolution-note text. Results are newest first, one page
+    at a time; pass `next_cursor` back as `cursor` for the next page.
+    """
+    with sqlite3.connect(DB_PATH) as conn:
+        page = search_alerts(
+            conn,
+            status=status,
+            severity=severity,
+            order_prefix=order_prefix,
+            min_proba=min_proba,
+            max_proba=max_proba,
+            start=start,
+            end=end,
+            text=q,
+            cursor=cursor,
+            limit=limit,
+        )
+    return json_response(page)
+
+
+def _run_bulk(action: str, payload: BulkPayload, **kwargs):
+    if (payload.ids is None) == (payload.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter")
+    if payload.ids is not None and len(payload.ids) > settings.ALERT_BULK_MAX:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.ALERT_BULK_MAX} ids per request"
+        )
+    if payload.filter:
+        # Read here; the writer re-checks every status inside its transaction
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            ids, more = bulk_targets(
+                conn, action, payload.filter.model_dump(exclude_none=True), settings.ALERT_BULK_MAX
+            )
+        finally:
+            conn.close()
+    else:
+        ids, more = list(dict.fromkeys(payload.ids)), False
+
+    from_statuses, new_status, _ = TRANSITIONS[action]
+    before = submit(
+        "alert_transition", action, ids,
+        kwargs.get("actual_sla_missed"), kwargs.get("resolution_notes"), True,
+        wait=True,
+    ) if ids else {}
 
-    return [dict(r) for r in rows]
+    def outcome(alert_id):
+        status = before.get(alert_id)
+        if status is None:
+            return "not_found"
+        return new_status if status in from_statuses else f"already_{status}"
+
+    results = [{"id": i, "outcome": outcome(i)} for i in ids]
+    updated = sum(r["outcome"] == new_status for r in results)
+    print(f"[ALERT] Bulk {action}: {updated} alerts updated")
+    return json_response({"ok": True, "updated": updated, "more": more, "results": results})
+
+
+@router.post("/alerts/bulk/ack")
+@workload("admin")
+def bulk_acknowledge(payload: BulkPayload):
+    """
+    Acknowledge many open alerts at once, by `ids` or by `filter` (e.g.
+    `{"severity": ["low"], "older_than_min": 30}`), in one transaction.
+    A filter matching more than ALERT_BULK_MAX alerts handles the oldest
+    ones and sets `more`; repeat the call for the rest.
+    """
+    return _run_bulk("ack", payload)
+
+
+@router.post("/alerts/bulk/resolve")
+@workload("admin")
+def bulk_resolve(payload: BulkResolvePayload):
+    """
+    Resolve many open or acknowledged alerts at once with one verdict and
+    note, by `ids` or by `filter`, in one transaction.
+    """
+    return _run_bulk(
+        "resolve",
+        payload,
+        actual_sla_missed=payload.actual_sla_missed,
+        resolution_notes=payload.resolution_notes,
+    )
 
 
 @router.post("/alerts/{alert_id}/ack")
+@workload("admin")
 def acknowledge_alert(alert_id: int):
     """
     Acknowledge an alert (change status from 'open' to 'acknowledged').
     """
-    with _get_conn() as conn:
-        cur = conn.execute(
-            """
-            UPDATE alerts
-            SET status = 'acknowledged',
-                acknowledged_at = datetime('now')
-            WHERE id = ? AND status = 'open'
-            """,
-            (alert_id,),
-        )
-        conn.commit()
-
-        if cur.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Alert not found or not open")
+    before = submit("alert_transition", "ack", [alert_id], wait=True)
+    if before[alert_id] != "open":
+        raise HTTPException(status_code=404, detail="Alert not found or not open")
 
     return {"ok": True}
 
 
 @router.post("/alerts/{alert_id}/resolve")
+@workload("admin")
 def resolve_alert(alert_id: int, payload: ResolvePayload):
     """
     Resolve an alert with verdict (SLA met or missed) and optional notes.
     """
-    with _get_conn() as conn:
-        cur = conn.execute(
-            """
-            UPDATE alerts
-            SET status = 'resolved',
-                resolved_at = datetime('now'),
-                resolution_notes = ?,
-                actual_sla_missed = ?
-            WHERE id = ? AND status IN ('open', 'acknowledged')
-            """,
-            (
-                payload.resolution_notes,
-                1 if payload.actual_sla_missed else 0,
-                alert_id,
-            ),
-        )
-        conn.commit()
-
-        if cur.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Alert not found or already resolved")
+    before = submit(
+        "alert_transition", "resolve", [alert_id],
+        payload.actual_sla_missed, payload.resolution_notes,
+        wait=True,
+    )
+    if before[alert_id] not in ("open", "acknowledged"):
+        raise HTTPException(status_code=404, detail="Alert not found or already resolved")
 
     return {"ok": True}
 
 
 @router.get("/alerts/{alert_id}/actions")
+@workload("admin")
 def get_actions(alert_id: int):
     """
     Return action history for a given alert.
     """
-    with _get_conn() as conn:
-        rows = conn.execute(
+    with sqlite3.connect(DB_PATH) as conn:
+        cur = conn.execute(
             """
             SELECT action_type, payload, created_at
             FROM alert_actions
@@ -132,36 +404,24 @@ def get_actions(alert_id: int):
             ORDER BY created_at DESC
             """,
             (alert_id,),
-        ).fetchall()
-
-    return [dict(r) for r in rows]
+        )
+        return rows_response(cur, cur.fetchall())
 
 
 @router.post("/alerts/{alert_id}/actions")
+@workload("admin")
 def create_alert_action(alert_id: int, payload: ActionPayload):
     """
     Log an automation action for an alert (e.g., REROUTE, ESCALATE, etc.).
     """
-    with _get_conn() as conn:
-        # Make sure alert exists
-        alert = conn.execute(
-            "SELECT id FROM alerts WHERE id = ?",
-            (alert_id,),
-        ).fetchone()
-        if not alert:
-            raise HTTPException(status_code=404, detail="Alert not found")
-
-        conn.execute(
-            """
-            INSERT INTO alert_actions (alert_id, action_type, payload, created_at)
-            VALUES (?, ?, ?, datetime('now'))
-            """,
-            (
-                alert_id,
-                payload.action_type,
-                json.dumps(payload.payload) if payload.payload else None,
-            ),
-        )
-        conn.commit()
+    added = submit(
+        "alert_action",
+        alert_id,
+        payload.action_type,
+        json.dumps(payload.payload) if payload.payload else None,
+        wait=True,
+    )
+    if not added:
+        raise HTTPException(status_code=404, detail="Alert not found")
 
     return {"ok": True}
@@ -1,11 +1,12 @@
-from datetime import datetime
 import sqlite3
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
 
-from app.auth.security import create_token, hash_password, verify_password
+from app.auth.security import create_token, hash_password_async, verify_password_async
 from app.config import settings
+from app.workloads import run_in_workload
+from db.writer import submit
 
 router = APIRouter()
 
@@ -31,44 +32,40 @@ class RegisterBody(BaseModel):
   signup_key: str | None = None
 
 
+def _insert_user(email: str, password_hash: str, role: str) -> None:
+  if not submit("user", email, password_hash, role, wait=True):
+    raise HTTPException(status_code=400, detail="Email already exists")
+
+
+def _fetch_user(email: str):
+  with _conn() as conn:
+    return conn.execute(
+      "SELECT id, email, password_hash, role FROM users WHERE email = ?",
+      (email,),
+    ).fetchone()
+
+
+# Handlers are async so bcrypt waits on the auth process pool instead of
+# holding a request thread; only the short DB calls use the admin pool.
 @router.post("/auth/register")
-def register(body: RegisterBody):
+async def register(body: RegisterBody):
   # Optional guard: if SIGNUP_KEY is set, require it to match for any registration
   expected_key = settings.SIGNUP_KEY
   if expected_key:
     if not body.signup_key or body.signup_key != expected_key:
       raise HTTPException(status_code=403, detail="Invalid signup key")
 
-  with _conn() as conn:
-    try:
-      conn.execute(
-        """
-        INSERT INTO users (email, password_hash, role, created_at)
-        VALUES (?, ?, ?, ?)
-        """,
-        (
-          body.email,
-          hash_password(body.password),
-          body.role,
-          datetime.utcnow().isoformat(),
-        ),
-      )
-      conn.commit()
-    except sqlite3.IntegrityError:
-      raise HTTPException(status_code=400, detail="Email already exists")
+  password_hash = await hash_password_async(body.password)
+  await run_in_workload("admin", _insert_user, body.email, password_hash, body.role)
 
   return {"ok": True}
 
 
 @router.post("/auth/login")
-def login(body: LoginBody):
-  with _conn() as conn:
-    user = conn.execute(
-      "SELECT id, email, password_hash, role FROM users WHERE email = ?",
-      (body.email,),
-    ).fetchone()
+async def login(body: LoginBody):
+  user = await run_in_workload("admin", _fetch_user, body.email)
 
-  if not user or not verify_password(body.password, user["password_hash"]):
+  if not user or not await verify_password_async(body.password, user["password_hash"]):
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
   token = create_token(
@@ -1,36 +1,37 @@
-from fastapi import APIRouter
-import sqlite3
+from fastapi import APIRouter, Header, Request, Response
 
-from app.settings_store import load_settings
+from app.auth.deps import get_user, require_role
 
-router = APIRouter()
+from app.health_monitor import deep_check, health_monitor
+from app.warmup import readiness
 
-DB_PATH = "sla_logs.db"
+router = APIRouter()
 
 
 @router.get("/health")
-def health():
+async def health(request: Request, deep: bool = False, authorization: str | None = Header(None)):
     """
-    Basic system health check:
-    - api: always ok if route is reachable
-    - db: ok/fail based on DB connectivity
-    - settings: ok/fail based on settings load
+    Liveness: api / db / settings as last seen by the background health
+    monitor (no I/O per probe).
+
+    `?deep=1` measures every subsystem now and reports per-component
+    status and latency (DB read, DB write round-trip, model inference,
+    SMTP reachability) plus queue depths. Meant for diagnostics, not for
+    frequent probing. It writes a probe row and opens an SMTP connection,
+    so it needs an admin token; plain /health stays open for probes.
     """
+    if deep:
+        require_role("admin")(get_user(authorization or ""))
+        return await deep_check(request.app.state.model_service)
+    return health_monitor.status()
+
 
-    # DB check
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.execute("SELECT 1")
-        conn.close()
-        db = "ok"
-    except Exception:
-        db = "fail"
-
-    # settings check
-    try:
-        load_settings()
-        config = "ok"
-    except Exception:
-        config = "fail"
-
-    return {"api": "ok", "db": db, "settings": config}
+@router.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness probe: 503 until startup warmup has run synthetic orders
+    through the predict path, then 200. Route traffic on this, not /health.
+    """
+    if not readiness.ready:
+        response.status_code = 503
+    return readiness.status()
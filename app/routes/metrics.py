@@ -1,49 +1,38 @@
-from fastapi import APIRouter
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, HTTPException, Query, Request
 import sqlite3
 
+from app.workloads import workload, workload_stats
+from app.sinks import sink_stats
+from app.idempotency import prediction_cache
+from db.kpis import read_alert_kpis
+from db.response_times import response_time_quantiles
+
 router = APIRouter()
 
 DB_PATH = "sla_logs.db"
 
 
-def _conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
 @router.get("/stats/ops")
+@workload("analytics")
 def operational_metrics():
     """
     Operational KPIs for alerts.
+
+    Read from the trigger-maintained alert_kpis row, so the cost does not
+    grow with the alerts table (`python -m db.kpis` recounts it).
     """
-    with _conn() as conn:
-        total_alerts = conn.execute(
-            "SELECT COUNT(*) AS c FROM alerts"
-        ).fetchone()["c"]
-
-        resolved = conn.execute(
-            "SELECT COUNT(*) AS c FROM alerts WHERE status = 'resolved'"
-        ).fetchone()["c"]
-
-        row = conn.execute(
-            """
-            SELECT AVG(
-                (strftime('%s', resolved_at) - strftime('%s', triggered_at))
-            ) AS avg_response
-            FROM alerts
-            WHERE resolved_at IS NOT NULL
-            """
-        ).fetchone()
-        avg_response = row["avg_response"] or 0
-
-        false_positives = conn.execute(
-            """
-            SELECT COUNT(*) AS c
-            FROM alerts
-            WHERE status = 'resolved' AND actual_sla_missed = 0
-            """
-        ).fetchone()["c"]
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        kpis = read_alert_kpis(conn)
+    finally:
+        conn.close()
+
+    total_alerts = kpis["total"]
+    resolved = kpis["resolved"]
+    false_positives = kpis["false_positives"]
+    avg_response = kpis["response_sec_sum"] / kpis["responded"] if kpis["responded"] else 0
 
     return {
         "total_alerts": total_alerts,
@@ -58,3 +47,79 @@ def operational_metrics():
     }
 
 
+def _hour(value: str, date_only_hour: int) -> str:
+    # Sketches are hourly and keyed in UTC: a bound covers the whole hour it
+    # falls in, and a bare date means its first (start) or last (end) hour.
+    # Offsets are converted to UTC; naive times are taken as UTC already.
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid ISO date or time: {value}")
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+    else:
+        moment = datetime(day.year, day.month, day.day, date_only_hour)
+    return moment.strftime("%Y-%m-%d %H:00:00")
+
+
+@router.get("/stats/response-times")
+@workload("analytics")
+def response_time_metrics(
+    hours: int = Query(24, ge=1, le=24 * 365),
+    start: str | None = Query(None, description="window start (ISO); overrides hours"),
+    end: str | None = Query(None, description="window end (ISO)"),
+    severity: list[str] | None = Query(None),
+):
+    """
+    p50 / p90 / p99 time-to-ack and time-to-resolve (seconds), overall and
+    per severity, for acks and resolves in the window. Merged from hourly
+    sketches (about 1% relative error), so no alert rows are scanned.
+    """
+    if start is None:
+        start = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    start = _hour(start, 0)
+    end = _hour(end, 23) if end else None
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        result = response_time_quantiles(conn, start, end, severity)
+    finally:
+        conn.close()
+    return {"start": start, "end": end, **result}
+
+
+@router.get("/stats/workloads")
+async def workload_metrics():
+    """
+    Queue depth and rejection counters for each route-class thread pool.
+    Answered on the event loop so it stays readable while pools are saturated.
+    """
+    return workload_stats()
+
+
+@router.get("/stats/queues")
+async def queue_metrics():
+    """
+    Depth and throughput of the background prediction-log and alert queues.
+    """
+    return sink_stats()
+
+
+@router.get("/stats/cache")
+async def cache_metrics():
+    """
+    Size and hit rate of the /predict idempotency result cache.
+    """
+    return prediction_cache.stats()
+
+
+@router.get("/stats/scorer")
+async def scorer_metrics(request: Request):
+    """
+    Which scorer is serving (main model or degraded-mode fallback), why,
+    and how many predictions each has produced.
+    """
+    return request.app.state.model_service.scorer_stats()
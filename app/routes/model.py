@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
+
+from app.auth.deps import require_role
+from app.model import model_file
+from app.workloads import workload
+
+router = APIRouter()
+
+
+class ReloadPayload(BaseModel):
+    # A .pkl file inside models/ (default: models/xgb_model.pkl)
+    path: str | None = None
+    wait: bool = False
+
+
+@router.get("/model")
+@workload("admin")
+def model_info(request: Request):
+    """
+    Active and previous model versions, plus the last reload error if any.
+    """
+    return request.app.state.model_service.info()
+
+
+@router.post("/model/reload", dependencies=[Depends(require_role("admin"))])
+@workload("admin")
+def reload_model(request: Request, payload: ReloadPayload | None = None):
+    """
+    Load, validate and warm a model file, then swap it in atomically.
+
+    Runs on a background thread; in-flight requests finish on the old model.
+    With `wait`, blocks until the swap (in this worker) and reports the
+    outcome. Other workers follow within MODEL_WATCH_INTERVAL_SEC.
+    """
+    service = request.app.state.model_service
+    payload = payload or ReloadPayload()
+    try:
+        path = model_file(payload.path) if payload.path else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    thread = service.reload_async(path, announce=True)
+    if not payload.wait:
+        return {"ok": True, "status": "reloading", "version": service.version}
+
+    thread.join()
+    if service.last_reload_error:
+        raise HTTPException(status_code=422, detail=f"Reload failed: {service.last_reload_error}")
+    return {"ok": True, **service.info()}
+
+
+@router.post("/model/rollback", dependencies=[Depends(require_role("admin"))])
+@workload("admin")
+def rollback_model(request: Request):
+    """
+    Instantly switch back to the previously served model version. Other
+    workers follow within MODEL_WATCH_INTERVAL_SEC.
+    """
+    try:
+        version = request.app.state.model_service.rollback(announce=True)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"ok": True, "version": version}
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.open_orders import count_open_orders, rescorer
+from app.workloads import workload
+from db.writer import submit
+
+router = APIRouter()
+
+
+class DeliveredPayload(BaseModel):
+    order_ids: list[str]
+
+
+@router.get("/orders/open")
+@workload("admin")
+def open_orders_status():
+    """
+    Size of the open-order registry and crossing-timer activity.
+    """
+    return {"open_orders": count_open_orders(), "timers": rescorer.stats()}
+
+
+@router.post("/orders/{order_id}/delivered")
+@workload("admin")
+def mark_delivered(order_id: str):
+    """
+    Mark an order delivered, removing it from periodic re-scoring.
+    """
+    closed = submit("open_orders_close", [order_id], wait=True)
+    if not closed:
+        raise HTTPException(status_code=404, detail="Order not found in open registry")
+    return {"ok": True}
+
+
+@router.post("/orders/delivered")
+@workload("admin")
+def mark_delivered_bulk(payload: DeliveredPayload):
+    """
+    Mark many orders delivered in one call.
+    """
+    closed = submit("open_orders_close", payload.order_ids, wait=True)
+    return {"ok": True, "closed": closed}
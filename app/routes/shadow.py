@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Query
+
+from app.settings_store import get_threshold
+from app.shadow import shadow_scorer, shadow_summary
+from app.workloads import workload
+
+router = APIRouter()
+
+
+@router.get("/shadow/summary")
+@workload("analytics")
+def get_shadow_summary(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    threshold: float | None = Query(None, ge=0, le=1, description="Defaults to the live alert threshold"),
+):
+    """
+    Compare each shadow candidate against production over the last N hours:
+    decision agreement, alert rates and mean probability difference.
+    """
+    threshold = get_threshold() if threshold is None else threshold
+    return {
+        "hours": hours,
+        "threshold": threshold,
+        "models": shadow_summary(hours, threshold),
+        "scorer": shadow_scorer.stats(),
+    }
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+from app.features import CARRIER_NAMES, PRIORITY_NAMES, WEATHER_NAMES
+from app.workloads import workload
+from db import analytics
 
 router = APIRouter()
 
@@ -13,7 +18,117 @@ def _get_conn():
     return conn
 
 
+# The pieces of the stats SQL that differ between SQLite and DuckDB; the rest
+# is written to run unchanged on both
+_DIALECTS = {
+    "sqlite": {"bin": "MIN(CAST(miss_sla_proba * ? AS INTEGER), ? - 1)"},
+    # DuckDB rounds when casting to an integer, so floor first
+    "duckdb": {"bin": "LEAST(CAST(FLOOR(miss_sla_proba * ?) AS INTEGER), ? - 1)"},
+}
+
+
+def _rows(sql: str, params=(), since: str | None = None, last_days: int | None = None) -> list[dict]:
+    """
+    Run a stats query on the analytics mirror when it is enabled and synced
+    (`since` / `last_days` prune its date partitions), else on SQLite.
+    """
+    rows = analytics.query(sql.format(**_DIALECTS["duckdb"]), params, since=since, last_days=last_days)
+    if rows is None:
+        conn = _get_conn()
+        try:
+            rows = [dict(r) for r in conn.execute(sql.format(**_DIALECTS["sqlite"]), params).fetchall()]
+        finally:
+            conn.close()
+    return rows
+
+
+# Columns a histogram can be split by, with their code -> name lookups
+SPLIT_COLUMNS = {
+    "carrier": CARRIER_NAMES,
+    "weather": WEATHER_NAMES,
+    "priority": PRIORITY_NAMES,
+}
+
+
+def _prediction_time(value: str, end: bool = False) -> str:
+    # predictions.timestamp is a naive local ISO string (datetime.now()), so
+    # bounds with an offset are converted to local time first. A bare date
+    # as the upper bound means "through the end of that day".
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid ISO date or time: {value}")
+        if moment.tzinfo is not None:
+            moment = moment.astimezone().replace(tzinfo=None)
+    else:
+        moment = datetime.combine(day, datetime.max.time() if end else datetime.min.time())
+    return moment.isoformat()
+
+
+def risk_histogram(bins: int, start: str, end: str | None = None, by: str | None = None) -> dict:
+    """
+    Counts of predictions in `bins` equal-width probability bins over
+    [start, end], optionally one series per value of `by`, in one
+    GROUP BY pass over the timestamp range.
+    """
+    split = f"{by}, " if by else ""
+    clauses, params = ["timestamp >= ?", "miss_sla_proba IS NOT NULL"], [bins, bins, start]
+    if end:
+        clauses.append("timestamp <= ?")
+        params.append(end)
+    rows = _rows(
+        f"""
+        SELECT {split}{{bin}} AS bin, COUNT(*) AS n
+        FROM predictions
+        WHERE {' AND '.join(clauses)}
+        GROUP BY {split}bin
+        """,
+        params,
+        since=start,
+    )
+
+    series = {}
+    for row in rows:
+        key = SPLIT_COLUMNS[by].get(row[by], "UNKNOWN") if by else "all"
+        counts = series.setdefault(key, [0] * bins)
+        counts[max(row["bin"], 0)] += row["n"]
+
+    edges = [round(i / bins, 6) for i in range(bins + 1)]
+    result = {"start": start, "end": end, "bins": bins, "edges": edges, "by": by}
+    if by:
+        result["series"] = dict(sorted(series.items()))
+    else:
+        result["counts"] = series.get("all", [0] * bins)
+    return result
+
+
+@router.get("/stats/risk-histogram")
+@workload("analytics")
+def stats_risk_histogram(
+    bins: int = Query(20, ge=2, le=100),
+    hours: int = Query(24, ge=1, le=24 * 365),
+    start: str | None = Query(None, description="ISO time or date; overrides hours"),
+    end: str | None = Query(None, description="ISO time or date"),
+    by: Literal["carrier", "weather", "priority"] | None = Query(None),
+):
+    """
+    Risk distribution as fixed-width probability-bin counts (bin i covers
+    [edges[i], edges[i+1]), the last bin includes 1.0), so clients draw a
+    histogram from `bins` numbers instead of raw prediction rows.
+    With `by`, one count series per carrier / weather / priority.
+    """
+    if start is None:
+        start = (datetime.now() - timedelta(hours=hours)).isoformat()
+    start = _prediction_time(start)
+    end = _prediction_time(end, end=True) if end else None
+    return risk_histogram(bins, start, end, by)
+
+
 @router.get("/stats/today")
+@workload("analytics")
 def stats_today():
     """
     Get statistics for all predictions (not just today):
@@ -84,6 +199,7 @@ def stats_today():
 
 
 @router.get("/stats/trends")
+@workload("analytics")
 def stats_trends(days: int = Query(7, ge=1, le=30)):
     """
     Get trend statistics for the last N days.
@@ -93,108 +209,118 @@ def stats_trends(days: int = Query(7, ge=1, le=30)):
     - total predictions
     - risky count
     - average risk probability
+
+    Served from the analytics mirror when ANALYTICS_MIRROR is on (up to one
+    sync interval behind), otherwise from SQLite.
     """
-    today = datetime.utcnow().strftime("%Y-%m-%d")
-    
-    with _get_conn() as conn:
-        rows = conn.execute(
-            """
-            SELECT strftime('%Y-%m-%d', timestamp) AS day,
-                   COUNT(*) AS total,
-                   SUM(will_miss_sla) AS risky,
-                   ROUND(AVG(miss_sla_proba), 3) AS avg_risk
-            FROM predictions
-            GROUP BY day
-            ORDER BY day DESC
-            LIMIT ?
-            """,
-            (days,),
-        ).fetchall()
+    # Same cutoffs as SQLite's datetime('now', '-24 hours') and
+    # strftime('%Y-%m-%d', 'now', '-N days'), computed here so the queries
+    # also run on the mirror
+    now = datetime.utcnow()
+    last_24h = (now - timedelta(hours=24)).strftime("%Y-%m-%d %H:%M:%S")
+    first_day = (now - timedelta(days=days)).strftime("%Y-%m-%d")
 
-        # Format for frontend - convert to hourly format if needed
-        # For now, return raw daily data and let frontend transform
-        daily_data = [dict(r) for r in rows]
+    daily_data = _rows(
+        """
+        SELECT substr(timestamp, 1, 10) AS day,
+               COUNT(*) AS total,
+               SUM(will_miss_sla) AS risky,
+               ROUND(AVG(miss_sla_proba), 3) AS avg_risk
+        FROM predictions
+        GROUP BY day
+        ORDER BY day DESC
+        LIMIT ?
+        """,
+        (days,),
+        last_days=days,
+    )
 
-        # Also provide hourly data for the last 24 hours (for the chart)
-        # Show ALL high-risk predictions (will_miss_sla = 1) by hour for last 24h
-        hourly_rows = conn.execute(
-            """
-            SELECT strftime('%H:00', timestamp) AS time,
-                   COUNT(*) AS risk
-            FROM predictions
-            WHERE timestamp >= datetime('now', '-24 hours')
-              AND will_miss_sla = 1
-            GROUP BY strftime('%H', timestamp)
-            ORDER BY time
-            """,
-        ).fetchall()
+    # Also provide hourly data for the last 24 hours (for the chart)
+    # Show ALL high-risk predictions (will_miss_sla = 1) by hour for last 24h
+    hourly_rows = _rows(
+        """
+        SELECT substr(timestamp, 12, 2) || ':00' AS time,
+               COUNT(*) AS risk
+        FROM predictions
+        WHERE timestamp >= ?
+          AND will_miss_sla = 1
+        GROUP BY time
+        ORDER BY time
+        """,
+        (last_24h,),
+        since=last_24h,
+    )
 
-        # Convert to dict for easier lookup
-        hourly_dict = {r["time"]: r["risk"] for r in hourly_rows}
-        
-        # Fill in all 24 hours (00:00 to 23:00) with zeros where no data exists
-        # This ensures the chart shows a complete timeline even if most hours have zero high-risk orders
-        hourly = []
-        for hour in range(24):
-            time_str = f"{hour:02d}:00"
-            risk = hourly_dict.get(time_str, 0)
-            hourly.append({"time": time_str, "risk": risk})
-
-        # Risk distribution (for pie chart)
-        risk_dist_rows = conn.execute(
-            """
-            SELECT 
-                CASE 
-                    WHEN miss_sla_proba >= 0.8 THEN 'High Risk'
-                    WHEN miss_sla_proba > 0.5 THEN 'Medium Risk'
-                    ELSE 'Low Risk'
-                END AS name,
-                COUNT(*) AS value
-            FROM predictions
-            WHERE strftime('%Y-%m-%d', timestamp) >= strftime('%Y-%m-%d', 'now', '-' || ? || ' days')
-            GROUP BY name
-            """,
-            (days,),
-        ).fetchall()
+    # Convert to dict for easier lookup
+    hourly_dict = {r["time"]: r["risk"] for r in hourly_rows}
+    
+    # Fill in all 24 hours (00:00 to 23:00) with zeros where no data exists
+    # This ensures the chart shows a complete timeline even if most hours have zero high-risk orders
+    hourly = []
+    for hour in range(24):
+        time_str = f"{hour:02d}:00"
+        risk = hourly_dict.get(time_str, 0)
+        hourly.append({"time": time_str, "risk": risk})
 
-        risk_distribution = []
-        colors = {"High Risk": "#EF4444", "Medium Risk": "#F59E0B", "Low Risk": "#10B981"}
-        for row in risk_dist_rows:
-            risk_distribution.append(
-                {
-                    "name": row["name"],
-                    "value": row["value"],
-                    "color": colors.get(row["name"], "#6366f1"),
-                }
-            )
-
-        # Carrier performance (placeholder structure - can be enhanced with real data)
-        carrier_rows = conn.execute(
-            """
-            SELECT 
-                carrier,
-                COUNT(*) AS total,
-                SUM(will_miss_sla) AS delayed
-            FROM predictions
-            WHERE strftime('%Y-%m-%d', timestamp) >= strftime('%Y-%m-%d', 'now', '-' || ? || ' days')
-              AND carrier IS NOT NULL
-            GROUP BY carrier
-            """,
-            (days,),
-        ).fetchall()
+    # Risk distribution (for pie chart)
+    risk_dist_rows = _rows(
+        """
+        SELECT 
+            CASE 
+                WHEN miss_sla_proba >= 0.8 THEN 'High Risk'
+                WHEN miss_sla_proba > 0.5 THEN 'Medium Risk'
+                ELSE 'Low Risk'
+            END AS name,
+            COUNT(*) AS value
+        FROM predictions
+        WHERE timestamp >= ?
+        GROUP BY name
+        ORDER BY name
+        """,
+        (first_day,),
+        since=first_day,
+    )
+
+    risk_distribution = []
+    colors = {"High Risk": "#EF4444", "Medium Risk": "#F59E0B", "Low Risk": "#10B981"}
+    for row in risk_dist_rows:
+        risk_distribution.append(
+            {
+                "name": row["name"],
+                "value": row["value"],
+                "color": colors.get(row["name"], "#6366f1"),
+            }
+        )
 
-        carrier_performance = []
-        for row in carrier_rows:
-            total = row["total"]
-            delayed = row["delayed"] or 0
-            on_time = total - delayed
-            carrier_performance.append(
-                {
-                    "name": row["carrier"] or "Unknown",
-                    "onTime": round((on_time / total) * 100, 1) if total > 0 else 0,
-                    "delayed": round((delayed / total) * 100, 1) if total > 0 else 0,
-                }
-            )
+    # Carrier performance, grouped on the integer carrier code
+    carrier_rows = _rows(
+        """
+        SELECT 
+            carrier,
+            COUNT(*) AS total,
+            SUM(will_miss_sla) AS delayed
+        FROM predictions
+        WHERE timestamp >= ?
+          AND carrier IS NOT NULL
+        GROUP BY carrier
+        ORDER BY carrier
+        """,
+        (first_day,),
+        since=first_day,
+    )
+
+    carrier_performance = []
+    for row in carrier_rows:
+        total = row["total"]
+        delayed = row["delayed"] or 0
+        on_time = total - delayed
+        carrier_performance.append(
+            {
+                "name": CARRIER_NAMES.get(row["carrier"], "Unknown"),
+                "onTime": round((on_time / total) * 100, 1) if total > 0 else 0,
+                "delayed": round((delayed / total) * 100, 1) if total > 0 else 0,
+            }
+        )
 
     return {
         "hourly": hourly,
@@ -202,4 +328,3 @@ def stats_trends(days: int = Query(7, ge=1, le=30)):
         "carrier_performance": carrier_performance,
         "daily": daily_data,  # Additional daily trend data
     }
-
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import List
 
@@ -17,9 +17,15 @@ class OrderInput(BaseModel):
 
 
 class PredictionOutput(BaseModel):
+    # `model_version` is a field, not part of pydantic's model_ namespace
+    model_config = ConfigDict(protected_namespaces=())
+
     order_id: str
     miss_sla_proba: float
     will_miss_sla: bool
+    model_version: str | None = None
+    # "primary" or "fallback" (degraded mode)
+    scorer: str | None = None
 
 
 class Settings(BaseModel):
@@ -0,0 +1,67 @@
+import orjson
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import TypeAdapter, ValidationError
+
+from app.schemas import OrderInput, PredictionOutput
+
+# Built once at import: validators and serializers are compiled here rather
+# than on every request
+ORDER_LIST = TypeAdapter(list[OrderInput])
+PREDICTION = TypeAdapter(PredictionOutput)
+PREDICTION_LIST = TypeAdapter(list[PredictionOutput])
+
+
+class JSONBytes(Response):
+    """
+    A response whose body is already-encoded JSON.
+
+    Returning a Response skips FastAPI's jsonable_encoder pass and the
+    stdlib json encoder; handlers encode with orjson or a TypeAdapter.
+    """
+
+    media_type = "application/json"
+
+
+def json_response(content) -> JSONBytes:
+    return JSONBytes(orjson.dumps(content))
+
+
+def model_response(adapter: TypeAdapter, value) -> JSONBytes:
+    """Encode a pydantic value with its precompiled serializer."""
+    return JSONBytes(adapter.dump_json(value))
+
+
+def rows_json(columns, rows, bools=()) -> bytes:
+    """
+    Encode cursor tuples as a JSON list of objects keyed by `columns`.
+    Columns named in `bools` are stored as 0/1 and come out as booleans.
+    """
+    if bools:
+        idx = [columns.index(name) for name in bools]
+        rows = [_with_bools(row, idx) for row in rows]
+    return orjson.dumps([dict(zip(columns, row)) for row in rows])
+
+
+def _with_bools(row, idx):
+    row = list(row)
+    for i in idx:
+        if row[i] is not None:
+            row[i] = bool(row[i])
+    return row
+
+
+def rows_response(cursor, rows, bools=()) -> JSONBytes:
+    columns = [d[0] for d in cursor.description]
+    return JSONBytes(rows_json(columns, rows, bools))
+
+
+def parse_orders(body: bytes) -> list[OrderInput]:
+    """Validate a raw JSON array of orders; errors become the usual 422."""
+    try:
+        return ORDER_LIST.validate_json(body)
+    except ValidationError as e:
+        errors = e.errors(include_url=False)
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in errors]
+        ) from None
@@ -1,7 +1,18 @@
 import sqlite3
+import threading
+import time
+
+from app.config import settings as app_settings
+from db.writer import submit
 
 DB_PATH = "sla_logs.db"
 
+# get_threshold() is on the scoring hot path (often on the event loop); keep
+# the value in process and re-read it on a background thread once it is older
+# than the TTL. save_settings() stores the new value directly.
+_threshold_cache = {"value": None, "expires": 0.0, "refreshing": False}
+_refresh_lock = threading.Lock()
+
 def load_settings():
     """Load settings from SQLite database"""
     conn = sqlite3.connect(DB_PATH)
@@ -26,6 +37,11 @@ def load_settings():
     }
 
 def save_settings(data):
+    """Save settings, through the single DB writer when one is running"""
+    submit("settings", data, wait=True)
+    _cache_threshold(data.get("threshold", 0.80))
+
+def write_settings(data):
     """Save settings to SQLite database"""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -71,8 +87,41 @@ def save_settings(data):
     conn.commit()
     conn.close()
 
+def _cache_threshold(value):
+    _threshold_cache["value"] = value
+    _threshold_cache["expires"] = time.monotonic() + app_settings.THRESHOLD_CACHE_TTL_SEC
+
+def refresh_threshold():
+    """Re-read the threshold from the settings table into the cache"""
+    threshold = load_settings()["threshold"]
+    _cache_threshold(threshold)
+    return threshold
+
+def _refresh_in_background():
+    try:
+        refresh_threshold()
+    except Exception as e:
+        # Keep serving the cached value; the next stale read retries
+        print(f"[ERROR] Threshold refresh failed: {type(e).__name__}: {e}")
+    finally:
+        _threshold_cache["refreshing"] = False
+
 def get_threshold():
-    """Get current threshold for alert engine"""
-    settings = load_settings()
-    return settings["threshold"]
+    """
+    Get current threshold for alert engine.
+
+    Only the first call reads the DB inline. After THRESHOLD_CACHE_TTL_SEC the
+    cached value is still returned while one background thread re-reads it,
+    so callers on the event loop never wait on SQLite.
+    """
+    threshold = _threshold_cache["value"]
+    if threshold is None:
+        return refresh_threshold()
 
+    if time.monotonic() >= _threshold_cache["expires"]:
+        with _refresh_lock:
+            start = not _threshold_cache["refreshing"]
+            _threshold_cache["refreshing"] = True
+        if start:
+            threading.Thread(target=_refresh_in_background, name="threshold-refresh", daemon=True).start()
+    return threshold
@@ -0,0 +1,223 @@
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from app.config import settings
+from app.model import model_version, validate_model
+from db.writer import submit
+
+DB_PATH = "sla_logs.db"
+
+
+# ------------------------------
+# STORAGE (executed by the DB writer when one is running)
+# ------------------------------
+
+def register_shadow_model(label: str, path: str) -> int:
+    """Return the compact integer id for a candidate model, creating it if new."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute(
+            "INSERT OR IGNORE INTO shadow_models (label, path) VALUES (?, ?)",
+            (label, path),
+        )
+        conn.commit()
+        return conn.execute(
+            "SELECT id FROM shadow_models WHERE label = ?", (label,)
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def insert_shadow_rows(rows) -> None:
+    """rows: (ts, model_id, order_id, prod_proba, shadow_proba) tuples."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.executemany(
+            """
+            INSERT INTO shadow_predictions (ts, model_id, order_id, prod_proba, shadow_proba)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def shadow_summary(hours: int, threshold: float) -> list[dict]:
+    """
+    Per candidate over the last `hours`: agreement with production at
+    `threshold`, both alert rates, and the mean absolute probability gap.
+    """
+    since = int(time.time()) - hours * 3600
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(
+            """
+            SELECT m.label AS model,
+                   COUNT(*) AS scored,
+                   AVG((s.prod_proba >= :t) = (s.shadow_proba >= :t)) AS agreement,
+                   AVG(s.prod_proba >= :t) AS prod_alert_rate,
+                   AVG(s.shadow_proba >= :t) AS shadow_alert_rate,
+                   AVG(ABS(s.shadow_proba - s.prod_proba)) AS mean_abs_diff
+            FROM shadow_predictions s
+            JOIN shadow_models m ON m.id = s.model_id
+            WHERE s.ts >= :since
+            GROUP BY s.model_id
+            ORDER BY m.label
+            """,
+            {"t": threshold, "since": since},
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "model": r["model"],
+            "scored": r["scored"],
+            "agreement": round(r["agreement"], 4),
+            "prod_alert_rate": round(r["prod_alert_rate"], 4),
+            "shadow_alert_rate": round(r["shadow_alert_rate"], 4),
+            "alert_rate_diff": round(r["shadow_alert_rate"] - r["prod_alert_rate"], 4),
+            "mean_abs_diff": round(r["mean_abs_diff"], 4),
+        }
+        for r in rows
+    ]
+
+
+# ------------------------------
+# SCORER
+# ------------------------------
+
+class ShadowScorer:
+    """
+    Scores production traffic with candidate models off the request path.
+
+    `submit` is a non-blocking put on a bounded queue; when the queue is
+    full the item is dropped. A background thread scores queued feature
+    rows in batches against every candidate. It is held to a CPU budget
+    (fraction of one core): once the budget is spent, batches are skipped
+    until it refills, so shadow work never turns into request latency.
+    """
+
+    def __init__(self, paths: list[str], queue_size: int, batch_size: int, cpu_budget: float):
+        self.paths = paths
+        self.batch_size = batch_size
+        self.cpu_budget = cpu_budget
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.candidates: list[tuple[int, str, object]] = []
+        self._thread = None
+        self._stop = threading.Event()
+        self.scored = 0
+        self.dropped = 0
+        self.skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.paths)
+
+    def submit(self, order_id: str, x, prod_proba: float) -> None:
+        if self._thread is None:
+            return
+        try:
+            self.queue.put_nowait((int(time.time()), order_id, x, prod_proba))
+        except queue.Full:
+            self.dropped += 1
+
+    def _load_candidates(self) -> None:
+        for path in self.paths:
+            try:
+                model = joblib.load(path)
+                validate_model(model)
+                label = model_version(Path(path))
+                model_id = submit("shadow_model", label, path, wait=True)
+                self.candidates.append((model_id, label, model))
+                print(f"[SHADOW] Loaded candidate {label}")
+            except Exception as e:
+                print(f"[ERROR] Shadow candidate {path} not loaded: {type(e).__name__}: {e}")
+
+    def _next_batch(self) -> list:
+        try:
+            batch = [self.queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        self._load_candidates()
+        if not self.candidates:
+            self._thread = None
+            return
+
+        credit = self.cpu_budget
+        last = time.monotonic()
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            # Token bucket: credit refills at cpu_budget seconds per second,
+            # capped at one second's worth
+            now = time.monotonic()
+            credit = min(self.cpu_budget, credit + (now - last) * self.cpu_budget)
+            last = now
+            if credit <= 0:
+                self.skipped += len(batch)
+                continue
+
+            started = time.perf_counter()
+            X = np.vstack([item[2] for item in batch])
+            rows = []
+            for model_id, _, model in self.candidates:
+                shadow = model.predict_proba(X)[:, 1]
+                rows.extend(
+                    (ts, model_id, order_id, float(prod), float(p))
+                    for (ts, order_id, _, prod), p in zip(batch, shadow)
+                )
+            credit -= time.perf_counter() - started
+
+            try:
+                submit("shadow", rows)
+                self.scored += len(batch)
+            except Exception as e:
+                print(f"[ERROR] Failed to store shadow scores: {type(e).__name__}: {e}")
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "candidates": [label for _, label, _ in self.candidates],
+            "queue_depth": self.queue.qsize(),
+            "scored": self.scored,
+            "dropped": self.dropped,
+            "skipped_over_budget": self.skipped,
+        }
+
+
+shadow_scorer = ShadowScorer(
+    [p.strip() for p in settings.SHADOW_MODELS.split(",") if p.strip()],
+    settings.SHADOW_QUEUE_SIZE,
+    settings.SHADOW_BATCH_SIZE,
+    settings.SHADOW_CPU_BUDGET,
+)
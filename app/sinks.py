@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.alert_engine import send_email_alert
+from app.open_orders import register_open_orders
+from db.db_connection import log_predictions
+
+
+class AsyncSink:
+    """
+    An asyncio queue drained by one background task.
+
+    Producers on the event loop `await put(item)`, which only waits when the
+    queue is full (backpressure, not a thread hand-off). The drain task
+    collects up to `batch_size` queued items and hands them to the blocking
+    `handler` on a single dedicated thread, so SQLite writes and SMTP calls
+    never run on the loop or on the request pools.
+    """
+
+    def __init__(self, name: str, handler, maxsize: int, batch_size: int):
+        self.name = name
+        self.handler = handler
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue | None = None
+        self.task: asyncio.Task | None = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-sink")
+        self.processed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self.task is not None:
+            return
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self.task = asyncio.create_task(self._drain(), name=f"{self.name}-drain")
+
+    async def put(self, item) -> None:
+        if self.queue is None:
+            # Not started (e.g. app used without lifespan events): write inline
+            self.handler([item])
+            return
+        await self.queue.put(item)
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                await loop.run_in_executor(self.executor, self.handler, batch)
+                self.processed += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"[ERROR] {self.name} sink failed on {len(batch)} items: {type(e).__name__}: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush whatever is queued (bounded by `timeout`), then stop."""
+        if self.task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[WARN] {self.name} sink stopped with {self.queue.qsize()} items unflushed")
+        self.task.cancel()
+        self.task = None
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.queue.qsize() if self.queue is not None else 0,
+            "maxsize": self.maxsize,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+def _send_alerts(batch) -> None:
+    for order, proba in batch:
+        send_email_alert(order, proba)
+
+
+# Prediction rows are written in batches (one transaction per drain);
+# alerts go one at a time because each may do SMTP.
+prediction_log_sink = AsyncSink(
+    "prediction-log", log_predictions, settings.LOG_QUEUE_SIZE, settings.LOG_BATCH_SIZE
+)
+alert_sink = AsyncSink("alert", _send_alerts, settings.ALERT_QUEUE_SIZE, 1)
+open_order_sink = AsyncSink(
+    "open-orders", register_open_orders, settings.LOG_QUEUE_SIZE, settings.LOG_BATCH_SIZE
+)
+
+SINKS = {sink.name: sink for sink in (prediction_log_sink, alert_sink, open_order_sink)}
+
+
+def start_sinks() -> None:
+    for sink in SINKS.values():
+        sink.start()
+
+
+async def stop_sinks() -> None:
+    for sink in SINKS.values():
+        await sink.stop()
+
+
+def sink_stats() -> dict:
+    return {name: sink.stats() for name, sink in SINKS.items()}
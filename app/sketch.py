@@ -0,0 +1,83 @@
+import math
+import struct
+from array import array
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees (DDSketch).
+
+    Positive values land in logarithmic buckets of ratio gamma, so any
+    quantile is returned within `relative_accuracy` of the true value no
+    matter how skewed the data. Two sketches with the same accuracy merge by
+    adding bucket counts, which is what lets per-hour sketches be combined
+    into any window. Zeros (and anything below MIN_VALUE) get their own
+    bucket.
+    """
+
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, n: int = 1) -> None:
+        if value < self.MIN_VALUE:
+            self.zero_count += n
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + n
+        self.count += n
+
+    def merge(self, other: "DDSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different accuracies")
+        for index, n in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float | None:
+        """Estimated q-quantile (0 <= q <= 1), or None for an empty sketch."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    _HEADER = struct.Struct("<dQQ")
+
+    def to_bytes(self) -> bytes:
+        """Header (accuracy, zero count, bucket count) + int32 indexes + uint64 counts."""
+        indexes = sorted(self.bins)
+        return (
+            self._HEADER.pack(self.relative_accuracy, self.zero_count, len(indexes))
+            + array("i", indexes).tobytes()
+            + array("Q", (self.bins[i] for i in indexes)).tobytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        accuracy, zero_count, n = cls._HEADER.unpack_from(data)
+        offset = cls._HEADER.size
+        indexes = array("i")
+        indexes.frombytes(data[offset:offset + 4 * n])
+        counts = array("Q")
+        counts.frombytes(data[offset + 4 * n:offset + 12 * n])
+
+        sketch = cls(accuracy)
+        sketch.bins = dict(zip(indexes, counts))
+        sketch.zero_count = zero_count
+        sketch.count = zero_count + sum(counts)
+        return sketch
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.config import settings
+from app.features import build_feature_matrix, build_feature_vector, to_minutes
+from app.schemas import OrderInput, PredictionOutput
+from app.settings_store import get_threshold
+from app.workloads import WORKLOADS, run_in_workload
+
+
+class Readiness:
+    """
+    Whether this process has finished warming up.
+
+    Liveness (/health) only says the process answers; readiness (/ready)
+    turns green once synthetic orders have been through the full predict
+    path, so the first real request does not pay one-time setup costs.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.warmup_sec = None
+        self.error = None
+        self.task = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_sec": self.warmup_sec,
+            "error": self.error,
+        }
+
+
+readiness = Readiness()
+
+
+def synthetic_orders(n: int) -> list[dict]:
+    """Deterministic /predict payloads spread over the feature ranges."""
+    now = datetime.now(timezone.utc)
+    rng = np.random.default_rng(0)
+    weather = ["CLEAR", "CLOUDS", "RAIN"]
+    priority = ["LOW", "NORMAL", "HIGH"]
+    carrier = ["BIKE", "SCOOTER", "CAR", "VAN"]
+    return [
+        {
+            "order_id": f"warmup-{i}",
+            "created_at": (now - timedelta(minutes=int(rng.integers(1, 90)))).isoformat(),
+            "promised_at": (now + timedelta(minutes=int(rng.integers(-20, 40)))).isoformat(),
+            "distance_km": float(rng.uniform(0.5, 8)),
+            "items_count": int(rng.integers(1, 13)),
+            "hub_load": float(rng.uniform(0.1, 1.0)),
+            "traffic_index": float(rng.uniform(0.1, 1.0)),
+            "weather_code": weather[i % len(weather)],
+            "priority": priority[i % len(priority)],
+            "carrier": carrier[i % len(carrier)],
+        }
+        for i in range(n)
+    ]
+
+
+def _warm_orders(model_service, payloads: list[dict]) -> None:
+    """
+    The /predict path minus its side effects (no logging, alerts or
+    registry, and no scorer stats: real requests may already be served).
+    """
+    threshold = get_threshold()
+    for payload in payloads:
+        order = OrderInput.model_validate(payload)
+        x = build_feature_vector(order)
+        proba, version, scorer = model_service.score_vector(x, record=False)
+        if model_service.fallback is not None:
+            model_service.score_fallback(x, record=False)
+        PredictionOutput(
+            order_id=order.order_id,
+            miss_sla_proba=proba,
+            will_miss_sla=proba >= threshold,
+            model_version=version,
+            scorer=scorer,
+        ).model_dump_json()
+
+
+def _warm_batches(model_service, payloads: list[dict]) -> None:
+    """Batch shapes used by the open-order timers (planning grid and due rows)."""
+    orders = [OrderInput.model_validate(p) for p in payloads]
+    rows = np.array([build_feature_vector(o)[2:] for o in orders], dtype=np.float64)
+    created = np.array([to_minutes(o.created_at) for o in orders])
+    promised = np.array([to_minutes(o.promised_at) for o in orders])
+    for repeat in (1, settings.OPEN_ORDER_GRID_POINTS):
+        X = build_feature_matrix(
+            np.repeat(created, repeat), np.repeat(promised, repeat), np.repeat(rows, repeat, axis=0)
+        )
+        model_service.score_matrix(X)
+
+
+async def warmup(model_service) -> None:
+    """Run synthetic orders through scoring, then mark the process ready."""
+    started = time.perf_counter()
+    try:
+        payloads = synthetic_orders(settings.WARMUP_ORDERS)
+        if payloads:
+            # The first run pays one-time costs inline (as with PREDICT_INLINE)
+            _warm_orders(model_service, payloads[:1])
+
+            # One slice per scoring thread, so every pool thread gets spun up
+            # and runs the model at least once
+            pool = WORKLOADS["scoring"]
+            slices = [payloads[i::pool.workers] for i in range(pool.workers)]
+            await asyncio.gather(*(
+                run_in_workload("scoring", _warm_orders, model_service, s) for s in slices if s
+            ))
+            await asyncio.get_running_loop().run_in_executor(
+                None, _warm_batches, model_service, payloads
+            )
+    except Exception as e:
+        # Never keep an instance out of rotation forever: serve cold
+        readiness.error = f"{type(e).__name__}: {e}"
+        print(f"[ERROR] Warmup failed, serving cold: {readiness.error}")
+    finally:
+        readiness.ready = True
+    readiness.warmup_sec = round(time.perf_counter() - started, 3)
+    print(f"[STARTUP] Ready after {readiness.warmup_sec}s warmup")
+
+
+def start_warmup(model_service) -> None:
+    readiness.task = asyncio.create_task(warmup(model_service), name="warmup")
@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+
+class Workload:
+    """
+    A dedicated thread pool for one class of routes, with admission control.
+
+    At most `workers` calls run at once and at most `queue_limit` more wait
+    for a thread; anything beyond that is rejected straight away with a 503
+    instead of queueing behind work it cannot overtake.
+    """
+
+    def __init__(self, name: str, workers: int, queue_limit: int):
+        self.name = name
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"{self.name} workload is overloaded, retry shortly",
+                    headers={"Retry-After": str(settings.WORKLOAD_RETRY_AFTER_SEC)},
+                )
+            self.in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def _call(self, fn, *args, **kwargs):
+        with self._lock:
+            self.running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        self._admit()
+        ctx = contextvars.copy_context()
+        try:
+            future = self.executor.submit(ctx.run, self._call, fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        # Free the slot when the call itself ends (or is cancelled before it
+        # starts), not when the awaiting request does: a cancelled request's
+        # call keeps its thread until it returns
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "running": self.running,
+                "queued": self.in_flight - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+WORKLOADS = {
+    "scoring": Workload("scoring", settings.WORKLOAD_SCORING_WORKERS, settings.WORKLOAD_SCORING_QUEUE),
+    "analytics": Workload("analytics", settings.WORKLOAD_ANALYTICS_WORKERS, settings.WORKLOAD_ANALYTICS_QUEUE),
+    "admin": Workload("admin", settings.WORKLOAD_ADMIN_WORKERS, settings.WORKLOAD_ADMIN_QUEUE),
+}
+
+
+async def run_in_workload(name: str, fn, *args, **kwargs):
+    return await WORKLOADS[name].run(fn, *args, **kwargs)
+
+
+def workload(name: str):
+    """
+    Run a sync route handler on the named workload's pool instead of the
+    shared anyio threadpool.
+
+    The wrapper is async, so FastAPI awaits it directly; functools.wraps
+    keeps the original signature for dependency and response-model
+    resolution.
+    """
+    pool = WORKLOADS[name]
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await pool.run(fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def workload_stats() -> dict:
+    return {name: pool.stats() for name, pool in WORKLOADS.items()}
+
+
+def shutdown_workloads() -> None:
+    for pool in WORKLOADS.values():
+        pool.executor.shutdown(wait=False, cancel_futures=True)
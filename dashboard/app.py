@@ -1,69 +1,165 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
+import threading
 from pathlib import Path
 import altair as alt
 
 LOG_DB_PATH = Path("sla_logs.db")
 
-
-def load_logs(limit: int = 200) -> pd.DataFrame:
-    if not LOG_DB_PATH.exists():
-        return pd.DataFrame()
-
-    conn = sqlite3.connect(LOG_DB_PATH)
-
+HIGH_RISK = 0.8
+RISK_BINS = 20
+# Rows rendered per table; the window itself can be far larger
+TABLE_ROWS = 1000
+
+LOG_QUERY = """
+    SELECT
+        p.id,
+        p.order_id,
+        p.timestamp,
+        p.miss_sla_proba,
+        p.will_miss_sla,
+        p.distance,
+        p.items,
+        p.hub_load,
+        p.traffic,
+        w.name AS weather,
+        pr.name AS priority,
+        c.name AS carrier
+    FROM predictions p
+    LEFT JOIN weather_codes w ON w.code = p.weather
+    LEFT JOIN priority_codes pr ON pr.code = p.priority
+    LEFT JOIN carrier_codes c ON c.code = p.carrier
+    WHERE p.id > ?
+    ORDER BY p.id DESC
+    LIMIT ?
+"""
+
+
+def _connect():
+    # Read-only: the dashboard must never take a write lock on the API's DB
+    return sqlite3.connect(f"file:{LOG_DB_PATH}?mode=ro", uri=True)
+
+
+class LogWindow:
+    """
+    The newest `max_rows` predictions, kept in memory across reruns.
+
+    Each refresh fetches only rows with an id above the last one seen
+    (primary-key range, no sort) and parses just those; the frame is then
+    trimmed back to `max_rows`. Rows the retention job deleted are dropped
+    from the front, and if the table's max id falls below the last one seen
+    (the table was rebuilt or emptied) the window starts over.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self.frame = pd.DataFrame()
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> pd.DataFrame:
+        with self._lock:
+            if not LOG_DB_PATH.exists():
+                return self.frame
+            conn = _connect()
+            try:
+                # Both ends of the rowid index: no scan
+                min_id, max_id = conn.execute("SELECT MIN(id), MAX(id) FROM predictions").fetchone()
+                if max_id is None or max_id < self.last_id:
+                    self.frame = pd.DataFrame()
+                    self.last_id = 0
+                elif not self.frame.empty and min_id > self.frame["id"].iloc[0]:
+                    self.frame = self.frame[self.frame["id"] >= min_id].reset_index(drop=True)
+                new = pd.read_sql_query(LOG_QUERY, conn, params=(self.last_id, self.max_rows))
+            finally:
+                conn.close()
+            if new.empty:
+                return self.frame
+
+            # Newest-first from the query (so a long gap keeps only the newest
+            # rows); stored oldest-first
+            new = new.iloc[::-1].reset_index(drop=True)
+            new["timestamp"] = pd.to_datetime(new["timestamp"], format="ISO8601")
+            new["will_miss_sla"] = new["will_miss_sla"].astype(bool)
+            new.rename(columns={"miss_sla_proba": "risk"}, inplace=True)
+
+            frame = new if self.frame.empty else pd.concat([self.frame, new], ignore_index=True)
+            self.frame = frame.tail(self.max_rows).reset_index(drop=True)
+            self.last_id = int(new["id"].iloc[-1])
+            return self.frame
+
+
+@st.cache_resource
+def get_window(max_rows: int) -> LogWindow:
+    return LogWindow(max_rows)
+
+
+# Rows are immutable once written, so results for an id range only change
+# when rows in it are deleted; `rows` (the window's row count) keys that in
+@st.cache_data(max_entries=64)
+def window_kpis(first_id: int, last_id: int, rows: int) -> dict:
+    conn = _connect()
     try:
-        df = pd.read_sql_query(
-            f"""
-            SELECT
-                id,
-                order_id,
-                timestamp,
-                miss_sla_proba,
-                will_miss_sla,
-                distance,
-                items,
-                hub_load,
-                traffic,
-                weather,
-                priority,
-                carrier
+        total, high_risk, avg_risk = conn.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(miss_sla_proba > ?), 0), AVG(miss_sla_proba)
             FROM predictions
-            ORDER BY timestamp DESC
-            LIMIT {limit}
+            WHERE id BETWEEN ? AND ?
             """,
-            conn,
-        )
+            (HIGH_RISK, first_id, last_id),
+        ).fetchone()
     finally:
         conn.close()
+    return {"total": total, "high_risk": high_risk, "avg_risk": avg_risk or 0.0}
 
-    # Parse timestamp
-    if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
 
-    return df
+@st.cache_data(max_entries=64)
+def window_histogram(first_id: int, last_id: int, rows: int) -> pd.DataFrame:
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            """
+            SELECT MIN(CAST(miss_sla_proba * ? AS INTEGER), ? - 1) AS bin, COUNT(*)
+            FROM predictions
+            WHERE id BETWEEN ? AND ?
+            GROUP BY bin
+            """,
+            (RISK_BINS, RISK_BINS, first_id, last_id),
+        ).fetchall()
+    finally:
+        conn.close()
+    counts = dict(rows)
+    width = 1 / RISK_BINS
+    return pd.DataFrame({
+        "risk_from": [i * width for i in range(RISK_BINS)],
+        "risk_to": [(i + 1) * width for i in range(RISK_BINS)],
+        "count": [counts.get(i, 0) for i in range(RISK_BINS)],
+    })
 
 
 def main():
     st.title("SLA Prediction Monitoring Dashboard")
 
-    logs = load_logs()
+    max_rows = st.sidebar.number_input(
+        "Window (most recent predictions)", min_value=100, max_value=1_000_000,
+        value=100_000, step=10_000,
+    )
+    st.sidebar.button("Refresh")
+
+    logs = get_window(int(max_rows)).refresh()
 
     if logs.empty:
         st.warning("No logs found. Run predictions to generate data.")
         return
 
-    # Rename for convenience
-    logs = logs.copy()
-    logs.rename(columns={"miss_sla_proba": "risk"}, inplace=True)
+    first_id, last_id = int(logs["id"].iloc[0]), int(logs["id"].iloc[-1])
 
-    # KPI Metrics
-    total_orders = len(logs)
-    high_risk = logs[logs["risk"] > 0.8]
-    high_risk_count = len(high_risk)
-    high_risk_pct = (high_risk_count / total_orders) * 100
-    avg_risk = logs["risk"].mean()
+    # KPI Metrics (aggregated in SQLite over the window's id range)
+    kpis = window_kpis(first_id, last_id, len(logs))
+    total_orders = kpis["total"]
+    high_risk_count = kpis["high_risk"]
+    high_risk_pct = (high_risk_count / total_orders) * 100 if total_orders else 0
 
     st.subheader("Key Metrics")
     col1, col2, col3, col4 = st.columns(4)
@@ -71,28 +167,30 @@ def main():
     col1.metric("Total Orders", total_orders)
     col2.metric("High-Risk Count", high_risk_count)
     col3.metric("High-Risk Percentage", f"{high_risk_pct:.2f}%")
-    col4.metric("Average Risk", f"{avg_risk:.2f}")
+    col4.metric("Average Risk", f"{kpis['avg_risk']:.2f}")
 
-    # Risk Histogram
+    # Risk Histogram (pre-binned: RISK_BINS rows instead of the whole window)
     st.subheader("Risk Distribution")
     chart = (
-        alt.Chart(logs)
+        alt.Chart(window_histogram(first_id, last_id, len(logs)))
         .mark_bar()
         .encode(
-            x=alt.X("risk:Q", bin=alt.Bin(maxbins=20)),
-            y="count()",
+            x=alt.X("risk_from:Q", bin="binned", title="risk"),
+            x2="risk_to:Q",
+            y="count:Q",
         )
         .properties(height=300)
     )
     st.altair_chart(chart, use_container_width=True)
 
     # High risk table
-    st.subheader("High-Risk Orders (> 0.8)")
+    st.subheader(f"High-Risk Orders (> {HIGH_RISK})")
+    high_risk = logs[logs["risk"] > HIGH_RISK]
     if high_risk.empty:
-        st.info("No high-risk orders in the last batch.")
+        st.info("No high-risk orders in the current window.")
     else:
         st.dataframe(
-            high_risk[
+            high_risk.tail(TABLE_ROWS).iloc[::-1][
                 [
                     "timestamp",
                     "order_id",
@@ -111,7 +209,7 @@ def main():
 
     # All logs table
     st.subheader("Recent Predictions")
-    st.dataframe(logs)
+    st.dataframe(logs.tail(TABLE_ROWS).iloc[::-1])
 
 
 if __name__ == "__main__":
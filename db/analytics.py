@@ -0,0 +1,386 @@
+import argparse
+import json
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from itertools import groupby
+from pathlib import Path
+
+from app.config import settings
+
+# Analytics mirror.
+#
+# Predictions and alerts are copied out of SQLite into Parquet under
+# ANALYTICS_DIR by one background sync (in the process that owns retention),
+# and the heavy stats queries run over those files with an in-memory DuckDB.
+# Long analytical scans then never share the SQLite file with prediction
+# inserts, and read only the columns and date partitions they need.
+#
+#   predictions/date=YYYY-MM-DD/part-<first id>-<last id>.parquet
+#   alerts/part-<first sync>-<last sync>.parquet   resolved alerts
+#   alerts/tail-<sync>.parquet                     alerts not resolved yet
+#   state.json                                     committed watermarks
+#
+# Predictions never change, so each sync appends the rows above the
+# predictions id watermark. Alerts change until they are resolved: a sync
+# re-reads the unresolved ones from the previous tail plus every alert above
+# the alerts id watermark, appends the now-resolved rows as a part and writes
+# the rest as a new tail.
+#
+# state.json is replaced atomically after a sync's files are on disk and is
+# the only thing readers trust: parts past its watermarks are ignored, and so
+# is any part whose range another part covers (left behind by a compaction or
+# a crashed sync), so files are always added before they are removed.
+
+DB_PATH = "sla_logs.db"
+
+PREDICTION_TYPES = {
+    "id": "int", "order_id": "text", "timestamp": "text", "miss_sla_proba": "real",
+    "will_miss_sla": "int", "alert_sent": "int", "distance": "real", "items": "int",
+    "hub_load": "real", "traffic": "real", "weather": "int", "priority": "int",
+    "carrier": "int", "age_min": "real", "promise_delta_min": "real",
+}
+
+ALERT_TYPES = {
+    "id": "int", "order_id": "text", "miss_sla_proba": "real", "threshold": "real",
+    "triggered_at": "text", "status": "text", "severity": "text",
+    "acknowledged_at": "text", "resolved_at": "text", "resolution_notes": "text",
+    "actual_sla_missed": "int",
+}
+
+_ARROW_TYPES = {"int": "int64", "real": "float64", "text": "string"}
+_DUCKDB_TYPES = {"int": "BIGINT", "real": "DOUBLE", "text": "VARCHAR"}
+
+_EMPTY_STATE = {"predictions": 0, "alerts": 0, "alerts_sync": 0}
+
+_scheduler_thread = None
+_stop_event = threading.Event()
+_sync_lock = threading.Lock()
+
+_duckdb = None
+_duckdb_missing = False
+_duckdb_lock = threading.Lock()
+
+
+def _root() -> Path:
+    return Path(settings.ANALYTICS_DIR)
+
+
+# ------------------------------
+# FILES
+# ------------------------------
+
+def read_state() -> dict | None:
+    """Committed watermarks, or None before the first sync."""
+    try:
+        return json.loads((_root() / "state.json").read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_state(state: dict) -> None:
+    path = _root() / "state.json"
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(state))
+    tmp.replace(path)
+
+
+def _table(rows, types: dict):
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) if rows else [()] * len(types)
+    return pa.table({
+        name: pa.array(values, type=_ARROW_TYPES[kind])
+        for (name, kind), values in zip(types.items(), columns)
+    })
+
+
+def _write(path: Path, table) -> None:
+    import pyarrow.parquet as pq
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    tmp.replace(path)
+
+
+def _part_range(path: Path) -> tuple[int, int]:
+    lo, hi = path.stem.split("-")[1:]
+    return int(lo), int(hi)
+
+
+def _live_parts(directory: Path, mark: int) -> list[Path]:
+    """Committed parts in `directory`, minus any whose range another covers."""
+    parts = [
+        (lo, hi, p) for p in directory.glob("part-*.parquet")
+        for lo, hi in [_part_range(p)] if hi <= mark
+    ]
+    # Widest range first, so a covered part always meets its cover first
+    parts.sort(key=lambda part: (part[0], -part[1]))
+    live, covered_to = [], 0
+    for lo, hi, path in parts:
+        if hi > covered_to:
+            live.append(path)
+            covered_to = hi
+    return live
+
+
+def _compact(directory: Path, mark: int, force: bool = False) -> None:
+    """Merge a directory's committed parts into one once there are enough."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    everything = list(directory.glob("part-*.parquet"))
+    live = _live_parts(directory, mark)
+    if len(live) > 1 and (force or len(live) >= settings.ANALYTICS_COMPACT_FILES):
+        merged = pa.concat_tables([pq.read_table(p) for p in live])
+        lo, hi = _part_range(live[0])[0], _part_range(live[-1])[1]
+        _write(directory / f"part-{lo}-{hi}.parquet", merged)
+        live = [directory / f"part-{lo}-{hi}.parquet"]
+    # Whatever is covered is no longer read; readers that listed it before
+    # the merge retry on a missing file
+    for path in everything:
+        if path not in live and _part_range(path)[1] <= mark:
+            path.unlink(missing_ok=True)
+
+
+# ------------------------------
+# SYNC
+# ------------------------------
+
+def _sync_predictions(conn, state: dict, batch_size: int) -> int:
+    rows = conn.execute(
+        f"""
+        SELECT {', '.join(PREDICTION_TYPES)} FROM predictions
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (state["predictions"], batch_size),
+    ).fetchall()
+    if not rows:
+        return 0
+
+    by_day = sorted(rows, key=lambda r: ((r[2] or "")[:10], r[0]))
+    for day, group in groupby(by_day, key=lambda r: (r[2] or "")[:10]):
+        group = list(group)
+        part_dir = _root() / "predictions" / f"date={day or 'unknown'}"
+        _write(part_dir / f"part-{group[0][0]}-{group[-1][0]}.parquet", _table(group, PREDICTION_TYPES))
+    state["predictions"] = rows[-1][0]
+    return len(rows)
+
+
+def _sync_alerts(conn, state: dict) -> int:
+    import pyarrow.parquet as pq
+
+    alerts_dir = _root() / "alerts"
+    sync = state["alerts_sync"]
+    tail = alerts_dir / f"tail-{sync}.parquet"
+    previous = [tuple(r.values()) for r in pq.read_table(tail).to_pylist()] if tail.exists() else []
+    pending = [r[0] for r in previous]
+
+    rows = conn.execute(
+        f"""
+        SELECT {', '.join(ALERT_TYPES)} FROM alerts
+        WHERE id > ? OR id IN (SELECT value FROM json_each(?))
+        ORDER BY id
+        """,
+        (state["alerts"], json.dumps(pending)),
+    ).fetchall()
+    if rows == previous:
+        return 0
+
+    resolved = [r for r in rows if r[5] == "resolved"]
+    if resolved:
+        _write(alerts_dir / f"part-{sync + 1}-{sync + 1}.parquet", _table(resolved, ALERT_TYPES))
+    _write(
+        alerts_dir / f"tail-{sync + 1}.parquet",
+        _table([r for r in rows if r[5] != "resolved"], ALERT_TYPES),
+    )
+    state["alerts_sync"] = sync + 1
+    if rows:
+        state["alerts"] = max(state["alerts"], rows[-1][0])
+    return len(rows)
+
+
+def sync_analytics(batch_size: int | None = None) -> dict:
+    """
+    Copy predictions and alerts changed since the last sync into the mirror,
+    committing the watermarks after each batch. Returns the rows copied.
+    """
+    batch_size = batch_size or settings.ANALYTICS_SYNC_BATCH_SIZE
+    with _sync_lock:
+        _root().mkdir(parents=True, exist_ok=True)
+        state = {**_EMPTY_STATE, **(read_state() or {})}
+        copied = {"predictions": 0, "alerts": 0}
+
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            while True:
+                moved = _sync_predictions(conn, state, batch_size)
+                copied["predictions"] += moved
+                if moved:
+                    _write_state(state)
+                if moved < batch_size:
+                    break
+
+            copied["alerts"] = _sync_alerts(conn, state)
+            if copied["alerts"]:
+                _write_state(state)
+        finally:
+            conn.close()
+
+        current_tail = f"tail-{state['alerts_sync']}.parquet"
+        for tail in (_root() / "alerts").glob("tail-*.parquet"):
+            if tail.name != current_tail:
+                tail.unlink(missing_ok=True)
+        # Past days get no new rows, so each is merged down to one file
+        today = f"date={datetime.now().date().isoformat()}"
+        for part_dir in (_root() / "predictions").glob("date=*"):
+            _compact(part_dir, state["predictions"], force=part_dir.name < today)
+        _compact(_root() / "alerts", state["alerts_sync"])
+        return copied
+
+
+def rebuild_analytics() -> dict:
+    """Drop the mirror and copy everything again from SQLite."""
+    with _sync_lock:
+        shutil.rmtree(_root(), ignore_errors=True)
+    copied = sync_analytics()
+    with _sync_lock:
+        state = read_state()
+        for part_dir in (_root() / "predictions").glob("date=*"):
+            _compact(part_dir, state["predictions"], force=True)
+    return copied
+
+
+# ------------------------------
+# QUERIES
+# ------------------------------
+
+def _relation(files: list[Path], types: dict) -> str:
+    if not files:
+        columns = ", ".join(f"CAST(NULL AS {_DUCKDB_TYPES[kind]}) AS {name}" for name, kind in types.items())
+        return f"SELECT {columns} WHERE false"
+    paths = ", ".join("'" + str(f).replace("'", "''") + "'" for f in files)
+    return f"SELECT * FROM read_parquet([{paths}], union_by_name = true)"
+
+
+def _prediction_files(state: dict, since: str | None, last_days: int | None) -> list[Path]:
+    part_dirs = sorted((_root() / "predictions").glob("date=*"))
+    if since:
+        part_dirs = [d for d in part_dirs if d.name.split("=", 1)[1] >= since[:10]]
+    if last_days:
+        # One partition per day, so the newest N hold the newest N days
+        part_dirs = [d for d in part_dirs if d.name != "date=unknown"][-last_days:]
+    files = []
+    for part_dir in part_dirs:
+        files.extend(_live_parts(part_dir, state["predictions"]))
+    return files
+
+
+def _alert_files(state: dict) -> list[Path]:
+    alerts_dir = _root() / "alerts"
+    files = _live_parts(alerts_dir, state["alerts_sync"])
+    tail = alerts_dir / f"tail-{state['alerts_sync']}.parquet"
+    return files + [tail] if tail.exists() else files
+
+
+def _connection():
+    """The shared in-memory DuckDB, or None when the mirror cannot be used."""
+    global _duckdb, _duckdb_missing
+
+    if not settings.ANALYTICS_MIRROR or _duckdb_missing:
+        return None
+    with _duckdb_lock:
+        if _duckdb is None:
+            try:
+                import duckdb
+            except ImportError:
+                print("[ANALYTICS] duckdb is not installed; stats read SQLite")
+                _duckdb_missing = True
+                return None
+            _duckdb = duckdb.connect()
+            _duckdb.execute(f"SET threads TO {int(settings.ANALYTICS_THREADS)}")
+        return _duckdb
+
+
+def query(sql: str, params=(), since: str | None = None, last_days: int | None = None) -> list[dict] | None:
+    """
+    Run `sql` against the mirror's `predictions` and `alerts` as dict rows.
+
+    `since` (a timestamp or date) skips prediction partitions before that
+    day; `last_days` keeps only the newest N days. Returns None when the
+    mirror is disabled or has not synced yet, so callers fall back to SQLite.
+    """
+    duck = _connection()
+    if duck is None:
+        return None
+    import duckdb
+
+    for attempt in range(2):
+        state = read_state()
+        if state is None:
+            return None
+        relations = (
+            f"WITH predictions AS ({_relation(_prediction_files(state, since, last_days), PREDICTION_TYPES)}), "
+            f"alerts AS ({_relation(_alert_files(state), ALERT_TYPES)}) "
+        )
+        cursor = duck.cursor()
+        try:
+            result = cursor.execute(relations + sql, list(params))
+            columns = [d[0] for d in result.description]
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+        except duckdb.IOException:
+            # A compaction removed a file between the listing and the read
+            if attempt:
+                raise
+        finally:
+            cursor.close()
+
+
+# ------------------------------
+# SCHEDULER
+# ------------------------------
+
+def _scheduler_loop(interval_sec: float) -> None:
+    while not _stop_event.wait(interval_sec):
+        try:
+            sync_analytics()
+        except Exception as e:
+            # Never let a failed sync kill the scheduler
+            print(f"[ERROR] Analytics sync failed: {type(e).__name__}: {e}")
+
+
+def start_analytics_sync() -> None:
+    """Start the background mirror sync (no-op when disabled or running)."""
+    global _scheduler_thread
+
+    if not settings.ANALYTICS_MIRROR or settings.ANALYTICS_SYNC_INTERVAL_SEC <= 0:
+        return
+    if _scheduler_thread is not None and _scheduler_thread.is_alive():
+        return
+
+    _stop_event.clear()
+    _scheduler_thread = threading.Thread(
+        target=_scheduler_loop,
+        args=(settings.ANALYTICS_SYNC_INTERVAL_SEC,),
+        name="analytics-sync",
+        daemon=True,
+    )
+    _scheduler_thread.start()
+    print(f"[ANALYTICS] Mirroring into {_root()} every {settings.ANALYTICS_SYNC_INTERVAL_SEC:g}s")
+
+
+def stop_analytics_sync() -> None:
+    _stop_event.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the Parquet analytics mirror from SQLite")
+    parser.add_argument("--rebuild", action="store_true", help="drop the mirror and copy everything again")
+    args = parser.parse_args()
+
+    copied = rebuild_analytics() if args.rebuild else sync_analytics()
+    print(f"Copied {copied['predictions']} predictions and {copied['alerts']} alerts into {_root()}")
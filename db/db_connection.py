@@ -1,19 +1,30 @@
 import sqlite3
 from datetime import datetime 
 
+from app.features import build_feature_vector, encode_categoricals
+from db.writer import submit
+
 DB_PATH = "sla_logs.db"
 
-def log_prediction(order,proba: float,will_miss: bool):
-    conn=sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+INSERT_PREDICTION_SQL = """
+    INSERT INTO predictions (
+        order_id, timestamp, miss_sla_proba, will_miss_sla,
+        distance, items, hub_load, traffic, weather, priority, carrier,
+        age_min, promise_delta_min
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-    cursor.execute("""
-        INSERT INTO predictions (
-            order_id, timestamp, miss_sla_proba, will_miss_sla,
-            distance, items, hub_load, traffic, weather, priority, carrier
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+def prediction_row(order, proba: float, will_miss: bool, x=None):
+    """
+    Insert parameters for one prediction, timestamped at call time.
+    `x` is the feature vector the order was scored with; its time features
+    (age_min, promise_delta_min) are stored for training.
+    """
+    weather, priority, carrier = encode_categoricals(order)
+    if x is None:
+        x = build_feature_vector(order)
+    return (
         order.order_id,
         datetime.now().isoformat(),
         float(proba),
@@ -22,23 +33,67 @@ def log_prediction(order,proba: float,will_miss: bool):
         order.items_count,
         order.hub_load,
         order.traffic_index,
-        order.weather_code,
-        order.priority,
-        order.carrier
-    ))
+        weather,
+        priority,
+        carrier,
+        float(x[0]),
+        float(x[1]),
+    )
 
-    conn.commit()
-    conn.close()
+def insert_predictions(rows):
+    """Insert many prediction rows (from `prediction_row`) in one transaction."""
+    conn=sqlite3.connect(DB_PATH)
+    try:
+        conn.executemany(INSERT_PREDICTION_SQL, rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+def log_predictions(rows):
+    """Log prediction rows, through the single DB writer when one is running."""
+    submit("predictions", rows)
+
+def log_prediction(order,proba: float,will_miss: bool):
+    log_predictions([prediction_row(order, proba, will_miss)])
+
+def write_health_probe():
+    """Touch the single health_probe row; the round-trip time is the measurement."""
+    now = datetime.now().isoformat()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute(
+            """
+            INSERT INTO health_probe (id, checked_at) VALUES (1, ?)
+            ON CONFLICT(id) DO UPDATE SET checked_at = excluded.checked_at
+            """,
+            (now,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return now
+
+# Keys of the rows fetch_logs returns (the /logs response fields)
+LOG_COLUMNS = [
+    "order_id", "timestamp", "miss_sla_proba", "will_miss_sla",
+    "distance", "items", "hub_load", "traffic",
+    "weather", "priority", "carrier",
+]
 
 def fetch_logs(limit=50):
     conn=sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
+    # Categoricals are stored as codes; join the lookup tables for display
     cursor.execute("""
-         SELECT order_id, timestamp, miss_sla_proba, will_miss_sla,
-               distance, items, hub_load, traffic, weather, priority, carrier
-        FROM predictions
-        ORDER BY id DESC
+        SELECT p.order_id, p.timestamp, p.miss_sla_proba, p.will_miss_sla,
+               p.distance, p.items, p.hub_load, p.traffic,
+               w.name, pr.name, c.name
+        FROM predictions p
+        LEFT JOIN weather_codes w ON w.code = p.weather
+        LEFT JOIN priority_codes pr ON pr.code = p.priority
+        LEFT JOIN carrier_codes c ON c.code = p.carrier
+        ORDER BY p.id DESC
         LIMIT ?
     """, (limit,))
 
@@ -1,8 +1,121 @@
 import sqlite3
 
+from app.features import (
+    WEATHER_MAP, PRIORITY_MAP, CARRIER_MAP,
+    UNKNOWN_CODE, UNKNOWN_NAME,
+)
+from db.kpis import create_alert_kpis
+from db.response_times import create_response_time_sketches
 
 DB_PATH = "sla_logs.db"
 
+# weather / priority / carrier hold the integer codes from app.features;
+# display names live in the *_codes lookup tables.
+PREDICTIONS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id TEXT,
+        timestamp TEXT,
+        miss_sla_proba REAL,
+        will_miss_sla INTEGER,
+        alert_sent INTEGER DEFAULT 0,
+        distance REAL,
+        items INTEGER,
+        hub_load REAL,
+        traffic REAL,
+        weather INTEGER,
+        priority INTEGER,
+        carrier INTEGER,
+        age_min REAL,
+        promise_delta_min REAL
+    )
+"""
+
+
+def _migrate_categorical_codes(conn):
+    """
+    Rebuild a pre-encoding `predictions` table (TEXT categoricals) into the
+    integer-coded layout. SQLite cannot change a column's type in place, so
+    rows are copied into a fresh table in one transaction and the old one
+    is swapped out. Strings outside the maps get UNKNOWN_CODE.
+    """
+    columns = {r[1]: r[2] for r in conn.execute("PRAGMA table_info(predictions)")}
+    if columns.get("weather", "").upper() != "TEXT":
+        return
+
+    print("Migrating predictions categoricals to integer codes...")
+    conn.commit()
+    conn.executescript(
+        f"""
+        BEGIN;
+        DROP TABLE IF EXISTS predictions_encoded;
+        {PREDICTIONS_SCHEMA.format(table="predictions_encoded")};
+        INSERT INTO predictions_encoded (
+            id, order_id, timestamp, miss_sla_proba, will_miss_sla, alert_sent,
+            distance, items, hub_load, traffic, weather, priority, carrier
+        )
+        SELECT
+            p.id, p.order_id, p.timestamp, p.miss_sla_proba, p.will_miss_sla, p.alert_sent,
+            p.distance, p.items, p.hub_load, p.traffic,
+            COALESCE((SELECT code FROM weather_codes WHERE name = UPPER(p.weather)), {UNKNOWN_CODE}),
+            COALESCE((SELECT code FROM priority_codes WHERE name = UPPER(p.priority)), {UNKNOWN_CODE}),
+            COALESCE((SELECT code FROM carrier_codes WHERE name = UPPER(p.carrier)), {UNKNOWN_CODE})
+        FROM predictions p;
+        DROP TABLE predictions;
+        ALTER TABLE predictions_encoded RENAME TO predictions;
+        COMMIT;
+        """
+    )
+
+
+def _create_alert_notes_fts(conn):
+    """
+    Full-text index over alerts.resolution_notes (FTS5, external content),
+    kept in sync by triggers. Built from existing rows the first time.
+    Skipped with a warning when SQLite was compiled without FTS5; alert
+    search then falls back to LIKE.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alerts_fts'"
+    ).fetchone()
+    try:
+        conn.executescript(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS alerts_fts USING fts5(
+                resolution_notes, content='alerts', content_rowid='id'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS alerts_fts_insert AFTER INSERT ON alerts
+            WHEN new.resolution_notes IS NOT NULL
+            BEGIN
+                INSERT INTO alerts_fts(rowid, resolution_notes)
+                VALUES (new.id, new.resolution_notes);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS alerts_fts_delete AFTER DELETE ON alerts
+            WHEN old.resolution_notes IS NOT NULL
+            BEGIN
+                INSERT INTO alerts_fts(alerts_fts, rowid, resolution_notes)
+                VALUES ('delete', old.id, old.resolution_notes);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS alerts_fts_update AFTER UPDATE OF resolution_notes ON alerts
+            BEGIN
+                INSERT INTO alerts_fts(alerts_fts, rowid, resolution_notes)
+                SELECT 'delete', old.id, old.resolution_notes
+                WHERE old.resolution_notes IS NOT NULL;
+                INSERT INTO alerts_fts(rowid, resolution_notes)
+                SELECT new.id, new.resolution_notes
+                WHERE new.resolution_notes IS NOT NULL;
+            END;
+            """
+        )
+    except sqlite3.OperationalError as e:
+        print(f"[WARN] Alert notes full-text index not available: {e}")
+        return
+    if not exists:
+        conn.execute("INSERT INTO alerts_fts(alerts_fts) VALUES ('rebuild')")
+
 
 def init_db():
     """
@@ -14,26 +127,29 @@ def init_db():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
-    # Predictions table (used by logging + potential alert engine)
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS predictions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id TEXT,
-            timestamp TEXT,
-            miss_sla_proba REAL,
-            will_miss_sla INTEGER,
-            alert_sent INTEGER DEFAULT 0,
-            distance REAL,
-            items INTEGER,
-            hub_load REAL,
-            traffic REAL,
-            weather TEXT,
-            priority TEXT,
-            carrier TEXT
+    # Incremental auto-vacuum lets the retention job hand pages freed by
+    # archiving back to the disk without a full VACUUM. The mode only takes
+    # effect on a fresh file or after one VACUUM, so convert older DBs once.
+    if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute("VACUUM")
+
+    # Lookup tables for the dictionary-encoded categorical columns
+    for table, mapping in (
+        ("weather_codes", WEATHER_MAP),
+        ("priority_codes", PRIORITY_MAP),
+        ("carrier_codes", CARRIER_MAP),
+    ):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (code INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)"
         )
-        """
-    )
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {table} (code, name) VALUES (?, ?)",
+            [(code, name) for name, code in mapping.items()] + [(UNKNOWN_CODE, UNKNOWN_NAME)],
+        )
+
+    # Predictions table (used by logging + potential alert engine)
+    cursor.execute(PREDICTIONS_SCHEMA.format(table="predictions"))
 
     # Backfill `alert_sent` for older DBs that don't have the column yet
     try:
@@ -44,6 +160,20 @@ def init_db():
         # Column already exists – safe to ignore
         pass
 
+    _migrate_categorical_codes(conn)
+
+    # Time features at scoring, so logged rows can be used as training data
+    for column in ("age_min", "promise_delta_min"):
+        try:
+            cursor.execute(f"ALTER TABLE predictions ADD COLUMN {column} REAL")
+        except sqlite3.OperationalError:
+            pass
+
+    # Retention selects rows by age, so keep the timestamp scan indexed
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions(timestamp)"
+    )
+
     # Settings table (single source of truth for threshold + email config)
     cursor.execute(
         """
@@ -117,6 +247,30 @@ def init_db():
     except sqlite3.OperationalError:
         pass
 
+    # Training joins labeled alerts back to their prediction rows
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_order_id ON alerts(order_id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_predictions_order_id ON predictions(order_id)"
+    )
+
+    # Alert search: newest-first pages, alone or under a status or severity
+    # filter (order_id prefixes use idx_alerts_order_id). Probability ranges
+    # deliberately have no index: walking triggered_at newest-first and
+    # filtering fills a page sooner than sorting every row in the range.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_triggered ON alerts(triggered_at)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_alerts_status_triggered ON alerts(status, triggered_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_alerts_severity_triggered ON alerts(severity, triggered_at)"
+    )
+    _create_alert_notes_fts(conn)
+
+    # /stats/ops counters, maintained by triggers on alerts
+    create_alert_kpis(conn)
+    # Hourly time-to-ack / time-to-resolve sketches behind /stats/response-times
+    create_response_time_sketches(conn)
+
     # Alert actions table (for logging automation actions)
     cursor.execute(
         """
@@ -131,6 +285,76 @@ def init_db():
         """
     )
 
+    # Shadow scoring: candidate models and their probabilities on live traffic
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shadow_models (
+            id INTEGER PRIMARY KEY,
+            label TEXT UNIQUE NOT NULL,
+            path TEXT
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shadow_predictions (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            model_id INTEGER NOT NULL,
+            order_id TEXT,
+            prod_proba REAL NOT NULL,
+            shadow_proba REAL NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_shadow_model_ts ON shadow_predictions(model_id, ts)"
+    )
+
+    # Open-order registry: orders before promised_at and not yet delivered,
+    # re-scored periodically. Times are epoch minutes, categoricals are codes.
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS open_orders (
+            order_id TEXT PRIMARY KEY,
+            created_min REAL NOT NULL,
+            promised_min REAL NOT NULL,
+            distance REAL,
+            items REAL,
+            hub_load REAL,
+            traffic REAL,
+            weather INTEGER,
+            priority INTEGER,
+            carrier INTEGER,
+            last_proba REAL,
+            alerted INTEGER DEFAULT 0,
+            payload TEXT NOT NULL,
+            cross_min REAL
+        )
+        """
+    )
+    try:
+        cursor.execute("ALTER TABLE open_orders ADD COLUMN cross_min REAL")
+    except sqlite3.OperationalError:
+        pass
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_open_orders_promised ON open_orders(promised_min)"
+    )
+    # Timer queue: earliest planned threshold crossing first
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_open_orders_cross ON open_orders(alerted, cross_min)"
+    )
+
+    # One row touched by /health?deep=1 to time a write round-trip
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS health_probe (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            checked_at TEXT
+        )
+        """
+    )
+
     # Users table for auth
     cursor.execute(
         """
@@ -0,0 +1,133 @@
+import argparse
+import sqlite3
+
+DB_PATH = "sla_logs.db"
+
+# Running totals behind /stats/ops, kept in one row by triggers on alerts so
+# the endpoint never scans the table. Each trigger removes the old row's
+# contribution and adds the new one's; `IS` comparisons keep NULLs out of
+# the sums. `responded` counts the rows whose response time is defined,
+# matching what AVG over the difference would average.
+_CONTRIBUTION = """
+    total = total + {sign} 1,
+    resolved = resolved + {sign} ({row}.status IS 'resolved'),
+    false_positives = false_positives
+        + {sign} ({row}.status IS 'resolved' AND {row}.actual_sla_missed IS 0),
+    responded = responded + {sign} (
+        (strftime('%s', {row}.resolved_at) - strftime('%s', {row}.triggered_at)) IS NOT NULL
+    ),
+    response_sec_sum = response_sec_sum + {sign} COALESCE(
+        strftime('%s', {row}.resolved_at) - strftime('%s', {row}.triggered_at), 0
+    )
+"""
+
+KPI_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS alert_kpis (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total INTEGER NOT NULL DEFAULT 0,
+        resolved INTEGER NOT NULL DEFAULT 0,
+        false_positives INTEGER NOT NULL DEFAULT 0,
+        responded INTEGER NOT NULL DEFAULT 0,
+        response_sec_sum INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TRIGGER IF NOT EXISTS alert_kpis_insert AFTER INSERT ON alerts
+    BEGIN
+        UPDATE alert_kpis SET {_CONTRIBUTION.format(sign="+", row="new")} WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS alert_kpis_delete AFTER DELETE ON alerts
+    BEGIN
+        UPDATE alert_kpis SET {_CONTRIBUTION.format(sign="-", row="old")} WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS alert_kpis_update
+    AFTER UPDATE OF status, triggered_at, resolved_at, actual_sla_missed ON alerts
+    BEGIN
+        UPDATE alert_kpis SET {_CONTRIBUTION.format(sign="-", row="old")} WHERE id = 1;
+        UPDATE alert_kpis SET {_CONTRIBUTION.format(sign="+", row="new")} WHERE id = 1;
+    END;
+"""
+
+_RECOUNT_SQL = """
+    SELECT
+        COUNT(*),
+        COALESCE(SUM(status IS 'resolved'), 0),
+        COALESCE(SUM(status IS 'resolved' AND actual_sla_missed IS 0), 0),
+        COUNT(strftime('%s', resolved_at) - strftime('%s', triggered_at)),
+        COALESCE(SUM(strftime('%s', resolved_at) - strftime('%s', triggered_at)), 0)
+    FROM alerts
+"""
+
+KPI_COLUMNS = ["total", "resolved", "false_positives", "responded", "response_sec_sum"]
+
+
+def create_alert_kpis(conn) -> None:
+    """Counters table and its triggers; filled from existing alerts the first time."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alert_kpis'"
+    ).fetchone()
+    conn.executescript(KPI_SCHEMA)
+    if not exists:
+        rebuild_alert_kpis(conn)
+
+
+def rebuild_alert_kpis(conn) -> dict:
+    """
+    Recount every counter from the alerts table (one full scan), replacing
+    the stored row. The write lock is held throughout, so no alert change
+    can land between the count and the replace.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        counts = conn.execute(_RECOUNT_SQL).fetchone()
+        conn.execute(
+            f"""
+            INSERT OR REPLACE INTO alert_kpis (id, {', '.join(KPI_COLUMNS)})
+            VALUES (1, ?, ?, ?, ?, ?)
+            """,
+            counts,
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return dict(zip(KPI_COLUMNS, counts))
+
+
+def read_alert_kpis(conn) -> dict:
+    """The counters row (all zeros before init_db has created it)."""
+    try:
+        row = conn.execute(
+            f"SELECT {', '.join(KPI_COLUMNS)} FROM alert_kpis WHERE id = 1"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    return dict(zip(KPI_COLUMNS, row or (0,) * len(KPI_COLUMNS)))
+
+
+def check_alert_kpis(conn) -> dict:
+    """Stored vs recounted values for every counter that has drifted."""
+    stored = read_alert_kpis(conn)
+    actual = dict(zip(KPI_COLUMNS, conn.execute(_RECOUNT_SQL).fetchone()))
+    return {
+        name: {"stored": stored[name], "actual": actual[name]}
+        for name in KPI_COLUMNS
+        if stored[name] != actual[name]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert KPI counters behind /stats/ops")
+    parser.add_argument("--check", action="store_true", help="report drift without rewriting")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if args.check:
+            drift = check_alert_kpis(conn)
+            print(drift or "Counters match the alerts table")
+        else:
+            print(f"Rebuilt alert KPI counters: {rebuild_alert_kpis(conn)}")
+    finally:
+        conn.close()
@@ -0,0 +1,174 @@
+import argparse
+import json
+import sqlite3
+from collections import defaultdict
+
+from app.sketch import DDSketch
+
+DB_PATH = "sla_logs.db"
+
+# Relative accuracy of every stored sketch; sketches only merge with equal
+# accuracy, so changing this needs `python -m db.response_times` to rebuild
+RELATIVE_ACCURACY = 0.01
+
+# metric -> alerts column holding the time it happened
+METRICS = {"ack": "acknowledged_at", "resolve": "resolved_at"}
+
+# One DDSketch of response seconds (from triggered_at) per metric, hour of
+# the ack/resolve and severity. A window's percentiles merge the rows it
+# covers instead of sorting alerts.
+SKETCH_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS response_time_sketches (
+        metric TEXT NOT NULL,
+        hour TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        sketch BLOB NOT NULL,
+        PRIMARY KEY (metric, hour, severity)
+    ) WITHOUT ROWID
+"""
+
+
+def create_response_time_sketches(conn) -> None:
+    """Sketch table; filled from existing alerts the first time."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'response_time_sketches'"
+    ).fetchone()
+    conn.executescript(SKETCH_SCHEMA)
+    if not exists:
+        rebuild_response_times(conn)
+
+
+def _latency_rows(conn, metric: str, where: str, params=()):
+    """(hour, severity, seconds) for alerts with the metric's timestamp set."""
+    column = METRICS[metric]
+    return conn.execute(
+        f"""
+        SELECT strftime('%Y-%m-%d %H:00:00', {column}),
+               COALESCE(severity, 'unknown'),
+               MAX(strftime('%s', {column}) - strftime('%s', triggered_at), 0)
+        FROM alerts
+        WHERE {column} IS NOT NULL AND triggered_at IS NOT NULL AND {where}
+        """,
+        params,
+    ).fetchall()
+
+
+def _grouped(rows) -> dict:
+    groups = defaultdict(list)
+    for hour, severity, seconds in rows:
+        if hour is not None and seconds is not None:
+            groups[(hour, severity)].append(seconds)
+    return groups
+
+
+def record_response_times(conn, metric: str, alert_ids: list[int]) -> None:
+    """
+    Add the response times of just-acknowledged or just-resolved alerts to
+    their hourly sketches. Runs on the caller's connection, so it commits
+    (or rolls back) together with the status change.
+    """
+    if not alert_ids:
+        return
+    rows = _latency_rows(conn, metric, "id IN (SELECT value FROM json_each(?))", (json.dumps(alert_ids),))
+    for (hour, severity), values in _grouped(rows).items():
+        stored = conn.execute(
+            "SELECT sketch FROM response_time_sketches WHERE metric = ? AND hour = ? AND severity = ?",
+            (metric, hour, severity),
+        ).fetchone()
+        sketch = DDSketch.from_bytes(stored[0]) if stored else DDSketch(RELATIVE_ACCURACY)
+        for value in values:
+            sketch.add(value)
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO response_time_sketches (metric, hour, severity, count, sketch)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (metric, hour, severity, sketch.count, sketch.to_bytes()),
+        )
+
+
+def rebuild_response_times(conn) -> int:
+    """Recompute every sketch from the alerts table; returns the rows written."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM response_time_sketches")
+        written = 0
+        for metric in METRICS:
+            for (hour, severity), values in _grouped(_latency_rows(conn, metric, "1")).items():
+                sketch = DDSketch(RELATIVE_ACCURACY)
+                for value in values:
+                    sketch.add(value)
+                conn.execute(
+                    """
+                    INSERT INTO response_time_sketches (metric, hour, severity, count, sketch)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (metric, hour, severity, sketch.count, sketch.to_bytes()),
+                )
+                written += 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return written
+
+
+def response_time_quantiles(
+    conn,
+    start: str,
+    end: str | None = None,
+    severity: list[str] | None = None,
+    quantiles=(0.5, 0.9, 0.99),
+) -> dict:
+    """
+    Percentiles (seconds) of time-to-ack and time-to-resolve for acks and
+    resolves in the hours [start, end], overall and per severity, merged
+    from the stored sketches.
+    """
+    clauses, params = ["hour >= ?"], [start]
+    if end:
+        clauses.append("hour <= ?")
+        params.append(end)
+    if severity:
+        clauses.append(f"severity IN ({', '.join('?' * len(severity))})")
+        params.extend(severity)
+    rows = conn.execute(
+        f"""
+        SELECT metric, severity, sketch FROM response_time_sketches
+        WHERE {' AND '.join(clauses)}
+        """,
+        params,
+    ).fetchall()
+
+    merged = {metric: {"overall": DDSketch(RELATIVE_ACCURACY)} for metric in METRICS}
+    for metric, sev, blob in rows:
+        sketch = DDSketch.from_bytes(blob)
+        merged[metric]["overall"].merge(sketch)
+        merged[metric].setdefault(sev, DDSketch(RELATIVE_ACCURACY)).merge(sketch)
+
+    def summary(sketch):
+        result = {"count": sketch.count}
+        for q in quantiles:
+            value = sketch.quantile(q)
+            result[f"p{round(q * 100):g}"] = round(value, 1) if value is not None else None
+        return result
+
+    return {
+        metric: {
+            "overall": summary(sketches.pop("overall")),
+            "by_severity": {sev: summary(s) for sev, s in sorted(sketches.items())},
+        }
+        for metric, sketches in merged.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the response-time sketches from alerts")
+    parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        print(f"Rebuilt {rebuild_response_times(conn)} response-time sketches")
+    finally:
+        conn.close()
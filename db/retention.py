@@ -0,0 +1,272 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.config import settings
+from app.features import WEATHER_NAMES, PRIORITY_NAMES, CARRIER_NAMES
+
+# pandas is imported where it is used: the API imports this module at
+# startup but only needs pandas for archive runs and exports
+if TYPE_CHECKING:
+    import pandas as pd
+
+DB_PATH = "sla_logs.db"
+
+PREDICTION_COLUMNS = [
+    "id", "order_id", "timestamp", "miss_sla_proba", "will_miss_sla", "alert_sent",
+    "distance", "items", "hub_load", "traffic", "weather", "priority", "carrier",
+    "age_min", "promise_delta_min",
+]
+
+CATEGORY_NAMES = {
+    "weather": WEATHER_NAMES,
+    "priority": PRIORITY_NAMES,
+    "carrier": CARRIER_NAMES,
+}
+
+# Rows per chunk of a streamed CSV export
+EXPORT_CHUNK_ROWS = 50_000
+
+_scheduler_thread = None
+_stop_event = threading.Event()
+
+
+def _archive_root() -> Path:
+    return Path(settings.ARCHIVE_DIR) / "predictions"
+
+
+def _write_partition(day: str, frame: "pd.DataFrame") -> Path:
+    """
+    Write one day's slice of a batch as a compressed Parquet file.
+
+    Files are named by the id range they hold, so re-running a batch that
+    was written but never deleted (e.g. crash between the two steps)
+    overwrites the same file instead of duplicating rows.
+    """
+    part_dir = _archive_root() / f"date={day}"
+    part_dir.mkdir(parents=True, exist_ok=True)
+    path = part_dir / f"part-{int(frame['id'].min())}-{int(frame['id'].max())}.parquet"
+    tmp = path.with_suffix(".parquet.tmp")
+    frame.to_parquet(tmp, compression="zstd", index=False)
+    tmp.replace(path)
+    return path
+
+
+def archive_batch(cutoff: str, batch_size: int) -> int:
+    """
+    Move one batch of predictions older than `cutoff` into the Parquet archive.
+    Returns the number of rows archived (0 when nothing is left to move).
+    """
+    import pandas as pd
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            f"""
+            SELECT {", ".join(PREDICTION_COLUMNS)}
+            FROM predictions
+            WHERE timestamp < ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (cutoff, batch_size),
+        ).fetchall()
+        if not rows:
+            return 0
+
+        frame = pd.DataFrame(rows, columns=PREDICTION_COLUMNS)
+        for day, part in frame.groupby(frame["timestamp"].str.slice(0, 10)):
+            _write_partition(day, part)
+
+        # Only delete once every partition of the batch is safely on disk
+        conn.executemany(
+            "DELETE FROM predictions WHERE id = ?",
+            [(r[0],) for r in rows],
+        )
+        conn.commit()
+        return len(rows)
+    finally:
+        conn.close()
+
+
+def incremental_vacuum(pages: int | None = None) -> None:
+    """Return free pages left behind by deletes to the filesystem."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if pages:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+        else:
+            conn.execute("PRAGMA incremental_vacuum")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_retention(max_age_days: int | None = None, batch_size: int | None = None) -> dict:
+    """
+    Archive every prediction older than `max_age_days`, batch by batch, then
+    reclaim the freed pages with an incremental vacuum.
+    """
+    max_age_days = settings.RETENTION_DAYS if max_age_days is None else max_age_days
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+
+    # Prediction timestamps are written with datetime.now().isoformat(),
+    # so the cutoff uses the same clock and format to compare as text.
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+
+    archived = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        archived += moved
+        if moved < batch_size:
+            break
+
+    if archived:
+        incremental_vacuum()
+
+    print(f"[RETENTION] Archived {archived} predictions older than {cutoff}")
+    return {"archived": archived, "cutoff": cutoff}
+
+
+def _end_of_range(end: str | None) -> str | None:
+    # A bare date as the upper bound means "through the end of that day"
+    if end and len(end) == 10:
+        return f"{end}T23:59:59.999999"
+    return end
+
+
+def archive_files(start: str | None, end: str | None) -> list[Path]:
+    root = _archive_root()
+    if not root.exists():
+        return []
+
+    files = []
+    for part_dir in sorted(root.glob("date=*")):
+        day = part_dir.name.split("=", 1)[1]
+        if start and day < start[:10]:
+            continue
+        if end and day > end[:10]:
+            continue
+        # part-<first id>-<last id>.parquet, in id order
+        files.extend(sorted(part_dir.glob("*.parquet"), key=lambda f: int(f.stem.split("-")[1])))
+    return files
+
+
+def _range_clauses(start: str | None, end: str | None) -> tuple[list[str], list[str]]:
+    clauses, params = [], []
+    if start:
+        clauses.append("timestamp >= ?")
+        params.append(start)
+    if end:
+        clauses.append("timestamp <= ?")
+        params.append(end)
+    return clauses, params
+
+
+def _csv_chunk(frame: "pd.DataFrame") -> str:
+    return decode_categoricals(frame.reindex(columns=PREDICTION_COLUMNS)).to_csv(index=False, header=False)
+
+
+def iter_export_csv(
+    start: str | None = None,
+    end: str | None = None,
+    include_archive: bool = True,
+    chunk_size: int = EXPORT_CHUNK_ROWS,
+):
+    """
+    CSV text of predictions in [start, end], one chunk at a time: the
+    Parquet archive first (when `include_archive` is set), one batch of a
+    date partition's file at a time, then the live table by id range.
+    Memory stays at one chunk however much history the range covers.
+    """
+    import pandas as pd
+
+    end = _end_of_range(end)
+    yield ",".join(PREDICTION_COLUMNS) + "\n"
+
+    if include_archive:
+        import pyarrow.parquet as pq
+
+        for path in archive_files(start, end):
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+                frame = batch.to_pandas()
+                if start:
+                    frame = frame[frame["timestamp"] >= start]
+                if end:
+                    frame = frame[frame["timestamp"] <= end]
+                if not frame.empty:
+                    yield _csv_chunk(frame)
+
+    clauses, params = _range_clauses(start, end)
+    clauses.append("id > ?")
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        after = 0
+        while True:
+            # Keyset pagination: each chunk is an index range scan on id
+            rows = conn.execute(
+                f"""
+                SELECT {", ".join(PREDICTION_COLUMNS)}
+                FROM predictions
+                WHERE {" AND ".join(clauses)}
+                ORDER BY id
+                LIMIT ?
+                """,
+                (*params, after, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield _csv_chunk(pd.DataFrame(rows, columns=PREDICTION_COLUMNS))
+    finally:
+        conn.close()
+
+
+def decode_categoricals(frame: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Replace stored category codes with display names. Archive files written
+    before the columns were encoded already hold names and pass through as-is.
+    """
+    frame = frame.copy()
+    for column, names in CATEGORY_NAMES.items():
+        frame[column] = frame[column].map(lambda v: names.get(v, v))
+    return frame
+
+
+def _scheduler_loop(interval_sec: int) -> None:
+    while not _stop_event.wait(interval_sec):
+        try:
+            run_retention()
+        except Exception as e:
+            # Never let a failed archive run kill the scheduler
+            print(f"[ERROR] Retention run failed: {type(e).__name__}: {e}")
+
+
+def start_retention_scheduler() -> None:
+    """Start the background retention thread (no-op when disabled or running)."""
+    global _scheduler_thread
+
+    if settings.RETENTION_DAYS <= 0 or settings.RETENTION_INTERVAL_MIN <= 0:
+        print("[RETENTION] Disabled by configuration")
+        return
+    if _scheduler_thread is not None and _scheduler_thread.is_alive():
+        return
+
+    _stop_event.clear()
+    _scheduler_thread = threading.Thread(
+        target=_scheduler_loop,
+        args=(settings.RETENTION_INTERVAL_MIN * 60,),
+        name="retention-scheduler",
+        daemon=True,
+    )
+    _scheduler_thread.start()
+
+
+def stop_retention_scheduler() -> None:
+    _stop_event.set()
+
+
+if __name__ == "__main__":
+    run_retention()
@@ -0,0 +1,287 @@
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+from multiprocessing.connection import Client, Listener
+
+# Single-writer process for multi-worker serving.
+#
+# With several server processes, every SQLite write (prediction rows, new
+# alerts, alert status changes and actions, users, settings, shadow scores,
+# open-order registry) is sent over a local Unix socket to one writer process
+# that owns the write side of the database. Prediction batches that queue up
+# behind each other are coalesced into a single transaction.
+#
+# Without a writer (plain `uvicorn app.main:app`), submit() just runs the
+# write in the calling process.
+
+ADDRESS_ENV = "SLA_DB_WRITER_ADDRESS"
+AUTHKEY_ENV = "SLA_DB_WRITER_KEY"
+
+MAX_COALESCED_ROWS = 5000
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _ops():
+    # Imported lazily: these modules call submit() themselves
+    from app.alert_engine import add_alert_action, record_alert, transition_alerts
+    from app.auth.users import insert_user
+    from app.open_orders import (
+        close_open_orders, expire_open_orders, update_open_order_plan,
+        update_open_order_scores, upsert_open_orders,
+    )
+    from app.settings_store import write_settings
+    from app.shadow import insert_shadow_rows, register_shadow_model
+    from db.db_connection import insert_predictions, write_health_probe
+
+    return {
+        "predictions": insert_predictions,
+        "alert": record_alert,
+        "alert_transition": transition_alerts,
+        "alert_action": add_alert_action,
+        "user": insert_user,
+        "settings": write_settings,
+        "shadow": insert_shadow_rows,
+        "shadow_model": register_shadow_model,
+        "open_orders": upsert_open_orders,
+        "open_order_scores": update_open_order_scores,
+        "open_order_plan": update_open_order_plan,
+        "open_orders_close": close_open_orders,
+        "open_orders_expire": expire_open_orders,
+        "health_probe": write_health_probe,
+    }
+
+
+def writer_enabled() -> bool:
+    return bool(os.environ.get(ADDRESS_ENV))
+
+
+class _WriterClient:
+    """One connection to the writer per process, shared by its threads."""
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+        self._pid = os.getpid()
+
+    def call(self, op: str, args: tuple, wait: bool):
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._conn is None or self._pid != os.getpid():
+                        self._connect()
+                    self._conn.send((op, args, wait))
+                    break
+                except OSError:
+                    # The job never reached the writer (restarted by the
+                    # supervisor, or socket dropped): reconnect and send once more
+                    self._conn = None
+                    if attempt:
+                        raise
+            if not wait:
+                return None
+            try:
+                ok, value = self._conn.recv()
+            except (EOFError, OSError):
+                # The writer may already have applied the job: never resend it
+                self._conn = None
+                raise
+
+        if not ok:
+            raise RuntimeError(f"DB writer failed on {op}: {value}")
+        return value
+
+
+def submit(op: str, *args, wait: bool = False):
+    """
+    Perform a named write. Goes through the writer process when one is
+    running; `wait=True` blocks for the result (or error) from the writer.
+    """
+    global _client
+
+    if not writer_enabled():
+        return _ops()[op](*args)
+
+    with _client_lock:
+        if _client is None:
+            _client = _WriterClient(
+                os.environ[ADDRESS_ENV], bytes.fromhex(os.environ[AUTHKEY_ENV])
+            )
+    return _client.call(op, args, wait)
+
+
+# ------------------------------
+# WRITER PROCESS
+# ------------------------------
+
+def _read_loop(conn, jobs: queue.Queue) -> None:
+    send_lock = threading.Lock()
+    while True:
+        try:
+            op, args, wait = conn.recv()
+        except (EOFError, OSError):
+            conn.close()
+            return
+        jobs.put((op, args, (conn, send_lock) if wait else None))
+
+
+def _reply(replies, ok: bool, value) -> None:
+    for reply in replies:
+        if reply is None:
+            continue
+        conn, send_lock = reply
+        try:
+            with send_lock:
+                conn.send((ok, value))
+        except OSError:
+            pass
+
+
+def _run(ops, op, args, replies) -> None:
+    try:
+        result = ops[op](*args)
+        _reply(replies, True, result)
+    except Exception as e:
+        print(f"[ERROR] DB writer failed on {op}: {type(e).__name__}: {e}")
+        _reply(replies, False, f"{type(e).__name__}: {e}")
+
+
+def _write_loop(jobs: queue.Queue) -> None:
+    ops = _ops()
+    pending = None
+    while True:
+        op, args, reply = pending or jobs.get()
+        pending = None
+        replies = [reply]
+
+        if op == "predictions":
+            # Fold any prediction batches already waiting into this insert;
+            # every folded sender gets the combined result or error
+            rows = list(args[0])
+            while len(rows) < MAX_COALESCED_ROWS:
+                try:
+                    nxt = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt[0] != "predictions":
+                    pending = nxt
+                    break
+                rows.extend(nxt[1][0])
+                replies.append(nxt[2])
+            args = (rows,)
+
+        _run(ops, op, args, replies)
+
+
+def _serve(address: str, authkey: bytes, ready) -> None:
+    from db.init_db import init_db
+    from db.analytics import start_analytics_sync
+    from db.retention import start_retention_scheduler
+
+    init_db()
+    # Retention deletes rows, so it lives with the only writer
+    start_retention_scheduler()
+    # One process appends to the analytics mirror; every worker reads it
+    start_analytics_sync()
+
+    jobs = queue.Queue()
+    threading.Thread(target=_write_loop, args=(jobs,), name="db-writer", daemon=True).start()
+
+    # A restarted writer reuses the socket path its predecessor left behind
+    if os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    ready.set()
+    print(f"[WRITER] DB writer listening on {address}")
+
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=_read_loop, args=(conn, jobs), daemon=True).start()
+
+
+def start_writer_process(timeout: float = 600.0, address: str | None = None,
+                         authkey: bytes | None = None):
+    """
+    Start the writer (spawned, so it does not inherit the model) and export
+    its address in the environment for server processes forked afterwards.
+    A restart passes the previous address and key, so existing clients
+    reconnect to the new process.
+    """
+    address = address or os.path.join(tempfile.mkdtemp(prefix="sla-writer-"), "writer.sock")
+    authkey = authkey or os.urandom(16)
+
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Event()
+    proc = ctx.Process(
+        target=_serve, args=(address, authkey, ready), name="db-writer", daemon=True
+    )
+    proc.start()
+
+    # init_db may run a migration first, so allow a generous startup window
+    if not ready.wait(timeout) or not proc.is_alive():
+        proc.terminate()
+        raise RuntimeError("DB writer process failed to start")
+
+    os.environ[ADDRESS_ENV] = address
+    os.environ[AUTHKEY_ENV] = authkey.hex()
+    return proc
+
+
+def _alive(proc) -> bool:
+    if not proc.is_alive():
+        return False
+    # gunicorn's arbiter reaps every child it has, so is_alive() can miss
+    # the exit: ask the kernel whether the pid is still there
+    try:
+        os.kill(proc.pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+class WriterSupervisor:
+    """
+    Runs the writer from the server's master process and starts a new one,
+    on the same socket and key, whenever it exits. Writes sent while it is
+    down fail; workers' clients reconnect on their next send.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.proc = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.proc = start_writer_process()
+        self._thread = threading.Thread(target=self._run, name="db-writer-supervisor", daemon=True)
+        self._thread.start()
+        return self.proc
+
+    def _run(self) -> None:
+        address = os.environ[ADDRESS_ENV]
+        authkey = bytes.fromhex(os.environ[AUTHKEY_ENV])
+        while not self._stop.wait(self.interval):
+            if _alive(self.proc):
+                continue
+            print(f"[WRITER] DB writer (pid {self.proc.pid}) exited, restarting")
+            try:
+                self.proc = start_writer_process(address=address, authkey=authkey)
+                print(f"[WRITER] DB writer restarted (pid {self.proc.pid})")
+            except Exception as e:
+                # Try again on the next tick
+                print(f"[ERROR] DB writer restart failed: {type(e).__name__}: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.proc is not None and self.proc.is_alive():
+            self.proc.terminate()
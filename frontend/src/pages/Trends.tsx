@@ -11,12 +11,26 @@ import {
   Legend,
   ResponsiveContainer,
 } from 'recharts';
-import { getTrends } from '../services/api';
-import type { TrendsResponse, TrendsHourlyPoint, CarrierPerformance } from '../types';
+import { getRiskHistogram, getTrends } from '../services/api';
+import type { TrendsResponse, TrendsHourlyPoint, CarrierPerformance, RiskHistogram } from '../types';
+
+interface RiskBin {
+  range: string;
+  count: number;
+}
+
+// One bar per bin, labelled by its lower edge
+function toRiskBins(histogram: RiskHistogram): RiskBin[] {
+  return (histogram.counts ?? []).map((count, i) => ({
+    range: histogram.edges[i].toFixed(2),
+    count,
+  }));
+}
 
 export const Trends: React.FC = () => {
   const [hourlyData, setHourlyData] = useState<TrendsHourlyPoint[]>([]);
   const [carrierPerf, setCarrierPerf] = useState<CarrierPerformance[]>([]);
+  const [riskBins, setRiskBins] = useState<RiskBin[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -25,10 +39,14 @@ export const Trends: React.FC = () => {
       try {
         setLoading(true);
         setError(null);
-        const res: TrendsResponse = await getTrends();
+        const [res, histogram]: [TrendsResponse, RiskHistogram] = await Promise.all([
+          getTrends(),
+          getRiskHistogram({ bins: 20, hours: 24 }),
+        ]);
 
         setHourlyData(res.hourly ?? []);
         setCarrierPerf(res.carrier_performance ?? []);
+        setRiskBins(toRiskBins(histogram));
       } catch (err) {
         console.error('Failed to load trends:', err);
         setError('Live trends unavailable. Please retry.');
@@ -47,7 +65,7 @@ export const Trends: React.FC = () => {
         <p className="text-slate-500 text-sm">
           {loading
             ? 'Loading live trends...'
-            : error ?? 'Carrier performance and hourly risk volume.'}
+            : error ?? 'Carrier performance, hourly risk volume and risk distribution.'}
         </p>
       </div>
 
@@ -106,6 +124,22 @@ export const Trends: React.FC = () => {
             </ResponsiveContainer>
           </div>
         </div>
+
+        {/* Risk Distribution (pre-binned by /stats/risk-histogram) */}
+        <div className="bg-white p-6 rounded-xl shadow-sm border border-slate-200 lg:col-span-2">
+          <h3 className="font-bold text-slate-900 mb-6">Risk Distribution (last 24h)</h3>
+          <div className="h-80">
+            <ResponsiveContainer width="100%" height="100%">
+              <BarChart data={riskBins} barCategoryGap={1}>
+                <CartesianGrid strokeDasharray="3 3" vertical={false} stroke="#e2e8f0" />
+                <XAxis dataKey="range" axisLine={false} tickLine={false} />
+                <YAxis axisLine={false} tickLine={false} />
+                <Tooltip contentStyle={{ borderRadius: '8px' }} />
+                <Bar dataKey="count" name="Predictions" fill="#f59e0b" radius={[4, 4, 0, 0]} />
+              </BarChart>
+            </ResponsiveContainer>
+          </div>
+        </div>
       </div>
     </div>
   );
@@ -4,6 +4,7 @@ import {
   PredictionResponse,
   DailyStats,
   TrendsResponse,
+  RiskHistogram,
   Settings,
   TrendsHourlyPoint,
   TrendsRiskBucket,
@@ -158,6 +159,24 @@ export async function getTrends(): Promise<TrendsResponse> {
   };
 }
 
+export async function getRiskHistogram(params: {
+  bins?: number;
+  hours?: number;
+  start?: string;
+  end?: string;
+  by?: 'carrier' | 'weather' | 'priority';
+} = {}): Promise<RiskHistogram> {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined) query.set(key, String(value));
+  });
+  const res = await fetch(`${API_URL}/stats/risk-histogram?${query}`, { headers: authHeaders() });
+  if (!res.ok) {
+    throw new Error('Failed to fetch risk histogram');
+  }
+  return res.json();
+}
+
 // ------------------------------
 // SETTINGS
 // ------------------------------
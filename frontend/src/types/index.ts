@@ -42,6 +42,8 @@ export interface PredictionResponse {
   order_id: string;
   miss_sla_proba: number;
   will_miss_sla: boolean;
+  model_version?: string | null;
+  scorer?: "primary" | "fallback" | null;
 }
 
 export interface LogEntry {
@@ -93,6 +95,17 @@ export interface TrendsResponse {
   carrier_performance?: CarrierPerformance[];
 }
 
+// GET /stats/risk-histogram: bin i covers [edges[i], edges[i + 1])
+export interface RiskHistogram {
+  start: string;
+  end: string | null;
+  bins: number;
+  edges: number[];
+  by: 'carrier' | 'weather' | 'priority' | null;
+  counts?: number[];
+  series?: Record<string, number[]>;
+}
+
 export interface Settings {
   threshold: number;      // 0–1
   enabled: boolean;
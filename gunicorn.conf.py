@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+
+# Multi-worker serving: `gunicorn -c gunicorn.conf.py app.main:app`
+#
+# - preload_app imports app.main (and so loads ModelService) once in the
+#   master; workers are forked from it and share the model pages
+#   copy-on-write instead of each loading their own copy.
+# - All SQLite writes go to one writer process (db/writer.py) started
+#   before the workers fork and restarted by the master if it exits.
+
+# One scoring thread per worker: parallelism comes from the processes, and
+# per-predict OpenMP pools in every worker would oversubscribe the cores.
+# Set before the app is preloaded so xgboost picks it up.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+
+_writer = None
+
+
+def on_starting(server):
+    global _writer
+    from db.writer import WriterSupervisor
+
+    # Started from the arbiter, which also restarts the writer if it dies
+    _writer = WriterSupervisor()
+    proc = _writer.start()
+    server.log.info("DB writer started (pid %s)", proc.pid)
+
+
+def on_exit(server):
+    if _writer is not None:
+        _writer.stop()
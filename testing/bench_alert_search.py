@@ -0,0 +1,132 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.routes.alerts import search_alerts
+from db.init_db import init_db
+
+# Alert search benchmark on a large synthetic history.
+#
+#   python -m testing.bench_alert_search --alerts 1000000
+#
+# Builds a throwaway database with the production schema (indexes, FTS
+# table and triggers included), fills it with `--alerts` alerts spread over
+# 90 days, then reports the median latency of typical searches for the
+# first page and for a page ten pages deep.
+
+NOTE_WORDS = [
+    "driver", "late", "traffic", "jam", "rain", "hub", "overload", "address",
+    "wrong", "customer", "unreachable", "reroute", "escalated", "bike", "flat",
+]
+
+QUERIES = {
+    "newest page": {},
+    "open": {"status": ["open"]},
+    "high severity, last 24h": {"severity": ["high"], "start": "{day_ago}"},
+    "order_id prefix": {"order_prefix": "ORD-1234"},
+    "proba 0.95-1.0": {"min_proba": 0.95, "max_proba": 1.0},
+    "time range (1 day)": {"start": "{week_ago}", "end": "{week_ago_end}"},
+    "notes: traffic": {"text": "traffic"},
+    "notes: reroute esc*, high": {"text": "reroute esc*", "severity": ["high"]},
+}
+
+
+def fill(path: str, n: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    conn = sqlite3.connect(path)
+    chunk = 100_000
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        ages = rng.integers(0, 90 * 24 * 3600, size)
+        proba = rng.uniform(0.5, 1.0, size)
+        status = rng.choice(["open", "acknowledged", "resolved"], size, p=[0.1, 0.1, 0.8])
+        # Same lowercase bands as app.alert_engine
+        severity = np.where(proba >= 0.8, "high", "medium")
+        words = rng.integers(0, len(NOTE_WORDS), (size, 4))
+        rows = []
+        for i in range(size):
+            resolved = status[i] == "resolved"
+            rows.append((
+                f"ORD-{start + i}",
+                float(proba[i]),
+                0.5,
+                (now - timedelta(seconds=int(ages[i]))).strftime("%Y-%m-%d %H:%M:%S"),
+                str(status[i]),
+                str(severity[i]),
+                " ".join(NOTE_WORDS[w] for w in words[i]) if resolved else None,
+            ))
+        conn.executemany(
+            """
+            INSERT INTO alerts (order_id, miss_sla_proba, threshold, triggered_at,
+                                status, severity, resolution_notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def _resolve(filters: dict) -> dict:
+    now = datetime.utcnow()
+    times = {
+        "day_ago": (now - timedelta(days=1)).isoformat(),
+        "week_ago": (now - timedelta(days=7)).isoformat(),
+        "week_ago_end": (now - timedelta(days=6)).isoformat(),
+    }
+    return {k: v.format(**times) if isinstance(v, str) else v for k, v in filters.items()}
+
+
+def bench(conn, filters: dict, limit: int, repeat: int) -> tuple[float, float, int]:
+    """Median ms for the first page and for the page after 10 pages in."""
+    first = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        page = search_alerts(conn, limit=limit, **filters)
+        first.append(time.perf_counter() - started)
+
+    cursor = page["next_cursor"]
+    for _ in range(9):
+        if cursor is None:
+            break
+        cursor = search_alerts(conn, limit=limit, cursor=cursor, **filters)["next_cursor"]
+    deep = []
+    if cursor is not None:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            search_alerts(conn, limit=limit, cursor=cursor, **filters)
+            deep.append(time.perf_counter() - started)
+    deep_ms = statistics.median(deep) * 1000 if deep else float("nan")
+    return statistics.median(first) * 1000, deep_ms, len(page["items"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark alert search")
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        init_db()
+        started = time.perf_counter()
+        fill("sla_logs.db", args.alerts, args.seed)
+        print(f"filled {args.alerts:,} alerts in {time.perf_counter() - started:.1f}s\n")
+
+        conn = sqlite3.connect("sla_logs.db")
+        print(f"{'query':<28} {'page 1 ms':>10} {'page 11 ms':>11} {'rows':>5}")
+        for name, filters in QUERIES.items():
+            filters = _resolve(filters)
+            first_ms, deep_ms, rows = bench(conn, filters, args.limit, args.repeat)
+            print(f"{name:<28} {first_ms:>10.2f} {deep_ms:>11.2f} {rows:>5}")
+        conn.close()
@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from training.synthetic import generate_orders
+
+# Load benchmark for POST /predict.
+#
+# Run it against two servers to compare builds, e.g. the current checkout
+# and a checkout of the old sync endpoint on another port:
+#
+#   python -m testing.bench_predict --url http://127.0.0.1:8000/predict
+#   python -m testing.bench_predict --url http://127.0.0.1:8001/predict
+#
+# Reports throughput, latency percentiles and error count.
+
+
+async def worker(client, url, orders, latencies, errors):
+    while orders:
+        order = orders.pop()
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json=order)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+        except Exception as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run(url, requests, concurrency):
+    orders = generate_orders(requests)
+    latencies, errors = [], []
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[worker(client, url, orders, latencies, errors) for _ in range(concurrency)]
+        )
+        elapsed = time.perf_counter() - start
+
+    print(f"url={url} requests={requests} concurrency={concurrency}")
+    print(f"  throughput: {len(latencies) / elapsed:.1f} req/s ({elapsed:.2f}s total)")
+    if latencies:
+        print(
+            f"  latency ms: mean={statistics.mean(latencies) * 1000:.2f} "
+            f"p50={percentile(latencies, 50) * 1000:.2f} "
+            f"p90={percentile(latencies, 90) * 1000:.2f} "
+            f"p99={percentile(latencies, 99) * 1000:.2f}"
+        )
+    print(f"  errors: {len(errors)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark POST /predict")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/predict")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.requests, args.concurrency))
@@ -0,0 +1,150 @@
+import argparse
+import json
+import sqlite3
+import statistics
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas import OrderInput, PredictionOutput
+from app.serialization import ORDER_LIST, PREDICTION, PREDICTION_LIST, rows_json
+from db.db_connection import LOG_COLUMNS
+from training.synthetic import generate_orders
+
+# Per-endpoint serialization benchmark.
+#
+#   python -m testing.bench_serialization --rows 200 --batch 500
+#
+# For each hot endpoint, times the request/response encoding work alone
+# (no DB round-trip, no inference), old path vs orjson path:
+#   - old: dicts built in Python, FastAPI's jsonable_encoder + json.dumps
+#     (what a plain `return [...]` / response_model costs), json.loads +
+#     model_validate for request bodies
+#   - new: cursor tuples or models encoded by orjson / precompiled
+#     TypeAdapters, request bodies validated straight from bytes
+#
+# Run from the repository root.
+
+ALERT_COLUMNS = [
+    "id", "order_id", "miss_sla_proba", "threshold", "triggered_at",
+    "status", "severity", "acknowledged_at", "resolved_at", "resolution_notes",
+    "actual_sla_missed",
+]
+
+
+def _default_dumps(content) -> bytes:
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def log_rows(n: int) -> list[tuple]:
+    now = datetime.now().isoformat()
+    return [
+        (f"ORD-{i}", now, 0.4 + (i % 50) / 100, i % 3 == 0, 2.5, 4, 0.6, 0.5, "CLEAR", "NORMAL", "BIKE")
+        for i in range(n)
+    ]
+
+
+def alert_cursor(n: int):
+    """An in-memory alerts table, so the old path gets real sqlite3.Row objects."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE alerts ({', '.join(ALERT_COLUMNS)})")
+    conn.executemany(
+        f"INSERT INTO alerts VALUES ({', '.join('?' * len(ALERT_COLUMNS))})",
+        [
+            (i, f"ORD-{i}", 0.91, 0.8, "2024-01-01 12:00:00", "open", "high",
+             None, None, None, None)
+            for i in range(n)
+        ],
+    )
+    return conn
+
+
+def time_call(fn, repeat: int) -> float:
+    """Median milliseconds per call."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def cases(rows: int, batch: int):
+    logs = log_rows(rows)
+
+    def logs_old():
+        return _default_dumps([
+            {
+                "order_id": r[0], "timestamp": r[1], "miss_sla_proba": r[2],
+                "will_miss_sla": bool(r[3]), "distance": r[4], "items": r[5],
+                "hub_load": r[6], "traffic": r[7], "weather": r[8],
+                "priority": r[9], "carrier": r[10],
+            }
+            for r in logs
+        ])
+
+    def logs_new():
+        return rows_json(LOG_COLUMNS, logs, bools=("will_miss_sla",))
+
+    conn = alert_cursor(rows)
+    query = f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts"
+
+    def alerts_old():
+        conn.row_factory = sqlite3.Row
+        return _default_dumps([dict(r) for r in conn.execute(query).fetchall()])
+
+    def alerts_new():
+        conn.row_factory = None
+        cur = conn.execute(query)
+        return rows_json([d[0] for d in cur.description], cur.fetchall())
+
+    order_body = json.dumps(generate_orders(1, seed=1)[0]).encode()
+    result = PredictionOutput(
+        order_id="ORD-1", miss_sla_proba=0.42, will_miss_sla=False,
+        model_version="xgb_model-3f9a1c2b", scorer="primary",
+    )
+
+    def predict_old():
+        OrderInput.model_validate(json.loads(order_body))
+        return _default_dumps(result)
+
+    def predict_new():
+        OrderInput.model_validate_json(order_body)
+        return PREDICTION.dump_json(result)
+
+    batch_body = json.dumps(generate_orders(batch, seed=2)).encode()
+    results = [result] * batch
+
+    def batch_old():
+        [OrderInput.model_validate(o) for o in json.loads(batch_body)]
+        return _default_dumps(results)
+
+    def batch_new():
+        ORDER_LIST.validate_json(batch_body)
+        return PREDICTION_LIST.dump_json(results)
+
+    return {
+        f"GET /logs ({rows} rows)": (logs_old, logs_new),
+        f"GET /alerts ({rows} rows)": (alerts_old, alerts_new),
+        "POST /predict": (predict_old, predict_new),
+        f"POST /predict/batch ({batch} orders)": (batch_old, batch_new),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark response/request encoding per endpoint")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<34} {'old ms':>9} {'new ms':>9} {'speedup':>8}")
+    for name, (old, new) in cases(args.rows, args.batch).items():
+        old_ms = time_call(old, args.repeat)
+        new_ms = time_call(new, args.repeat)
+        print(f"{name:<34} {old_ms:>9.3f} {new_ms:>9.3f} {old_ms / new_ms:>7.1f}x")
@@ -0,0 +1,113 @@
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from training.synthetic import generate_orders
+
+# Cold-start benchmark.
+#
+#   python -m testing.bench_startup --runs 3
+#
+# For a fresh interpreter each run, reports:
+#   - import time of app.main (python -X importtime) and its slowest packages
+#   - time until the server's port accepts connections
+#   - time until GET /ready returns 200 (warmup finished)
+#   - latency of the first /predict and the median of the next ones
+#
+# Run from the repository root with a trained model in models/.
+
+
+def import_profile(top: int):
+    """Total app.main import time and the `top` slowest top-level packages."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+
+    packages = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1:
+            # Outermost imports only, so times are not double counted
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0) + cumulative
+            total += cumulative
+    slowest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return total / 1e6, [(name, us / 1e6) for name, us in slowest]
+
+
+def _port_open(port: int) -> bool:
+    with socket.socket() as sock:
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def cold_start(port: int, requests: int, timeout: float) -> dict:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while not _port_open(port):
+            if time.perf_counter() - start > timeout or server.poll() is not None:
+                raise SystemExit("server did not open its port")
+            time.sleep(0.01)
+        port_open = time.perf_counter() - start
+
+        base = f"http://127.0.0.1:{port}"
+        with httpx.Client(timeout=30) as client:
+            while client.get(f"{base}/ready").status_code != 200:
+                if time.perf_counter() - start > timeout:
+                    raise SystemExit("server did not become ready")
+                time.sleep(0.01)
+            ready = time.perf_counter() - start
+
+            latencies = []
+            for order in generate_orders(requests + 1, seed=1):
+                t = time.perf_counter()
+                client.post(f"{base}/predict", json=order).raise_for_status()
+                latencies.append(time.perf_counter() - t)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "port_open": port_open,
+        "ready": ready,
+        "first_ms": latencies[0] * 1000,
+        "steady_p50_ms": statistics.median(latencies[1:]) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API cold start")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    total, slowest = import_profile(args.top)
+    print(f"import app.main: {total:.3f}s")
+    for name, sec in slowest:
+        print(f"  {name:<24} {sec:.3f}s")
+
+    runs = [cold_start(args.port, args.requests, args.timeout) for _ in range(args.runs)]
+    print(f"\ncold start over {args.runs} runs (median):")
+    for key, unit in (("port_open", "s"), ("ready", "s"), ("first_ms", "ms"), ("steady_p50_ms", "ms")):
+        print(f"  {key:<14} {statistics.median(r[key] for r in runs):.3f}{unit}")
@@ -0,0 +1,47 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from training.synthetic import PROFILES, generate_orders, iter_chunks, write_dataset
+
+# Throughput benchmark for the synthetic data generator.
+#
+#   python -m testing.bench_synthetic --rows 5000000 --chunk-size 250000
+#
+# Reports rows/s for in-memory generation of each training profile, for
+# streaming to Parquet and NPY, and for building /predict payloads.
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {rows / elapsed:>14,.0f} rows/s ({elapsed:.2f}s)")
+
+
+def run(rows, chunk_size, orders, seed):
+    print(f"rows={rows} chunk_size={chunk_size} seed={seed}")
+    for profile in sorted(PROFILES):
+        timed(
+            f"generate[{profile}]", rows,
+            lambda: sum(len(y) for _, y in iter_chunks(rows, chunk_size, profile, seed)),
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix in (".parquet", ".npy"):
+            out = Path(tmp) / f"bench{suffix}"
+            timed(f"write{suffix}", rows, lambda: write_dataset(out, rows, chunk_size, seed=seed))
+
+    timed("orders (payload dicts)", orders, lambda: generate_orders(orders, seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the synthetic data generator")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    run(args.rows, args.chunk_size, args.orders, args.seed)
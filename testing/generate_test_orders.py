@@ -1,31 +1,12 @@
+import argparse
 import json
-import random
-from datetime import datetime, timedelta
-import numpy as np
 from pathlib import Path
 
+from training.synthetic import generate_orders
 
-def generate_test_order():
-    now = datetime.now()
-    created = now - timedelta(minutes=random.randint(1, 60))
-    promised = created + timedelta(minutes=random.randint(10, 40))
 
-    return {
-        "order_id": f"T_{random.randint(10000, 99999)}",
-        "created_at": created.isoformat(),
-        "promised_at": promised.isoformat(),
-        "distance_km": float(np.clip(np.random.normal(3, 1), 0.5, 8)),
-        "items_count": random.randint(1, 12),
-        "hub_load": round(random.uniform(0.1, 1.0), 2),
-        "traffic_index": round(random.uniform(0.1, 1.0), 2),
-        "weather_code": random.choice(["CLEAR", "CLOUDS", "RAIN"]),
-        "priority": random.choice(["LOW", "NORMAL", "HIGH"]),
-        "carrier": random.choice(["BIKE", "SCOOTER", "CAR", "VAN"])
-    }
-
-
-def generate_bulk(n=100):
-    orders = [generate_test_order() for _ in range(n)]
+def generate_bulk(n=100, seed=None):
+    orders = generate_orders(n, seed)
 
     Path("data").mkdir(exist_ok=True)
 
@@ -36,4 +17,9 @@ def generate_bulk(n=100):
 
 
 if __name__ == "__main__":
-    generate_bulk(100)
+    parser = argparse.ArgumentParser(description="Write test /predict payloads")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    generate_bulk(args.count, args.seed)
@@ -0,0 +1,240 @@
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import alerts, metrics
+from db.init_db import init_db
+from db.kpis import check_alert_kpis, read_alert_kpis
+from db.writer import ADDRESS_ENV
+
+DB_PATH = "sla_logs.db"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # Every module opens the relative sla_logs.db; writes run inline
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(ADDRESS_ENV, raising=False)
+    init_db()
+    app = FastAPI()
+    app.include_router(alerts.router)
+    app.include_router(metrics.router)
+    with TestClient(app) as c:
+        yield c
+
+
+def add_alerts(n, severity="low", start_minute=0):
+    """Insert n open alerts, one minute apart, and return their ids (oldest first)."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        ids = []
+        for i in range(n):
+            minute = start_minute + i
+            cur = conn.execute(
+                """
+                INSERT INTO alerts (order_id, miss_sla_proba, threshold, triggered_at, status, severity)
+                VALUES (?, ?, 0.7, datetime('2024-01-01 00:00:00', ?), 'open', ?)
+                """,
+                (f"ORD-{minute:05d}", 0.9, f"+{minute} minutes", severity),
+            )
+            ids.append(cur.lastrowid)
+        conn.commit()
+        return ids
+    finally:
+        conn.close()
+
+
+def kpis():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        assert check_alert_kpis(conn) == {}
+        return read_alert_kpis(conn)
+    finally:
+        conn.close()
+
+
+# ------------------------------
+# KPI CONSISTENCY
+# ------------------------------
+
+def test_kpis_follow_ack_resolve_and_delete(client):
+    a, b, c = add_alerts(3)
+    assert kpis()["total"] == 3
+
+    assert client.post(f"/alerts/{a}/ack").status_code == 200
+    # Response time runs to resolution, so an ack alone adds nothing
+    assert kpis()["responded"] == 0
+
+    r = client.post(f"/alerts/{a}/resolve", json={"actual_sla_missed": False})
+    assert r.status_code == 200
+    r = client.post(f"/alerts/{b}/resolve", json={"actual_sla_missed": True})
+    assert r.status_code == 200
+    counts = kpis()
+    assert counts["resolved"] == 2
+    assert counts["false_positives"] == 1
+    assert counts["responded"] == 2
+
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM alerts WHERE id IN (?, ?)", (a, c))
+    conn.commit()
+    conn.close()
+    counts = kpis()
+    assert counts["total"] == 1
+    assert counts["resolved"] == 1
+    assert counts["false_positives"] == 0
+
+    ops = client.get("/stats/ops").json()
+    assert ops["total_alerts"] == 1
+    assert ops["resolved"] == 1
+    assert ops["false_positive_rate"] == 0
+
+
+def test_repeated_transitions_are_rejected_and_not_counted(client):
+    (a,) = add_alerts(1)
+    assert client.post(f"/alerts/{a}/ack").status_code == 200
+    assert client.post(f"/alerts/{a}/ack").status_code == 404
+    assert client.post(f"/alerts/{a}/resolve", json={"actual_sla_missed": True}).status_code == 200
+    assert client.post(f"/alerts/{a}/resolve", json={"actual_sla_missed": False}).status_code == 404
+    assert client.post("/alerts/999999/ack").status_code == 404
+
+    counts = kpis()
+    assert counts["resolved"] == 1
+    assert counts["false_positives"] == 0
+    assert counts["responded"] == 1
+
+
+# ------------------------------
+# SEARCH
+# ------------------------------
+
+def test_search_cursor_pages_cover_every_alert_once(client):
+    ids = add_alerts(23)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/alerts/search", params=params).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ids[::-1]
+
+
+def test_search_filters_apply_across_pages(client):
+    add_alerts(6, severity="low")
+    high = add_alerts(7, severity="high", start_minute=100)
+    first = client.get("/alerts/search", params={"severity": "high", "limit": 4}).json()
+    second = client.get(
+        "/alerts/search", params={"severity": "high", "limit": 4, "cursor": first["next_cursor"]}
+    ).json()
+    assert [i["id"] for i in first["items"] + second["items"]] == high[::-1]
+    assert second["next_cursor"] is None
+
+
+def test_search_invalid_cursor_is_400(client):
+    assert client.get("/alerts/search", params={"cursor": "nonsense"}).status_code == 400
+
+
+@pytest.mark.parametrize("q", ["*", '"', '""', "* *", 'late"', "OR", "a AND"])
+def test_search_text_edge_cases_do_not_error(client, q):
+    add_alerts(3)
+    r = client.get("/alerts/search", params={"q": q})
+    assert r.status_code == 200
+    if q in ("*", "* *"):
+        # No word terms: no text filter at all
+        assert len(r.json()["items"]) == 3
+
+
+def test_search_text_matches_resolution_notes(client):
+    a, b = add_alerts(2)
+    client.post(f"/alerts/{a}/resolve", json={"actual_sla_missed": True, "resolution_notes": "carrier delay"})
+    client.post(f"/alerts/{b}/resolve", json={"actual_sla_missed": False, "resolution_notes": "warehouse backlog"})
+
+    items = client.get("/alerts/search", params={"q": "carr*"}).json()["items"]
+    assert [i["id"] for i in items] == [a]
+    items = client.get("/alerts/search", params={"q": 'warehouse"'}).json()["items"]
+    assert [i["id"] for i in items] == [b]
+
+
+# ------------------------------
+# BULK TRANSITIONS
+# ------------------------------
+
+def test_bulk_ack_by_ids_reports_each_outcome(client):
+    a, b, c = add_alerts(3)
+    client.post(f"/alerts/{b}/ack")
+    client.post(f"/alerts/{c}/resolve", json={"actual_sla_missed": True})
+
+    r = client.post("/alerts/bulk/ack", json={"ids": [a, b, c, 999999, a]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["updated"] == 1
+    assert body["more"] is False
+    assert body["results"] == [
+        {"id": a, "outcome": "acknowledged"},
+        {"id": b, "outcome": "already_acknowledged"},
+        {"id": c, "outcome": "already_resolved"},
+        {"id": 999999, "outcome": "not_found"},
+    ]
+    assert kpis()["resolved"] == 1
+
+
+def test_bulk_resolve_by_filter(client):
+    low = add_alerts(4, severity="low")
+    high = add_alerts(2, severity="high", start_minute=100)
+    client.post(f"/alerts/{low[0]}/ack")
+
+    r = client.post(
+        "/alerts/bulk/resolve",
+        json={
+            "filter": {"severity": ["low"], "older_than_min": 0},
+            "actual_sla_missed": False,
+            "resolution_notes": "batch close",
+        },
+    )
+    assert r.status_code == 200
+    body = r.json()
+    assert body["updated"] == 4
+    assert [res["id"] for res in body["results"]] == low
+    assert {res["outcome"] for res in body["results"]} == {"resolved"}
+
+    counts = kpis()
+    assert counts["resolved"] == 4
+    assert counts["false_positives"] == 4
+
+    open_ids = [i["id"] for i in client.get("/alerts/search", params={"status": "open"}).json()["items"]]
+    assert sorted(open_ids) == high
+    actions = client.get(f"/alerts/{low[1]}/actions").json()
+    assert len(actions) == 1
+
+    # Nothing left to resolve
+    again = client.post(
+        "/alerts/bulk/resolve",
+        json={"filter": {"severity": ["low"]}, "actual_sla_missed": False},
+    ).json()
+    assert again["updated"] == 0
+    assert again["results"] == []
+
+
+def test_bulk_filter_sets_more_past_the_limit(client, monkeypatch):
+    monkeypatch.setattr(alerts.settings, "ALERT_BULK_MAX", 3)
+    ids = add_alerts(5)
+    first = client.post("/alerts/bulk/ack", json={"filter": {}}).json()
+    assert first["more"] is True
+    assert [res["id"] for res in first["results"]] == ids[:3]
+    second = client.post("/alerts/bulk/ack", json={"filter": {}}).json()
+    assert second["more"] is False
+    assert [res["id"] for res in second["results"]] == ids[3:]
+    assert client.post("/alerts/bulk/ack", json={"ids": ids[:4]}).status_code == 413
+
+
+def test_bulk_payload_validation(client):
+    (a,) = add_alerts(1)
+    assert client.post("/alerts/bulk/ack", json={}).status_code == 400
+    assert client.post("/alerts/bulk/ack", json={"ids": [a], "filter": {}}).status_code == 400
+    r = client.post("/alerts/bulk/ack", json={"filter": {"older_than_min": -5}})
+    assert r.status_code == 422
+    assert client.post("/alerts/bulk/resolve", json={"ids": [a]}).status_code == 422
+    assert kpis()["responded"] == 0
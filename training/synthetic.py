@@ -0,0 +1,251 @@
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from app.features import CARRIER_MAP, PRIORITY_MAP, WEATHER_MAP
+
+# Vectorized synthetic order generator shared by the training scripts and
+# the test-order tools.
+#
+# Every column is drawn for a whole chunk at once from one seeded
+# numpy Generator, so millions of rows take seconds rather than minutes and
+# the same seed (and chunk size) always gives the same data. Order times are
+# drawn relative to `now`: with a seed and no explicit `now` that is the
+# fixed REFERENCE_NOW, so the hour-dependent (peak / rush hour) labels do not
+# follow the wall clock. Categoricals are produced directly as the integer
+# codes the model is served with.
+#
+#   python -m training.synthetic --rows 5000000 --out data/synthetic.parquet --seed 7
+#   python -m training.synthetic --rows 5000000 --out data/synthetic.npy --seed 7
+
+FEATURE_COLUMNS = [
+    "age_min", "promise_delta_min", "distance_km", "items_count",
+    "hub_load", "traffic_index", "weather_code", "priority", "carrier",
+]
+LABEL_COLUMN = "miss_sla"
+
+# `now` for seeded data: the evening peak, so both peak and off-peak orders
+# occur in each profile's age range
+REFERENCE_NOW = datetime(2024, 1, 1, 19, 0)
+
+WEATHER = list(WEATHER_MAP)
+PRIORITY = list(PRIORITY_MAP)
+CARRIER = list(CARRIER_MAP)
+
+
+def _order_times(rng, n, now: datetime, age_range, window_range):
+    """age and promise delta in minutes, plus the local hour each order was created."""
+    age = rng.integers(age_range[0], age_range[1] + 1, n)
+    window = rng.integers(window_range[0], window_range[1] + 1, n)
+    now_of_day = now.hour * 60 + now.minute + now.second / 60
+    created_hour = np.floor((now_of_day - age) / 60).astype(np.int64) % 24
+    return age.astype(np.float64), (window - age).astype(np.float64), window, created_hour
+
+
+def _codes(rng, n, weights):
+    return rng.choice(len(weights), size=n, p=weights)
+
+
+def _xgboost_profile(rng, n, now):
+    age, delta, _, hour = _order_times(rng, n, now, (1, 120), (15, 45))
+
+    # Traffic: skewed mixture of low / medium / high bands
+    band = _codes(rng, n, [0.4, 0.4, 0.2])
+    traffic = rng.uniform(np.array([0.1, 0.4, 0.7])[band], np.array([0.4, 0.7, 1.0])[band])
+
+    hub_load = np.clip(rng.normal(0.5, 0.2, n), 0.1, 1.0)
+    distance = np.clip(rng.normal(2.5, 1, n), 0.5, 8)
+    items = np.clip(rng.normal(4, 2, n), 1, 12).astype(np.int64)
+
+    weather = _codes(rng, n, [0.7, 0.2, 0.1])
+    priority = _codes(rng, n, [0.1, 0.7, 0.2])
+    carrier = _codes(rng, n, [0.5, 0.3, 0.15, 0.05])
+
+    peak = np.isin(hour, [18, 19, 20, 21, 22])
+    risk = (
+        0.35 * hub_load
+        + 0.35 * traffic
+        + 0.20 * (distance / 8)
+        + 0.10 * peak
+        + np.array([0.0, 0.03, 0.1])[weather]
+        + np.array([0.0, 0.02, 0.05, 0.08])[carrier]
+        + 0.05 * (priority == PRIORITY_MAP["HIGH"])
+        + rng.normal(0, 0.05, n)
+    )
+    miss = np.clip(risk, 0, 1) > 0.55
+
+    return [age, delta, distance, items, hub_load, traffic, weather, priority, carrier], miss
+
+
+def _baseline_profile(rng, n, now):
+    age, delta, window, hour = _order_times(rng, n, now, (5, 180), (10, 35))
+
+    distance = np.clip(rng.normal(3, 1, n), 0.5, 8)
+    items = np.clip(rng.normal(5, 2, n), 1, 12).astype(np.int64)
+
+    # Rush hours push hub load and traffic into the upper range
+    rush = np.isin(hour, [8, 9, 10, 18, 19, 20])
+    hub_load = np.where(rush, rng.uniform(0.5, 1.0, n), rng.uniform(0.2, 0.8, n))
+    traffic = np.where(rush, rng.uniform(0.6, 1.0, n), rng.uniform(0.2, 0.8, n))
+
+    weather = _codes(rng, n, [0.6, 0.3, 0.1])
+    priority = _codes(rng, n, [0.1, 0.8, 0.1])
+    carrier = _codes(rng, n, [0.45, 0.35, 0.15, 0.05])
+
+    risk = (
+        0.40 * hub_load
+        + 0.40 * traffic
+        + (distance / 8) * 0.30
+        + np.array([0.0, 0.05, 0.12, 0.25])[carrier]
+        + np.array([0.0, 0.05, 0.25])[weather]
+        + np.where(window < 18, 0.30, 0.05)
+        + rng.normal(0, 0.05, n)
+    )
+    miss = risk > 0.65
+
+    return [age, delta, distance, items, hub_load, traffic, weather, priority, carrier], miss
+
+
+PROFILES = {
+    "xgboost": _xgboost_profile,
+    "baseline": _baseline_profile,
+}
+
+
+def reference_now(seed: int | None, now: datetime | None = None) -> datetime:
+    """`now` if given, else REFERENCE_NOW for seeded data and the wall clock otherwise."""
+    if now is not None:
+        return now
+    return REFERENCE_NOW if seed is not None else datetime.now()
+
+
+def generate_chunk(rng, n: int, profile: str = "xgboost", now: datetime | None = None):
+    """One chunk as (X float32 (n, 9) in FEATURE_COLUMNS order, y uint8 (n,))."""
+    columns, miss = PROFILES[profile](rng, n, now or datetime.now())
+    return np.column_stack(columns).astype(np.float32), miss.astype(np.uint8)
+
+
+def iter_chunks(n: int, chunk_size: int = 250_000, profile: str = "xgboost",
+                seed: int | None = None, now: datetime | None = None):
+    """Yield (X, y) chunks totalling `n` rows, reproducible for a given seed and chunk size."""
+    rng = np.random.default_rng(seed)
+    now = reference_now(seed, now)
+    for start in range(0, n, chunk_size):
+        yield generate_chunk(rng, min(chunk_size, n - start), profile, now)
+
+
+def generate_dataset(n: int, profile: str = "xgboost", seed: int | None = None,
+                     now: datetime | None = None):
+    """The full dataset in memory as a DataFrame of FEATURE_COLUMNS plus miss_sla."""
+    import pandas as pd
+
+    X, y = generate_chunk(np.random.default_rng(seed), n, profile, reference_now(seed, now))
+    df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    df[LABEL_COLUMN] = y
+    return df
+
+
+def write_dataset(path, n: int, chunk_size: int = 250_000, profile: str = "xgboost",
+                  seed: int | None = None, now: datetime | None = None) -> list[Path]:
+    """
+    Stream `n` rows to disk chunk by chunk, so memory stays at one chunk.
+
+    `.parquet` writes one file with a row group per chunk; `.npy` writes
+    `<stem>_X.npy` and `<stem>_y.npy`, filled in place through memory maps.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    chunks = iter_chunks(n, chunk_size, profile, seed, now)
+
+    if path.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema(
+            [(c, pa.float32()) for c in FEATURE_COLUMNS] + [(LABEL_COLUMN, pa.uint8())]
+        )
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for X, y in chunks:
+                arrays = [pa.array(X[:, i]) for i in range(X.shape[1])] + [pa.array(y)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        return [path]
+
+    if path.suffix == ".npy":
+        x_path = path.with_name(f"{path.stem}_X.npy")
+        y_path = path.with_name(f"{path.stem}_y.npy")
+        X_out = np.lib.format.open_memmap(x_path, mode="w+", dtype=np.float32,
+                                          shape=(n, len(FEATURE_COLUMNS)))
+        y_out = np.lib.format.open_memmap(y_path, mode="w+", dtype=np.uint8, shape=(n,))
+        offset = 0
+        for X, y in chunks:
+            X_out[offset:offset + len(y)] = X
+            y_out[offset:offset + len(y)] = y
+            offset += len(y)
+        X_out.flush()
+        y_out.flush()
+        return [x_path, y_path]
+
+    raise ValueError(f"Unsupported dataset format: {path.suffix} (use .parquet or .npy)")
+
+
+# ------------------------------
+# TEST ORDERS (API payloads)
+# ------------------------------
+
+def generate_orders(n: int, seed: int | None = None, now: datetime | None = None) -> list[dict]:
+    """`n` /predict payloads with uniformly mixed categoricals."""
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now()
+
+    created = np.datetime64(now, "s") - rng.integers(1, 61, n).astype("timedelta64[m]")
+    promised = created + rng.integers(10, 41, n).astype("timedelta64[m]")
+    ids = rng.integers(10000, 100000, n)
+    distance = np.clip(rng.normal(3, 1, n), 0.5, 8)
+    items = rng.integers(1, 13, n)
+    hub_load = np.round(rng.uniform(0.1, 1.0, n), 2)
+    traffic = np.round(rng.uniform(0.1, 1.0, n), 2)
+    weather = rng.integers(0, len(WEATHER), n)
+    priority = rng.integers(0, len(PRIORITY), n)
+    carrier = rng.integers(0, len(CARRIER), n)
+
+    # Payloads are per-row dicts anyway; only this final assembly loops
+    return [
+        {
+            "order_id": f"T_{i}",
+            "created_at": str(c),
+            "promised_at": str(p),
+            "distance_km": float(d),
+            "items_count": int(k),
+            "hub_load": float(h),
+            "traffic_index": float(t),
+            "weather_code": WEATHER[w],
+            "priority": PRIORITY[pr],
+            "carrier": CARRIER[ca],
+        }
+        for i, c, p, d, k, h, t, w, pr, ca in zip(
+            ids.tolist(), created.astype(str), promised.astype(str), distance.tolist(),
+            items.tolist(), hub_load.tolist(), traffic.tolist(), weather.tolist(),
+            priority.tolist(), carrier.tolist(),
+        )
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic training dataset")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="xgboost")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None,
+                        help="reference time for order ages (default: fixed with --seed, else wall clock)")
+    parser.add_argument("--out", default="data/synthetic.parquet")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = write_dataset(args.out, args.rows, args.chunk_size, args.profile, args.seed, args.now)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.rows} rows in {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s) → "
+          + ", ".join(str(p) for p in paths))
@@ -0,0 +1,285 @@
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from xgboost import XGBClassifier
+
+from app.features import UNKNOWN_CODE, model_codes
+from app.model import validate_model
+from db.retention import archive_files
+from training.synthetic import FEATURE_COLUMNS
+
+# Out-of-core training on production labels.
+#
+# Labels come from `alerts.actual_sla_missed` and features from the
+# `predictions` rows logged for the same order (every logged snapshot of a
+# labeled order is one training row). Prediction rows are streamed from the
+# live table and/or the Parquet archive a chunk at a time and fed to XGBoost
+# through a DataIter with an on-disk cache, so memory stays at one chunk
+# plus the label map no matter how many rows there are. The eval metrics in
+# the report are accumulated the same way, one eval chunk at a time.
+#
+#   python -m training.train_from_db --source all --out models/xgb_model_db.pkl
+#
+# The split is by alert id, so all snapshots of one order land on the same
+# side. Only alerted orders carry labels, so the data leans towards risky
+# orders; the report states how many rows and positives each side had.
+
+DB_PATH = "sla_logs.db"
+
+# predictions column holding each feature, in FEATURE_COLUMNS order
+SOURCE_COLUMNS = [
+    "age_min", "promise_delta_min", "distance", "items",
+    "hub_load", "traffic", "weather", "priority", "carrier",
+]
+
+# Equal-width prediction bins for the streamed eval AUC
+AUC_BINS = 1 << 16
+
+PARAMS = {
+    "objective": "binary:logistic",
+    "eval_metric": ["logloss", "auc"],
+    "tree_method": "hist",
+    "max_depth": 6,
+    "eta": 0.05,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+}
+
+
+def load_labels() -> dict:
+    """order_id → (label, alert_id) for every alert with a recorded outcome."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            """
+            SELECT order_id, actual_sla_missed, id
+            FROM alerts
+            WHERE actual_sla_missed IS NOT NULL
+            """
+        ).fetchall()
+    finally:
+        conn.close()
+    return {order_id: (int(label), alert_id) for order_id, label, alert_id in rows}
+
+
+def _live_batches(chunk_size: int):
+    columns = ["order_id"] + SOURCE_COLUMNS
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        after = 0
+        while True:
+            # Keyset pagination: each chunk is an index range scan on id
+            rows = conn.execute(
+                f"""
+                SELECT id, {", ".join(columns)}
+                FROM predictions
+                WHERE id > ? AND age_min IS NOT NULL
+                ORDER BY id
+                LIMIT ?
+                """,
+                (after, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield pd.DataFrame([r[1:] for r in rows], columns=columns)
+    finally:
+        conn.close()
+
+
+def _archive_batches(chunk_size: int):
+    import pyarrow.parquet as pq
+
+    columns = ["order_id"] + SOURCE_COLUMNS
+    for path in archive_files(None, None):
+        parquet = pq.ParquetFile(path)
+        # Partitions written before time features were logged cannot be used
+        if not set(columns) <= set(parquet.schema_arrow.names):
+            continue
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas().dropna(subset=["age_min"])
+
+
+def iter_prediction_batches(source: str, chunk_size: int):
+    """Prediction rows (order_id plus features) from the archive and/or live table."""
+    if source in ("archive", "all"):
+        yield from _archive_batches(chunk_size)
+    if source in ("db", "all"):
+        yield from _live_batches(chunk_size)
+
+
+def iter_labeled_chunks(source: str, labels: dict, holdout: bool, eval_pct: int, chunk_size: int):
+    """(X float32, y) chunks of labeled rows on one side of the split."""
+    for frame in iter_prediction_batches(source, chunk_size):
+        matched = frame["order_id"].map(labels).dropna()
+        if matched.empty:
+            continue
+        label = np.fromiter((m[0] for m in matched), dtype=np.float32, count=len(matched))
+        alert_id = np.fromiter((m[1] for m in matched), dtype=np.int64, count=len(matched))
+        side = (alert_id % 100 < eval_pct) == holdout
+        if not side.any():
+            continue
+        X = frame.loc[matched.index, SOURCE_COLUMNS].to_numpy(dtype=np.float32)
+        # Logged UNKNOWN codes -> the fallback codes the model is scored with
+        for column, default in zip((6, 7, 8), model_codes(UNKNOWN_CODE, UNKNOWN_CODE, UNKNOWN_CODE)):
+            X[X[:, column] == UNKNOWN_CODE, column] = default
+        yield X[side], label[side]
+
+
+class LabeledRows(xgb.DataIter):
+    """XGBoost data iterator over `iter_labeled_chunks`, cached on disk."""
+
+    def __init__(self, cache_prefix: str, **chunk_args):
+        self.chunk_args = chunk_args
+        self._chunks = None
+        self._counting = True
+        self.rows = 0
+        self.positives = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> int:
+        if self._chunks is None:
+            self._chunks = iter_labeled_chunks(**self.chunk_args)
+        for X, y in self._chunks:
+            input_data(data=X, label=y)
+            if self._counting:
+                self.rows += len(y)
+                self.positives += int(y.sum())
+            return 1
+        # XGBoost may pass over the data more than once; count the first
+        self._counting = False
+        return 0
+
+    def reset(self) -> None:
+        self._chunks = None
+
+
+def eval_metrics(booster, chunks) -> dict:
+    """
+    AUC, logloss and Brier score of the best iteration over (X, y) chunks,
+    holding one chunk in memory at a time.
+
+    Logloss and Brier are exact running sums. AUC is computed from per-class
+    histograms of the predictions over AUC_BINS bins (pairs in the same bin
+    count as ties), so it is within about 1 / AUC_BINS of the exact value.
+    """
+    iteration_range = (0, booster.best_iteration + 1)
+    pos_hist = np.zeros(AUC_BINS, dtype=np.int64)
+    neg_hist = np.zeros(AUC_BINS, dtype=np.int64)
+    rows, logloss, brier = 0, 0.0, 0.0
+    for X, y in chunks:
+        p = booster.inplace_predict(X, iteration_range=iteration_range).astype(np.float64)
+        q = np.clip(p, 1e-15, 1 - 1e-15)
+        logloss -= float(np.sum(y * np.log(q) + (1 - y) * np.log1p(-q)))
+        brier += float(np.sum((p - y) ** 2))
+        bins = np.minimum((p * AUC_BINS).astype(np.int64), AUC_BINS - 1)
+        pos_hist += np.bincount(bins[y == 1], minlength=AUC_BINS)
+        neg_hist += np.bincount(bins[y == 0], minlength=AUC_BINS)
+        rows += len(y)
+
+    positives, negatives = int(pos_hist.sum()), int(neg_hist.sum())
+    auc = None
+    if positives and negatives:
+        # P(positive scores above a negative), ties counted half
+        neg_below = np.cumsum(neg_hist) - neg_hist
+        auc = float(np.sum(pos_hist * (neg_below + 0.5 * neg_hist))) / (positives * negatives)
+    return {
+        "auc": round(auc, 4) if auc is not None else None,
+        "logloss": round(logloss / rows, 4),
+        "brier": round(brier / rows, 4),
+    }
+
+
+def to_classifier(booster) -> XGBClassifier:
+    """Wrap a trained Booster as the sklearn-style classifier ModelService serves."""
+    with tempfile.TemporaryDirectory() as tmp:
+        booster_path = Path(tmp) / "booster.json"
+        booster.save_model(booster_path)
+        model = XGBClassifier()
+        model.load_model(booster_path)
+    return model
+
+
+def train_from_db(source="all", out="models/xgb_model_db.pkl", rounds=300,
+                  early_stopping=30, eval_pct=20, chunk_size=100_000) -> dict:
+    started = time.perf_counter()
+    labels = load_labels()
+    if not labels:
+        raise SystemExit("No alerts with actual_sla_missed recorded; nothing to train on.")
+
+    with tempfile.TemporaryDirectory(prefix="xgb-cache-") as cache:
+        chunk_args = {"source": source, "labels": labels, "eval_pct": eval_pct, "chunk_size": chunk_size}
+        train_rows = LabeledRows(str(Path(cache) / "train"), holdout=False, **chunk_args)
+        eval_rows = LabeledRows(str(Path(cache) / "eval"), holdout=True, **chunk_args)
+        dtrain = xgb.DMatrix(train_rows)
+        deval = xgb.DMatrix(eval_rows)
+        if dtrain.num_row() == 0 or deval.num_row() == 0:
+            raise SystemExit(
+                f"Not enough labeled rows (train={dtrain.num_row()}, eval={deval.num_row()})."
+            )
+
+        booster = xgb.train(
+            PARAMS,
+            dtrain,
+            num_boost_round=rounds,
+            evals=[(dtrain, "train"), (deval, "eval")],
+            early_stopping_rounds=early_stopping,
+            verbose_eval=50,
+        )
+
+    # Streamed again from the source so the eval split never sits in memory
+    metrics = eval_metrics(booster, iter_labeled_chunks(holdout=True, **chunk_args))
+
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    model = to_classifier(booster)
+    validate_model(model)
+    joblib.dump(model, out)
+
+    report = {
+        "trained_at": datetime.now().isoformat(),
+        "source": source,
+        "model_path": str(out),
+        "params": PARAMS,
+        "best_iteration": booster.best_iteration,
+        "train_rows": train_rows.rows,
+        "train_positives": train_rows.positives,
+        "eval_rows": eval_rows.rows,
+        "eval_positives": eval_rows.positives,
+        **metrics,
+        "feature_importance": {
+            FEATURE_COLUMNS[int(k[1:])]: round(v, 4)
+            for k, v in booster.get_score(importance_type="gain").items()
+        },
+        "elapsed_sec": round(time.perf_counter() - started, 1),
+    }
+    report_path = out.with_name(f"{out.stem}_report.json")
+    report_path.write_text(json.dumps(report, indent=2))
+
+    print(f"\nEval AUC: {report['auc']}  logloss: {report['logloss']}  "
+          f"({report['train_rows']} train / {report['eval_rows']} eval rows)")
+    print(f"Saved → {out}\nReport → {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train XGBoost on labeled production data")
+    parser.add_argument("--source", choices=["db", "archive", "all"], default="all")
+    parser.add_argument("--out", default="models/xgb_model_db.pkl")
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--early-stopping", type=int, default=30)
+    parser.add_argument("--eval-pct", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    train_from_db(args.source, args.out, args.rounds, args.early_stopping,
+                  args.eval_pct, args.chunk_size)
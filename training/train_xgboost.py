@@ -1,109 +1,18 @@
-import numpy as np 
-import pandas as pd  
+import argparse
+from datetime import datetime
 from xgboost import XGBClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score
 from pathlib import Path 
 import joblib
-from datetime import datetime, timedelta
-import random
-
-# Generate a synthetic training dataset for the XGBoost model
-
-def generate_dataset(n=5000):
-    rows = []
-    now = datetime.now()
-
-    for _ in range(n):
-        created = now - timedelta(minutes=random.randint(1, 120))
-        promised = created + timedelta(minutes=random.randint(15, 45))
-
-        #Traffic (skewed realistic distribution)
-        traffic = np.random.choice(
-            [np.random.uniform(0.1, 0.4),
-             np.random.uniform(0.4, 0.7),
-             np.random.uniform(0.7, 1.0)],
-            p=[0.4, 0.4, 0.2]
-        )
-
-        # Hub Load (skew normal somewhat centered) 
-        hub_load = float(np.clip(np.random.normal(0.5, 0.2), 0.1, 1.0))
-
-        # Distance (skew to low range like real hyperlocal deliveries) 
-        distance = float(np.clip(np.random.normal(2.5, 1), 0.5, 8))
-
-        items = int(np.clip(np.random.normal(4, 2), 1, 12))
-
-        weather = np.random.choice(["CLEAR", "CLOUDS", "RAIN"], p=[0.7, 0.2, 0.1])
-        priority = np.random.choice(["LOW", "NORMAL", "HIGH"], p=[0.1, 0.7, 0.2])
-        carrier = np.random.choice(["BIKE", "SCOOTER", "CAR", "VAN"], p=[0.5, 0.3, 0.15, 0.05])
-
-        #Peak hour multiplier
-        hour = created.hour
-        peak_factor = 1.0 if hour in [18,19,20,21,22] else 0.0
-
-        # Base Risk Formula
-        risk = (
-            0.35 * hub_load +
-            0.35 * traffic +
-            0.20 * (distance / 8) +
-            0.10 * peak_factor
-        )
-
-        # Weather impact
-        if weather == "RAIN":
-            risk += 0.1
-        elif weather == "CLOUDS":
-            risk += 0.03
-
-        # Carrier speed factor
-        carrier_map = {"BIKE": 0, "SCOOTER": 0.02, "CAR": 0.05, "VAN": 0.08}
-        risk += carrier_map[carrier]
-
-        # Priority effect (tight SLA → higher risk)
-        if priority == "HIGH":
-            risk += 0.05
-
-        # Random noise to avoid deterministic patterns
-        risk += np.random.normal(0, 0.05)
-
-        # Clip to 0–1
-        risk = np.clip(risk, 0, 1)
-
-        # Label (miss SLA)
-        miss_sla = 1 if risk > 0.55 else 0
-
-        rows.append([
-            created, promised, distance, items, hub_load, traffic,
-            weather, priority, carrier, miss_sla
-        ])
-
-    df = pd.DataFrame(rows, columns=[
-        "created_at", "promised_at", "distance_km", "items_count",
-        "hub_load", "traffic_index", "weather_code", "priority",
-        "carrier", "miss_sla"
-    ])
-
-    return df
-
+from training.synthetic import FEATURE_COLUMNS, generate_dataset
 
 # Train and persist the XGBoost model
 
-def train_xgb():
-    df=generate_dataset(6000)
-
-    df["weather_code"] = df["weather_code"].map({"CLEAR":0, "CLOUDS":1, "RAIN":2})
-    df["priority"] = df["priority"].map({"LOW":0, "NORMAL":1, "HIGH":2})
-    df["carrier"]  = df["carrier"].map({"BIKE":0, "SCOOTER":1, "CAR":2, "VAN":3})
-
-    now = datetime.now()
-    df["age_min"] = (now - df["created_at"]).dt.seconds / 60
-    df["promise_delta_min"] = (df["promised_at"] - now).dt.seconds / 60
+def train_xgb(n=6000, seed=42, now=None):
+    df = generate_dataset(n, profile="xgboost", seed=seed, now=now)
 
-    X = df[[
-        "age_min","promise_delta_min","distance_km","items_count",
-        "hub_load","traffic_index","weather_code","priority","carrier"
-    ]].values
+    X = df[FEATURE_COLUMNS].values
 
     y = df["miss_sla"].values
 
@@ -135,4 +44,11 @@ def train_xgb():
 
 
 if __name__ == "__main__":
-    train_xgb()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the xgboost model on synthetic data")
+    parser.add_argument("--rows", type=int, default=6000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None,
+                        help="reference time for order ages (default: the fixed REFERENCE_NOW)")
+    args = parser.parse_args()
+
+    train_xgb(args.rows, args.seed, args.now)
\ No newline at end of file
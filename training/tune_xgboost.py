@@ -0,0 +1,262 @@
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from app.model import validate_model
+from training.synthetic import write_dataset
+from training.train_from_db import to_classifier
+
+# Parallel hyperparameter search for the XGBoost model.
+#
+#   python -m training.tune_xgboost --trials 40 --workers 4 --max-latency-ms 2
+#
+# The dataset is written once as NPY (or an existing one is reused with
+# --data). Each pool process memory-maps it and builds the quantized train
+# and eval matrices (QuantileDMatrix) once, then reuses them for every trial
+# it runs. A trial stops early when eval AUC stalls, and is pruned when its
+# AUC at a checkpoint round trails the median of earlier trials there.
+#
+# Every finished trial is appended to <dir>/trials.jsonl. Trial parameters
+# come from a seeded sampler, so re-running the same command skips trials
+# already completed or pruned in the log, retries failed ones and continues
+# where it stopped. The winner is the best
+# AUC whose single-order predict_proba latency is within --max-latency-ms.
+
+MAX_BIN = 256
+CHECKPOINTS = (25, 50, 100, 200)
+# Trial outcomes that are final; anything else is retried on resume
+FINISHED = ("complete", "pruned")
+
+_worker = {}
+
+
+def sample_params(rng) -> dict:
+    return {
+        "max_depth": int(rng.integers(3, 10)),
+        "eta": float(10 ** rng.uniform(-2.0, -0.5)),
+        "subsample": float(rng.uniform(0.6, 1.0)),
+        "colsample_bytree": float(rng.uniform(0.6, 1.0)),
+        "min_child_weight": float(10 ** rng.uniform(0, 1.5)),
+        "lambda": float(10 ** rng.uniform(-1, 1)),
+        "num_boost_round": int(rng.choice([100, 200, 300, 500])),
+    }
+
+
+def trial_plan(n_trials: int, seed: int) -> list[dict]:
+    """The full, reproducible list of trials for a search."""
+    rng = np.random.default_rng(seed)
+    return [{"trial": i, "params": sample_params(rng)} for i in range(n_trials)]
+
+
+def read_log(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    done = {}
+    for line in path.read_text().splitlines():
+        if line.strip():
+            record = json.loads(line)
+            done[record["trial"]] = record
+    return done
+
+
+def prune_thresholds(records) -> dict:
+    """Median eval AUC of finished trials at each checkpoint round."""
+    thresholds = {}
+    for round_ in CHECKPOINTS:
+        values = [r["curve"][str(round_)] for r in records if str(round_) in r.get("curve", {})]
+        if len(values) >= 3:
+            thresholds[round_] = statistics.median(values)
+    return thresholds
+
+
+# ------------------------------
+# WORKER PROCESS
+# ------------------------------
+
+def _init_worker(x_path: str, y_path: str, eval_pct: int, threads: int) -> None:
+    import xgboost as xgb
+
+    X = np.load(x_path, mmap_mode="r")
+    y = np.load(y_path, mmap_mode="r")
+    split = len(y) - len(y) * eval_pct // 100
+
+    # Quantized once per process; trials only change training parameters
+    dtrain = xgb.QuantileDMatrix(X[:split], y[:split], max_bin=MAX_BIN, nthread=threads)
+    deval = xgb.QuantileDMatrix(X[split:], y[split:], ref=dtrain, nthread=threads)
+    _worker.update(dtrain=dtrain, deval=deval, probe=np.ascontiguousarray(X[split:split + 1]),
+                   threads=threads)
+
+
+def _measure_latency_ms(model, probe, repeats: int = 200) -> float:
+    """Median single-order predict_proba time, as on the /predict path."""
+    model.set_params(n_jobs=1)
+    for _ in range(10):
+        model.predict_proba(probe)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(probe)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def run_trial(trial: dict, thresholds: dict, early_stopping: int, out_dir: str) -> dict:
+    import xgboost as xgb
+
+    class Pruner(xgb.callback.TrainingCallback):
+        def __init__(self):
+            self.curve = {}
+            self.pruned_at = None
+
+        def after_iteration(self, model, epoch, evals_log):
+            round_ = epoch + 1
+            if round_ in CHECKPOINTS:
+                auc = evals_log["eval"]["auc"][-1]
+                self.curve[str(round_)] = auc
+                if round_ in thresholds and auc < thresholds[round_]:
+                    self.pruned_at = round_
+                    return True
+            return False
+
+    params = dict(trial["params"])
+    rounds = params.pop("num_boost_round")
+    params.update(objective="binary:logistic", eval_metric="auc", tree_method="hist",
+                  max_bin=MAX_BIN, nthread=_worker["threads"])
+
+    started = time.perf_counter()
+    pruner = Pruner()
+    booster = xgb.train(
+        params,
+        _worker["dtrain"],
+        num_boost_round=rounds,
+        evals=[(_worker["deval"], "eval")],
+        early_stopping_rounds=early_stopping,
+        callbacks=[pruner],
+        verbose_eval=False,
+    )
+    record = {
+        **trial,
+        "curve": pruner.curve,
+        "train_sec": round(time.perf_counter() - started, 2),
+        "best_iteration": booster.best_iteration,
+        "auc": round(float(booster.best_score), 5),
+    }
+    if pruner.pruned_at is not None:
+        return {**record, "status": "pruned", "pruned_at": pruner.pruned_at}
+
+    # Serve-shaped model trimmed to its best round, timed like /predict
+    booster = booster[: booster.best_iteration + 1]
+    model = to_classifier(booster)
+    record["latency_ms"] = round(_measure_latency_ms(model, _worker["probe"]), 4)
+    booster.save_model(Path(out_dir) / f"trial-{trial['trial']}.json")
+    return {**record, "status": "complete"}
+
+
+# ------------------------------
+# SEARCH
+# ------------------------------
+
+def _prepare_data(args, out_dir: Path) -> tuple[str, str]:
+    stem = Path(args.data) if args.data else out_dir / "data.npy"
+    x_path = stem.with_name(f"{stem.stem}_X.npy")
+    y_path = stem.with_name(f"{stem.stem}_y.npy")
+    if not (x_path.exists() and y_path.exists()):
+        if args.data:
+            raise SystemExit(f"{x_path} / {y_path} not found")
+        print(f"Writing {args.rows} synthetic rows → {x_path.parent}")
+        write_dataset(stem, args.rows, seed=args.seed, now=args.now)
+    return str(x_path), str(y_path)
+
+
+def tune(args) -> dict | None:
+    out_dir = Path(args.dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    log_path = out_dir / "trials.jsonl"
+    x_path, y_path = _prepare_data(args, out_dir)
+
+    done = read_log(log_path)
+    # Failed trials (crash, OOM, killed worker) are run again on resume
+    todo = [
+        t for t in trial_plan(args.trials, args.seed)
+        if done.get(t["trial"], {}).get("status") not in FINISHED
+    ]
+    print(f"{len(done)} trials in {log_path}, {len(todo)} to run on {args.workers} workers")
+
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(x_path, y_path, args.eval_pct, threads),
+    ) as pool, log_path.open("a") as log:
+        pending = {}
+        while todo or pending:
+            # Keep one trial per worker in flight; each is pruned against
+            # the trials finished when it was submitted
+            while todo and len(pending) < args.workers:
+                trial = todo.pop(0)
+                future = pool.submit(run_trial, trial, prune_thresholds(done.values()),
+                                     args.early_stopping, str(out_dir))
+                pending[future] = trial
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                trial = pending.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {**trial, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+                done[record["trial"]] = record
+                log.write(json.dumps(record) + "\n")
+                log.flush()
+                print(f"trial {record['trial']:>3} {record['status']:<8} "
+                      f"auc={record.get('auc')} latency_ms={record.get('latency_ms')}")
+
+    eligible = [
+        r for r in done.values()
+        if r["status"] == "complete" and r["latency_ms"] <= args.max_latency_ms
+    ]
+    if not eligible:
+        print(f"No complete trial within {args.max_latency_ms} ms")
+        return None
+
+    best = max(eligible, key=lambda r: r["auc"])
+    import xgboost as xgb
+
+    booster = xgb.Booster(model_file=str(out_dir / f"trial-{best['trial']}.json"))
+    model = to_classifier(booster)
+    validate_model(model)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, args.out)
+    (out_dir / "best.json").write_text(json.dumps({**best, "model_path": args.out}, indent=2))
+
+    print(f"\nBest trial {best['trial']}: AUC {best['auc']}, {best['latency_ms']} ms")
+    print(f"Saved → {args.out}")
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel XGBoost hyperparameter search")
+    parser.add_argument("--trials", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--dir", default="models/tuning")
+    parser.add_argument("--data", default=None, help="existing NPY dataset stem (see training.synthetic)")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--eval-pct", type=int, default=20)
+    parser.add_argument("--early-stopping", type=int, default=30)
+    parser.add_argument("--max-latency-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None,
+                        help="reference time for order ages (default: the fixed REFERENCE_NOW)")
+    parser.add_argument("--out", default="models/xgb_model_tuned.pkl")
+    tune(parser.parse_args())